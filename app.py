@@ -1,8 +1,9 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from twilio.twiml.messaging_response import MessagingResponse
 from twilio.rest import Client
-from chatbot_engine import MotorRespuestasAvanzado
+from motor_compartido import obtener_motor, es_solicitud_valida_twilio, estado_interno
+from utils.formatters import formatear_evento_sse
 from dotenv import load_dotenv
 load_dotenv()  # Añade esto al inicio del archivo
 import logging
@@ -16,7 +17,7 @@ app = Flask(__name__)
 CORS(app)
 
 # Inicializar motor y cliente de Twilio
-motor = MotorRespuestasAvanzado()
+motor = obtener_motor()
 
 # Configuración de Twilio (usa variables de entorno por seguridad)
 twilio_account_sid = os.environ.get('TWILIO_ACCOUNT_SID')
@@ -43,6 +44,32 @@ def chat_web():
         logger.error(f"Error en /chat: {str(e)}")
         return jsonify({'response': 'Error procesando tu mensaje.'})
 
+@app.route('/chat/stream', methods=['POST'])
+def chat_web_stream():
+    """Igual que /chat pero envía la respuesta por Server-Sent Events conforme se genera"""
+    data = request.get_json(silent=True) or {}
+    user_message = data.get('message', '').strip()
+    
+    def generar():
+        if not user_message:
+            yield formatear_evento_sse({'delta': 'Por favor, escribe un mensaje.'})
+        else:
+            try:
+                for fragmento in motor.procesar_mensaje_stream(user_message):
+                    if fragmento:
+                        yield formatear_evento_sse({'delta': fragmento})
+            except Exception as e:
+                logger.error(f"Error en /chat/stream: {str(e)}")
+                yield formatear_evento_sse({'delta': 'Error procesando tu mensaje.'})
+        yield formatear_evento_sse({}, evento='fin')
+    
+    return Response(
+        stream_with_context(generar()),
+        mimetype='text/event-stream',
+        # Sin caché ni buffering de proxies (nginx) para que cada fragmento llegue de inmediato
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/whatsapp', methods=['POST'])
 def chat_whatsapp():
     try:
@@ -73,12 +100,6 @@ def chat_whatsapp():
         twilio_response.message("❌ Error procesando tu mensaje.")
         return str(twilio_response)
 
-def es_solicitud_valida_twilio(request):
-    """Verifica que la solicitud viene de Twilio (opcional pero recomendado)"""
-    # Puedes implementar verificación de firma Twilio aquí
-    # https://www.twilio.com/docs/usage/webhooks/webhooks-security
-    return True  # Por ahora retornamos True para testing
-
 @app.route('/test-twilio', methods=['GET'])
 def test_twilio():
     """Endpoint para probar la conexión con Twilio"""
@@ -96,6 +117,11 @@ def test_twilio():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
+@app.route('/status', methods=['GET'])
+def status():
+    """Endpoint de monitoreo del estado interno del chatbot"""
+    return jsonify(estado_interno())
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,108 @@
+from quart import Quart, render_template, request, jsonify, Response
+from twilio.twiml.messaging_response import MessagingResponse
+from motor_compartido import obtener_motor, es_solicitud_valida_twilio, estado_interno
+from utils.http_client_async import obtener_cliente_http_async
+from utils.formatters import formatear_evento_sse
+import asyncio
+import logging
+
+# Servidor ASGI: un solo worker atiende cientos de conversaciones en vuelo
+# Ejecutar con: uvicorn asgi:app --host 0.0.0.0 --port 5000
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+app = Quart(__name__)
+motor = obtener_motor()
+
+@app.route('/')
+async def index():
+    return await render_template('chat.html')
+
+@app.route('/chat', methods=['POST'])
+async def chat_web():
+    try:
+        data = await request.get_json()
+        user_message = data.get('message', '').strip()
+        
+        if not user_message:
+            return jsonify({'response': 'Por favor, escribe un mensaje.'})
+        
+        response = await motor.procesar_mensaje_async(user_message)
+        return jsonify({'response': response})
+        
+    except Exception as e:
+        logger.error(f"Error en /chat: {str(e)}")
+        return jsonify({'response': 'Error procesando tu mensaje.'})
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_web_stream():
+    """Igual que /chat pero envía la respuesta por Server-Sent Events conforme se genera"""
+    data = await request.get_json(silent=True) or {}
+    user_message = data.get('message', '').strip()
+    
+    async def generar():
+        if not user_message:
+            yield formatear_evento_sse({'delta': 'Por favor, escribe un mensaje.'})
+        else:
+            try:
+                # El generador del motor es síncrono: cada fragmento se pide en un hilo
+                fragmentos = motor.procesar_mensaje_stream(user_message)
+                fin = object()
+                while True:
+                    fragmento = await asyncio.to_thread(next, fragmentos, fin)
+                    if fragmento is fin:
+                        break
+                    if fragmento:
+                        yield formatear_evento_sse({'delta': fragmento})
+            except Exception as e:
+                logger.error(f"Error en /chat/stream: {str(e)}")
+                yield formatear_evento_sse({'delta': 'Error procesando tu mensaje.'})
+        yield formatear_evento_sse({}, evento='fin')
+    
+    response = Response(
+        generar(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.timeout = None
+    return response
+
+@app.route('/whatsapp', methods=['POST'])
+async def chat_whatsapp():
+    try:
+        if not es_solicitud_valida_twilio(request):
+            return "Unauthorized", 403
+        
+        form = await request.form
+        user_message = form.get('Body', '').strip()
+        from_number = form.get('From', '')
+        
+        logger.info(f"WhatsApp de {from_number}: {user_message}")
+        
+        if not user_message:
+            return "Mensaje vacío", 400
+        
+        response = await motor.procesar_mensaje_async(user_message)
+        
+        twilio_response = MessagingResponse()
+        twilio_response.message(response)
+        
+        return str(twilio_response)
+        
+    except Exception as e:
+        logger.error(f"Error en /whatsapp: {str(e)}")
+        twilio_response = MessagingResponse()
+        twilio_response.message("❌ Error procesando tu mensaje.")
+        return str(twilio_response)
+
+@app.route('/status', methods=['GET'])
+async def status():
+    """Endpoint de monitoreo del estado interno del chatbot"""
+    return jsonify({
+        **estado_interno(),
+        'http_async': obtener_cliente_http_async().estadisticas()
+    })
+
+@app.after_serving
+async def cerrar_clientes():
+    await obtener_cliente_http_async().cerrar()
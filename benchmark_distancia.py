@@ -0,0 +1,147 @@
+# benchmark_distancia.py
+# Micro-benchmarks de la distancia de edición: implementación original (programación dinámica en Python)
+# contra la versión bit-paralela de Myers, una por una y en lote contra un vocabulario completo.
+# La versión en lote vive solo aquí: con las pocas palabras de un mensaje, el arranque de NumPy cuesta
+# más que recorrerlas una por una con distancia_levenshtein.
+# Uso: python benchmark_distancia.py [--candidatas 5000] [--maximo 2]
+import time
+import random
+import argparse
+import numpy as np
+
+from utils.edit_distance import distancia_levenshtein, _mascaras_patron
+
+_LETRAS = "abcdefghijklmnñopqrstuvwxyzáéíóú"
+
+
+def distancia_referencia(s1, s2):
+    """Implementación anterior de MotorRespuestasAvanzado._distancia_levenshtein"""
+    if len(s1) < len(s2):
+        return distancia_referencia(s2, s1)
+    if len(s2) == 0:
+        return len(s1)
+
+    previous_row = range(len(s2) + 1)
+    for i, c1 in enumerate(s1):
+        current_row = [i + 1]
+        for j, c2 in enumerate(s2):
+            insertions = previous_row[j + 1] + 1
+            deletions = current_row[j] + 1
+            substitutions = previous_row[j] + (c1 != c2)
+            current_row.append(min(insertions, deletions, substitutions))
+        previous_row = current_row
+
+    return previous_row[-1]
+
+
+def _codificar(palabras):
+    """Matriz (n, L) de códigos Unicode con 0 como relleno, y la longitud de cada palabra"""
+    matriz = np.array(palabras, dtype=str)
+    largo = max(1, matriz.dtype.itemsize // 4)
+    codigos = matriz.astype(f"<U{largo}").view(np.uint32).reshape(len(palabras), largo)
+    return codigos, np.array([len(p) for p in palabras], dtype=np.int64)
+
+
+def distancias_lote(palabra, candidatas, maximo=None):
+    """
+    Distancias de Levenshtein de `palabra` contra todas las `candidatas` en una sola pasada
+    vectorizada: cada candidata es un carril de 64 bits y las columnas avanzan a la vez.
+    Con `maximo`, las distancias mayores se reportan como maximo + 1.
+    """
+    candidatas = list(candidatas)
+    if not candidatas:
+        return np.zeros(0, dtype=np.int64)
+    m = len(palabra)
+    if m == 0 or m > 64:
+        # Patrón vacío o que no cabe en 64 bits: una por una con enteros de Python
+        return np.array([distancia_levenshtein(palabra, c, maximo) for c in candidatas], dtype=np.int64)
+
+    codigos, longitudes = _codificar(candidatas)
+    mascaras = _mascaras_patron(palabra)
+    letras = np.array(sorted(ord(c) for c in mascaras), dtype=np.uint32)
+    bits = np.array([mascaras[chr(c)] for c in letras], dtype=np.uint64)
+
+    todos = np.uint64((1 << m) - 1)
+    alto = np.uint64(1 << (m - 1))
+    uno = np.uint64(1)
+    n = len(candidatas)
+    pv = np.full(n, todos, dtype=np.uint64)
+    mv = np.zeros(n, dtype=np.uint64)
+    distancia = np.full(n, m, dtype=np.int64)
+
+    vivas = np.ones(n, dtype=bool)
+    if maximo is not None:
+        vivas = np.abs(longitudes - m) <= maximo
+
+    for j in range(codigos.shape[1]):
+        activas = vivas & (j < longitudes)
+        if not activas.any():
+            break
+        columna = codigos[:, j]
+        posicion = np.minimum(np.searchsorted(letras, columna), len(letras) - 1)
+        eq = np.where(letras[posicion] == columna, bits[posicion], np.uint64(0))
+
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & todos)
+        mh = pv & xh
+        delta = (ph & alto != 0).astype(np.int64) - (mh & alto != 0).astype(np.int64)
+        ph = ((ph << uno) | uno) & todos
+        mh = (mh << uno) & todos
+        nuevo_pv = mh | (~(xv | ph) & todos)
+        nuevo_mv = ph & xv
+
+        # Las candidatas más cortas (relleno) o descartadas conservan su estado
+        pv = np.where(activas, nuevo_pv, pv)
+        mv = np.where(activas, nuevo_mv, mv)
+        distancia = np.where(activas, distancia + delta, distancia)
+
+        if maximo is not None:
+            vivas &= distancia - np.maximum(longitudes - j - 1, 0) <= maximo
+
+    if maximo is not None:
+        distancia = np.where(vivas, np.minimum(distancia, maximo + 1), maximo + 1)
+    return distancia
+
+
+def medir(nombre, funcion, pares):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    print(f"   {nombre:<32} {duracion * 1000:9.1f} ms   {duracion / pares * 1e6:8.2f} µs/par")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de la distancia de edición")
+    parser.add_argument("--candidatas", type=int, default=5000, help="Tamaño del vocabulario de prueba")
+    parser.add_argument("--consultas", type=int, default=20, help="Palabras a comparar contra todo el vocabulario")
+    parser.add_argument("--maximo", type=int, default=2, help="Distancia máxima para el corte temprano")
+    parser.add_argument("--semilla", type=int, default=13)
+    args = parser.parse_args()
+
+    rng = random.Random(args.semilla)
+    vocabulario = ["".join(rng.choice(_LETRAS) for _ in range(rng.randint(3, 14))) for _ in range(args.candidatas)]
+    consultas = rng.sample(vocabulario, args.consultas)
+    pares = len(consultas) * len(vocabulario)
+    print(f"📏 {len(consultas)} consultas x {len(vocabulario)} candidatas = {pares} pares")
+
+    referencia = medir("referencia (DP en Python)",
+                       lambda: [[distancia_referencia(c, v) for v in vocabulario] for c in consultas], pares)
+    myers = medir("Myers, una por una",
+                  lambda: [[distancia_levenshtein(c, v) for v in vocabulario] for c in consultas], pares)
+    medir(f"Myers, una por una (máx {args.maximo})",
+          lambda: [[distancia_levenshtein(c, v, args.maximo) for v in vocabulario] for c in consultas], pares)
+    lote = medir("Myers en lote (NumPy)",
+                 lambda: [distancias_lote(c, vocabulario).tolist() for c in consultas], pares)
+    lote_maximo = medir(f"Myers en lote (máx {args.maximo})",
+                        lambda: [distancias_lote(c, vocabulario, args.maximo).tolist() for c in consultas], pares)
+
+    assert myers == referencia and lote == referencia, "Las implementaciones no coinciden"
+    esperado = [[min(d, args.maximo + 1) for d in fila] for fila in referencia]
+    assert lote_maximo == esperado, "El corte por distancia máxima no coincide"
+    print("✅ Todas las implementaciones coinciden con la referencia")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,89 @@
 import requests
+import httpx
+import asyncio
 import re
 import logging
 import random
+import time
+import json
 
-from autocorrect import Speller
-from config import get_openrouter_config, CONTEXTO_GENERAL, EMPRESA_INFO
+from config import router_proveedores, EMPRESA_INFO
 from database import DatabaseManager, SecurityError
 
 # ✅ Importar los nuevos módulos
 from modules.ubicaciones_module import UbicacionesModule
 from modules.servicios_module import ServiciosModule
-from utils.context_manager import ContextManager
+from modules.registro import RegistroModulos
+from data.vocabulario_data import PALABRAS_PERSONALIZADAS
+from utils.context_manager import ContextManager, valor_contexto
+from utils.http_client import obtener_cliente_http
+from utils.http_client_async import obtener_cliente_http_async
+from utils.rate_limiter import ProveedorOcupadoError
+from utils.cache import crear_cache_clasificaciones, clave_normalizada
+from utils.single_flight import VueloUnico
+from utils.hedging import crear_cobertura
+from utils.circuit_breaker import crear_circuito_proveedor, CircuitoAbiertoError
+from utils.micro_batch import crear_micro_lotes
+from utils.spell_checker import obtener_corrector
+from utils.edit_distance import distancia_levenshtein
+from utils.pipeline import Etapa, SolicitudMensaje, MetricasEtapas
+from utils.palabras_clave import obtener_detector
+from utils.mensaje_normalizado import MensajeNormalizado, normalizar, quitar_acentos
+from utils.indice_ubicaciones import obtener_indice_ubicaciones, buscar_ubicacion_confiable
+from utils.geo import obtener_geocodificador
+from utils.clasificador_local import cargar_clasificador, RegistroEtiquetas, ETIQUETA_OTRO
+from utils.prompt_builder import (
+    construir_mensajes_clasificacion, construir_mensajes_lote, interpretar_respuesta_lote, ContadorTokens
+)
 
 logger = logging.getLogger(__name__)
 
+# Etiquetas de clasificación que se pueden reutilizar desde la caché
+ETIQUETAS_CLASIFICACION = (
+    "UBICACIONES:", "SERVICIOS:", "HORARIOS:", "RESTRICCIONES:",
+    "COTIZACION:", "ATENCION_CLIENTE:", "CONTACTO:"
+)
+
+RESPUESTA_OCUPADO = (
+    "En este momento estamos atendiendo muchas solicitudes. "
+    "Por favor, intenta nuevamente en unos segundos."
+)
+
+RESPUESTA_GENERICA = (
+    "¿Podría proporcionar más detalles sobre su consulta? "
+    "Un ejecutivo se pondrá en contacto si es necesario."
+)
+
+# Etapas de procesar_mensaje, de la más barata a la más cara: la primera que retorna una respuesta
+# corta el recorrido. La corrección ortográfica se hace recién en la etapa de caché.
+ETAPAS_PROCESAMIENTO = (
+    Etapa('nombre', '_etapa_nombre', False),
+    Etapa('ubicacion_pendiente', '_etapa_ubicacion_pendiente', False),
+    Etapa('saludo_despedida', '_etapa_saludo_despedida', True),
+    Etapa('menu', '_etapa_menu', True),
+    Etapa('ubicacion_directa', '_etapa_ubicacion_directa', True),
+    Etapa('cache', '_etapa_cache', True),
+    Etapa('clasificador_local', '_etapa_clasificador_local', True),
+    Etapa('servicios', '_etapa_servicios', True),
+    Etapa('llm', '_etapa_llm', True),
+    Etapa('modulos', '_etapa_modulos', True),
+)
+ETAPA_FORMATO = Etapa('formato', '_finalizar_respuesta', False)
+
+# Marca de _etapa_llm_stream: la respuesta ya se envió por fragmentos y se guardó en el contexto
+_TRANSMITIDA = object()
+
+def _es_fallo_proveedor(error):
+    """Errores que indican degradación del proveedor: timeouts, conexión y respuestas 5xx"""
+    if isinstance(error, (requests.exceptions.HTTPError, httpx.HTTPStatusError)):
+        return error.response is None or error.response.status_code >= 500
+    return isinstance(error, (requests.exceptions.RequestException, httpx.RequestError))
+
+def _puede_ser_etiqueta(texto):
+    """Indica si el inicio de una respuesta en streaming todavía podría ser una etiqueta de clasificación"""
+    texto = texto.lstrip()
+    return any(texto.startswith(etiqueta) or etiqueta.startswith(texto) for etiqueta in ETIQUETAS_CLASIFICACION)
+
 class MotorRespuestasAvanzado:
     def __init__(self):
         logger.info("Inicializando motor con DeepSeek a través de OpenRouter")
@@ -23,29 +93,58 @@ class MotorRespuestasAvanzado:
         self.palabras_personalizadas = set()
         
         # ✅ Inicializar palabras personalizadas
-        self.palabras_personalizadas = {
-            'argo', 'almacenadora', 'almacén', 'almacen', 'logística',
-            'bajio', 'bajío', 'córdoba', 'golfo', 'noreste', 'occidente',
-            'peninsula', 'puebla', 'querétaro', 'yucatán', 'jalisco',
-            'mercancia', 'mercancía', 'producto', 'cliente', 'pedido',
-            'factura', 'servicio', 'almacenamiento', 'distribución'
-        }
+        self.palabras_personalizadas = set(PALABRAS_PERSONALIZADAS)
 
         # ✅ Inicializar el gestor de contexto
         self.context_manager = ContextManager()
+
+        # ✅ Caché de clasificaciones del LLM (mensaje normalizado -> etiqueta)
+        self.cache_clasificaciones = crear_cache_clasificaciones()
+
+        # ✅ Preguntas idénticas simultáneas comparten una sola llamada al proveedor
+        self.vuelo_unico = VueloUnico("clasificaciones")
+
+        # ✅ Hedging opcional contra otro modelo/key cuando el principal tarda más de lo normal
+        self.cobertura = crear_cobertura(router_proveedores)
+
+        # ✅ Circuit breaker: si el proveedor está caído se responde con los módulos sin esperar el timeout
+        self.circuito = crear_circuito_proveedor(_es_fallo_proveedor)
+
+        # ✅ Micro-lotes opcionales: varias preguntas simultáneas en una sola llamada al proveedor
+        self.micro_lotes = crear_micro_lotes(
+            self._clasificar_lote, self._llamar_proveedor,
+            self._clasificar_lote_async, self._llamar_proveedor_async
+        )
+
+        # ✅ Clasificador local (opcional) y registro de etiquetas del LLM para entrenarlo
+        self.clasificador_local = cargar_clasificador()
+        self.registro_etiquetas = RegistroEtiquetas()
+
+        # ✅ Contabilidad de tokens de entrada/salida por modelo
+        self.contador_tokens = ContadorTokens()
+
+        # ✅ Autómata único con las palabras clave de todos los detectores (se compila al arrancar)
+        self.detector_palabras = obtener_detector()
+
+        # ✅ Latencia por etapa de procesar_mensaje
+        self.metricas_etapas = MetricasEtapas()
         
-        # ✅ Inicializar módulos
-        self.modulos = [
-            UbicacionesModule(self.db_manager, self.context_manager),
-            ServiciosModule(self.db_manager, self.context_manager)  # ← Nuevo módulo
-            # Aquí agregarás más módulos después: ServiciosModule, InventarioModule, etc.
-        ]
+        # ✅ Índice de trigramas de almacenes/ciudades para ubicaciones con errores de tecleo
+        obtener_indice_ubicaciones()
+        
+        # ✅ Gazetteer de municipios para recomendar el almacén más cercano
+        obtener_geocodificador()
+        
+        # ✅ Inicializar módulos: una instancia de cada módulo registrado (ver modules/registro.py)
+        self.registro_modulos = RegistroModulos(self.db_manager, self.context_manager)
+        self.registro_modulos.registrar_manejador('COTIZACION', self._atender_cotizacion)
+        self.registro_modulos.registrar_manejador('ATENCION_CLIENTE', self._atender_contacto)
+        self.registro_modulos.registrar_manejador('CONTACTO', self._atender_contacto)
+        self.modulos = self.registro_modulos.modulos
+        self.modulo_ubicaciones = self.registro_modulos.obtener(UbicacionesModule)
+        self.modulo_servicios = self.registro_modulos.obtener(ServiciosModule)
         
         #self._agregar_palabras_personalizadas()
-    def _obtener_config_openrouter(self):
-        """Obtiene la configuración fresca de OpenRouter con API key actualizada"""
-        return get_openrouter_config()
-    
     def _extraer_nombre(self, mensaje):
         """Intenta extraer un nombre del mensaje del usuario"""
         # Patrones comunes para nombres
@@ -68,9 +167,8 @@ class MotorRespuestasAvanzado:
         """Agrega el nombre del usuario a la respuesta de manera natural"""
         contexto = self.context_manager.obtener_contexto(user_id)
         
-        if isinstance(contexto, dict) and contexto.get('nombre_usuario'):
-            nombre = contexto['nombre_usuario']
-            
+        nombre = valor_contexto(contexto, 'nombre_usuario')
+        if nombre:
             # Solo usar el nombre ocasionalmente (30% de probabilidad)
             if random.random() < 0.3:
                 # Diferentes formas de incorporar el nombre
@@ -111,12 +209,7 @@ class MotorRespuestasAvanzado:
         
     def _es_solicitud_nombre(self, mensaje):
         """Detecta si el usuario está proporcionando su nombre"""
-        mensaje_lower = mensaje.lower()
-        indicadores = [
-            'me llamo', 'mi nombre es', 'soy ', 'me dicen', 
-            'puedes llamarme', 'para mí es'
-        ]
-        return any(ind in mensaje_lower for ind in indicadores)
+        return 'solicitud_nombre' in normalizar(mensaje).coincidencias
     
     def _debe_preservar(self, palabra):
         """Determina si una palabra debe preservarse sin cambios"""
@@ -152,65 +245,19 @@ class MotorRespuestasAvanzado:
             
         return False
     
-    def _es_correccion_valida(self, original, correccion):
-        """Determina si una corrección es válida"""
-        # No cambiar si la corrección es muy diferente en longitud
-        if abs(len(original) - len(correccion)) > 2:
-            return False
-            
-        # No cambiar si son esencialmente iguales
-        if original.lower() == correccion.lower():
-            return False
-            
-        # No cambiar si solo difiere en acentos o mayúsculas
-        if original.lower() == correccion.lower().replace('á', 'a').replace('é', 'e').replace('í', 'i').replace('ó', 'o').replace('ú', 'u'):
-            return False
-            
-        return True
-
-    def _distancia_levenshtein(self, s1, s2):
-        """Calcula distancia Levenshtein entre dos palabras"""
-        if len(s1) < len(s2):
-            return self._distancia_levenshtein(s2, s1)
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
-    
     def corregir_ortografia(self, texto):
         """Usa autocorrect con reglas personalizadas"""
         try:
-            spell = Speller(lang='es')
-            palabras = texto.split()
-            corregidas = []
-            
-            for palabra in palabras:
-                if self._debe_preservar(palabra):
-                    corregidas.append(palabra)
-                else:
-                    # Solo corregir si la palabra no existe en español
-                    correccion = spell(palabra)
-                    # Si la corrección es muy diferente, preservar original
-                    if self._es_correccion_valida(palabra, correccion):
-                        corregidas.append(correccion)
-                    else:
-                        corregidas.append(palabra)
-                        
-            return ' '.join(corregidas)
+            # Diccionario cargado una sola vez por proceso y correcciones memorizadas por palabra
+            return obtener_corrector().corregir(
+                texto,
+                preservar=self._debe_preservar,
+                es_valida=self._es_correccion_valida
+            )
             
         except Exception as e:
             logger.error(f"Error con autocorrect: {str(e)}")
-            return texto
+            return str(texto)
 
     def _es_correccion_valida(self, original, correccion):
         """Determina si una corrección es válida"""
@@ -218,40 +265,27 @@ class MotorRespuestasAvanzado:
         if abs(len(original) - len(correccion)) > 2:
             return False
             
+        # No cambiar si solo difiere en acentos o mayúsculas
+        if quitar_acentos(original.lower()) == quitar_acentos(correccion.lower()):
+            return False
+            
         # No cambiar si solo difiere en una letra (posible nombre propio)
-        if len(original) > 3 and self._distancia_levenshtein(original, correccion) <= 1:
+        if len(original) > 3 and self._distancia_levenshtein(original, correccion, maximo=1) <= 1:
             return False
             
         return True
 
-    def _distancia_levenshtein(self, s1, s2):
-        """Calcula distancia Levenshtein entre dos palabras"""
-        if len(s1) < len(s2):
-            return self._distancia_levenshtein(s2, s1)
-        if len(s2) == 0:
-            return len(s1)
-        
-        previous_row = range(len(s2) + 1)
-        for i, c1 in enumerate(s1):
-            current_row = [i + 1]
-            for j, c2 in enumerate(s2):
-                insertions = previous_row[j + 1] + 1
-                deletions = current_row[j] + 1
-                substitutions = previous_row[j] + (c1 != c2)
-                current_row.append(min(insertions, deletions, substitutions))
-            previous_row = current_row
-        
-        return previous_row[-1]
+    def _distancia_levenshtein(self, s1, s2, maximo=None):
+        """Calcula distancia Levenshtein entre dos palabras (bit-paralelo, con corte opcional en `maximo`)"""
+        return distancia_levenshtein(s1, s2, maximo)
 
     def es_saludo(self, mensaje):
         """Detecta si el mensaje es un saludo"""
-        saludos = ['hola', 'buenos días', 'buenas tardes', 'buenas noches', 'saludos', 'hi', 'hello']
-        return any(saludo in mensaje.lower() for saludo in saludos)
+        return 'saludo' in normalizar(mensaje).coincidencias
 
     def es_despedida(self, mensaje):
         """Detecta si el mensaje es una despedida"""
-        despedidas = ['adiós', 'adios', 'hasta luego', 'nos vemos', 'gracias', 'bye', 'goodbye']
-        return any(despedida in mensaje.lower() for despedida in despedidas)
+        return 'despedida' in normalizar(mensaje).coincidencias
 
     def procesar_saludo(self, mensaje):
         """Procesa mensajes de saludo considerando el nombre"""
@@ -277,15 +311,7 @@ class MotorRespuestasAvanzado:
         SOLO para logging o análisis, NO para decidir procesamiento
         Siempre retorna False para evitar consultas directas a BD
         """
-        mensaje_lower = mensaje.lower()
-        
-        palabras_bd = [
-            'productos', 'stock', 'inventario', 'existencias', 'precio', 'costos',
-            'clientes', 'pedidos', 'ventas', 'facturas', 'cotizaciones'
-        ]
-        
-        es_consulta = any(palabra in mensaje_lower for palabra in palabras_bd)
-        if es_consulta:
+        if 'consulta_bd' in normalizar(mensaje).coincidencias:
             logger.info(f"Consulta de BD detectada pero no procesada: {mensaje}")
         
         return False
@@ -301,7 +327,7 @@ class MotorRespuestasAvanzado:
         """
         Responde preguntas sobre la empresa SIN consultar BD
         """
-        mensaje_lower = mensaje.lower()
+        mensaje_lower = normalizar(mensaje).minusculas
         
         # Preguntas frecuentes sobre la empresa (respuestas predefinidas)
         if any(palabra in mensaje_lower for palabra in ['qué es', 'que es', 'quienes son', 'quién es']):
@@ -321,148 +347,197 @@ class MotorRespuestasAvanzado:
         
         return None
 
-    def usar_deepseek_openrouter(self, mensaje_usuario):
+    def _construir_solicitud_deepseek(self, mensajes, destino, max_tokens=100):
+        """Arma headers y payload de la clasificación para el destino elegido por el router"""
+        headers = destino.headers()
+        
+        payload = {
+            'model': destino.modelo,
+            'messages': mensajes,
+            'temperature': 0.7,
+            'max_tokens': max_tokens
+        }
+        return headers, payload
+
+    def _interpretar_respuesta_deepseek(self, respuesta, mensaje_corregido, user_id="default"):
+        """Despacha las etiquetas devueltas por DeepSeek al módulo registrado; el texto libre se retorna tal cual"""
+        logger.info(f"Valor{respuesta}")
+        respuesta_modulo = self.registro_modulos.despachar(respuesta, mensaje_corregido, user_id)
+        return respuesta if respuesta_modulo is None else respuesta_modulo
+
+    def _llamar_proveedor(self, mensaje_corregido):
+        """Clasifica una pregunta con el proveedor y retorna el texto de la respuesta"""
+        return self._llamar_proveedor_mensajes(construir_mensajes_clasificacion(mensaje_corregido))
+
+    async def _llamar_proveedor_async(self, mensaje_corregido):
+        """Versión asíncrona de _llamar_proveedor"""
+        return await self._llamar_proveedor_mensajes_async(construir_mensajes_clasificacion(mensaje_corregido))
+
+    def _clasificar_lote(self, mensajes_corregidos):
+        """Clasifica varias preguntas en una sola llamada; None si la salida no se pudo separar por pregunta"""
+        mensajes = construir_mensajes_lote(mensajes_corregidos)
+        texto = self._llamar_proveedor_mensajes(mensajes, max_tokens=60 * len(mensajes_corregidos))
+        return interpretar_respuesta_lote(texto, len(mensajes_corregidos))
+
+    async def _clasificar_lote_async(self, mensajes_corregidos):
+        """Versión asíncrona de _clasificar_lote"""
+        mensajes = construir_mensajes_lote(mensajes_corregidos)
+        texto = await self._llamar_proveedor_mensajes_async(mensajes, max_tokens=60 * len(mensajes_corregidos))
+        return interpretar_respuesta_lote(texto, len(mensajes_corregidos))
+
+    def _llamar_proveedor_mensajes(self, mensajes, max_tokens=100):
+        """Envía los mensajes al destino elegido por el router (con hedging si está habilitado)"""
+        with self.circuito.llamada():
+            return self.cobertura.ejecutar(lambda destino: self._llamar_destino(mensajes, destino, max_tokens))
+
+    async def _llamar_proveedor_mensajes_async(self, mensajes, max_tokens=100):
+        """Versión asíncrona de _llamar_proveedor_mensajes"""
+        with self.circuito.llamada():
+            return await self.cobertura.ejecutar_async(lambda destino: self._llamar_destino_async(mensajes, destino, max_tokens))
+
+    def _llamar_destino(self, mensajes, destino, max_tokens=100):
+        """Envía los mensajes a un destino ya adquirido y retorna el texto de la respuesta"""
+        headers, payload = self._construir_solicitud_deepseek(mensajes, destino, max_tokens)
+        inicio = time.monotonic()
+        try:
+            response = obtener_cliente_http().post(destino.api_url, headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.HTTPError:
+            router_proveedores.registrar_error(destino, time.monotonic() - inicio, response.status_code, response.headers)
+            raise
+        except requests.exceptions.RequestException:
+            router_proveedores.registrar_error(destino, time.monotonic() - inicio)
+            raise
+        router_proveedores.registrar_exito(destino, time.monotonic() - inicio, response.headers)
+        
+        resultado = response.json()
+        self.contador_tokens.registrar(destino.modelo, resultado.get('usage'), payload['messages'])
+        return resultado['choices'][0]['message']['content'].strip()
+
+    async def _llamar_destino_async(self, mensajes, destino, max_tokens=100):
+        """Versión asíncrona de _llamar_destino"""
+        headers, payload = self._construir_solicitud_deepseek(mensajes, destino, max_tokens)
+        inicio = time.monotonic()
+        try:
+            response = await obtener_cliente_http_async().post(destino.api_url, headers=headers, json=payload, timeout=30)
+            response.raise_for_status()
+        except httpx.HTTPStatusError:
+            router_proveedores.registrar_error(destino, time.monotonic() - inicio, response.status_code, response.headers)
+            raise
+        except httpx.RequestError:
+            router_proveedores.registrar_error(destino, time.monotonic() - inicio)
+            raise
+        router_proveedores.registrar_exito(destino, time.monotonic() - inicio, response.headers)
+        
+        resultado = response.json()
+        self.contador_tokens.registrar(destino.modelo, resultado.get('usage'), payload['messages'])
+        return resultado['choices'][0]['message']['content'].strip()
+
+    def _llamar_proveedor_stream(self, mensaje_corregido):
+        """Igual que _llamar_proveedor pero con stream: true; genera los fragmentos de texto conforme llegan"""
+        with self.circuito.llamada():
+            destino = router_proveedores.adquirir_destino()
+            headers, payload = self._construir_solicitud_deepseek(construir_mensajes_clasificacion(mensaje_corregido), destino)
+            payload['stream'] = True
+            inicio = time.monotonic()
+            usage = None
+            try:
+                response = obtener_cliente_http().post(destino.api_url, headers=headers, json=payload, timeout=30, stream=True)
+                with response:
+                    response.raise_for_status()
+                    # text/event-stream no declara charset: forzar UTF-8 para no romper acentos
+                    response.encoding = 'utf-8'
+                    for linea in response.iter_lines(decode_unicode=True):
+                        # Formato SSE del proveedor: "data: {...}", comentarios ": ..." y "data: [DONE]"
+                        if not linea or not linea.startswith('data:'):
+                            continue
+                        datos = linea[5:].strip()
+                        if datos == '[DONE]':
+                            break
+                        evento = json.loads(datos)
+                        usage = evento.get('usage') or usage
+                        for choice in evento.get('choices', []):
+                            fragmento = (choice.get('delta') or {}).get('content')
+                            if fragmento:
+                                yield fragmento
+            except requests.exceptions.HTTPError:
+                router_proveedores.registrar_error(destino, time.monotonic() - inicio, response.status_code, response.headers)
+                raise
+            except requests.exceptions.RequestException:
+                router_proveedores.registrar_error(destino, time.monotonic() - inicio)
+                raise
+            router_proveedores.registrar_exito(destino, time.monotonic() - inicio, response.headers)
+            self.contador_tokens.registrar(destino.modelo, usage, payload['messages'])
+
+    def _registrar_error_http(self, e):
+        logger.error(f"HTTP Error: {e}")
+        status_code = e.response.status_code if e.response is not None else None
+        if status_code == 404:
+            logger.error("URL no encontrada. Verifica la endpoint URL.")
+        elif status_code == 401:
+            logger.error("API Key inválida o no autorizada.")
+
+    def _clasificar(self, mensaje_corregido, usar_cache=True, mensaje_original=None):
+        """Obtiene la etiqueta de clasificación desde la caché o, si no está, desde el proveedor"""
+        clave = clave_normalizada(mensaje_corregido)
+        if usar_cache:
+            respuesta = self.cache_clasificaciones.obtener(clave)
+            if respuesta is not None:
+                logger.info(f"Clasificación desde caché: {respuesta}")
+                return respuesta
+        
+        def consultar():
+            respuesta = self.micro_lotes.enviar(mensaje_corregido)
+            self._guardar_clasificacion(clave, respuesta, mensaje_original or mensaje_corregido)
+            return respuesta
+        
+        return self.vuelo_unico.ejecutar(clave, consultar)
+
+    async def _clasificar_async(self, mensaje_corregido, usar_cache=True, mensaje_original=None):
+        """Versión asíncrona de _clasificar"""
+        clave = clave_normalizada(mensaje_corregido)
+        if usar_cache:
+            respuesta = self.cache_clasificaciones.obtener(clave)
+            if respuesta is not None:
+                logger.info(f"Clasificación desde caché: {respuesta}")
+                return respuesta
+        
+        async def consultar():
+            respuesta = await self.micro_lotes.enviar_async(mensaje_corregido)
+            self._guardar_clasificacion(clave, respuesta, mensaje_original or mensaje_corregido)
+            return respuesta
+        
+        return await self.vuelo_unico.ejecutar_async(clave, consultar)
+
+    def _guardar_clasificacion(self, clave, respuesta, mensaje):
+        """
+        Guarda en caché las respuestas que son etiquetas. Al registro de entrenamiento van también las de
+        texto libre, como OTRO, para que el clasificador local aprenda qué mensajes no le corresponden.
+        """
+        if respuesta.startswith(ETIQUETAS_CLASIFICACION):
+            self.cache_clasificaciones.guardar(clave, respuesta)
+            self.registro_etiquetas.registrar(mensaje, respuesta)
+        elif respuesta.strip():
+            self.registro_etiquetas.registrar(mensaje, ETIQUETA_OTRO)
+
+    def usar_deepseek_openrouter(self, mensaje_usuario, usar_cache=True, mensaje_corregido=None, user_id="default"):
         """
         Usa DeepSeek a través de OpenRouter con el contexto completo de ARGO
         """        
         try:
-            logger.info("Iniciando uso de DeepSeek via OpenRouter 1")
-
-            mensaje_corregido = self.corregir_ortografia(mensaje_usuario)
-            
-            logger.info("Iniciando uso de DeepSeek via OpenRouter 2")
-            # Obtener configuración fresca con API key actualizada
-            openrouter_config = self._obtener_config_openrouter()
-            logger.info("Iniciando uso de DeepSeek via OpenRouter 3")
-            # Obtener contexto de la conversación
-            contexto_conversacion = self.context_manager.obtener_contexto(user_id="default")
-            logger.info("Iniciando uso de DeepSeek via OpenRouter 4")
-            
-            prompt = f"""
-                Eres ALMAssist, asistente especializado de ARGO Almacenadora, actuando como ejecutivo comercial de prospección y atención a clientes.
-
-                OBJETIVO PRINCIPAL:
-                Proporcionar información clara, precisa y profesional sobre servicios especializados de almacenaje y logística como Almacén General de Depósito, captando solicitudes de información, quejas o requerimientos de clientes activos.
-
-                CONTEXTO DE LA EMPRESA:
-                {CONTEXTO_GENERAL}
-
-                MARCO LEGAL DE REFERENCIA:
-                • Ley General de Organizaciones y Actividades Auxiliares del Crédito
-                • Ley General de Títulos y Operaciones de Crédito  
-                • Ley Aduanera
-
-                UBICACIONES DISPONIBLES (SOLO estas):
-                - CENTRAL CÓRDOBA: Corporativo Córdoba, Almacén Peñuela, Almacén Atoyaquillo
-                - PLAZA GOLFO: Almacén Ulúa, Almacén Acacias  
-                - PLAZA PUEBLA: Almacén Cuautlancingo
-                - PLAZA MÉXICO: Almacén Tabla Honda, Almacén Ceylan, Almacén Pantaco
-                - PLAZA BAJÍO: Almacén Querétaro
-                - PLAZA OCCIDENTE: Almacén Guadalajara
-                - PLAZA PENÍNSULA: Almacén Mérida
-                - PLAZA NORESTE: Almacén Monterrey
-
-                INSTRUCCIONES ESPECÍFICAS:
-                1. TONO: Formal, cordial y empático (ejecutivo comercial). Sin lenguaje emotivo ni promocional.
-                2. Para UBICACIONES: Responder EXACTAMENTE "UBICACIONES: [TIPO]|[VALOR]"
-                - TIPOS: GENERAL, ESPECIFICA, DETALLES, REFERENCIA, CERCANA
-                3. Si preguntan por ubicación cercana: "UBICACIONES: CERCANA|"
-                4. Si mencionan ciudad/estado: "UBICACIONES: ESPECIFICA|[CIUDAD]"
-                5. Para SERVICIOS: "SERVICIOS: [TIPO]|[DETALLE]"
-                6. Para HORARIOS: "HORARIOS: |"
-                7. Para RESTRICCIONES: "RESTRICCIONES: |"
-                8. Para CONTACTO HUMANO: "CONTACTO: EJECUTIVO|"
-                9. Si no tienes información suficiente: Ofrecer contacto de ejecutivo humano inmediatamente.
-                10. Las respuestas deben estar respaldadas por el marco legal mencionado cuando sea pertinente.
-
-                EJEMPLOS DE RESPUESTAS:
-                - "¿Dónde tienen almacenes?" → "UBICACIONES: GENERAL|"
-                - "Almacenes en Veracruz" → "UBICACIONES: ESPECIFICA|Veracruz"
-                - "Quiero la más cercana" → "UBICACIONES: CERCANA|"
-                - "Almacén Ulúa" → "UBICACIONES: ESPECIFICA|Ulúa"
-                - "¿Qué servicios ofrecen?" → "SERVICIOS: GENERAL|"
-                - "Necesito hablar con alguien" → "CONTACTO: EJECUTIVO|"
-                - "No entiendo" → "Le comento que..."
-                - "¿A qué hora abren?" → "HORARIOS: | "
-                - "¿Qué no se puede almacenar?" → "RESTRICCIONES: |"
-
-                Pregunta: "{mensaje_corregido}"
-
-                Responde SOLO con el formato especificado, manteniendo el tono formal de ejecutivo comercial y refiriendo al marco legal cuando corresponda:
-                """
-            
-            headers = {
-                'Authorization': f'Bearer {openrouter_config["api_key"]}',
-                'Content-Type': 'application/json',
-                'HTTP-Referer': openrouter_config["app_url"],
-                'X-Title': openrouter_config["app_name"]
-            }
-            
-            payload = {
-                'model': 'deepseek/deepseek-chat-v3.1:free',
-                'messages': [{'role': 'user', 'content': prompt}],
-                'temperature': 0.7,
-                'max_tokens': 100
-            }
-            try:
-                response = requests.post(openrouter_config["api_url"], headers=headers, json=payload, timeout=30)
-                response.raise_for_status()
-                
-                resultado = response.json()
-                respuesta = resultado['choices'][0]['message']['content'].strip()
-                
-                logger.info(f"Valor{respuesta}")
-                # Verificar si DeepSeek detectó que es sobre ubicaciones
-                if respuesta.startswith("UBICACIONES:"):
-                    partes = respuesta.split("|")
-                    tipo_consulta = partes[0].split(":")[1].strip()
-                    ubicacion_extraida = partes[1].strip() if len(partes) > 1 else None
-                    
-                    logger.info(f"DeepSeek detectó: tipo={tipo_consulta}, ubicación={ubicacion_extraida}")
-                    
-                    # Redirigir al módulo de ubicaciones con toda la información
-                    from modules.ubicaciones_module import UbicacionesModule
-                    ubicaciones_module = UbicacionesModule(self.db_manager, self.context_manager)
-                    
-                    # Pasar tanto el tipo como la ubicación extraída
-                    respuesta_real = ubicaciones_module.procesar_con_tipo(
-                        mensaje_corregido, 
-                        tipo_consulta, 
-                        user_id="default",
-                        ubicacion_extraida=ubicacion_extraida  # ← Nuevo parámetro
-                    )
-                    return respuesta_real
-                # AÑADIR ESTA SECCIÓN PARA DETECTAR SERVICIOS
-                elif respuesta.startswith("SERVICIOS:"):
-                    partes = respuesta.split("|")
-                    tipo_servicio = partes[0].split(":")[1].strip()
-                    servicio_especifico = partes[1].strip() if len(partes) > 1 else None
-                    
-                    logger.info(f"DeepSeek detectó: tipo_servicio={tipo_servicio}, servicio_especifico={servicio_especifico}")
-                    
-                    # Redirigir al módulo de servicios
-                    from modules.servicios_module import ServiciosModule
-                    servicios_module = ServiciosModule(self.db_manager, self.context_manager)
-                    
-                    # Pasar tanto el tipo como el servicio específico
-                    respuesta_real = servicios_module.procesar_con_tipo(
-                        mensaje_corregido,
-                        tipo_servicio,
-                        user_id="default",
-                        servicio_especifico=servicio_especifico
-                    )
-                    return respuesta_real
-                    
-                # Si no es sobre ubicaciones, retornar la respuesta normal de DeepSeek
-                return respuesta
-            except requests.exceptions.HTTPError as e:
-                logger.error(f"HTTP Error: {e}")
-                if response.status_code == 404:
-                    logger.error("URL no encontrada. Verifica la endpoint URL.")
-                elif response.status_code == 401:
-                    logger.error("API Key inválida o no autorizada.")
-                return None
+            if mensaje_corregido is None:
+                mensaje_corregido = self.corregir_ortografia(mensaje_usuario)
+            respuesta = self._clasificar(mensaje_corregido, usar_cache, mensaje_usuario)
+            return self._interpretar_respuesta_deepseek(respuesta, mensaje_corregido, user_id)
                 
+        except CircuitoAbiertoError:
+            raise
+        except ProveedorOcupadoError as e:
+            logger.warning(f"🚦 Solicitud rechazada por el limitador: {e}")
+            return RESPUESTA_OCUPADO
+        except requests.exceptions.HTTPError as e:
+            self._registrar_error_http(e)
+            return None
         except requests.exceptions.Timeout:
             logger.error("Timeout al conectar con OpenRouter")
             return "Lo siento, el servicio de inteligencia artificial está tardando en responder. Por favor, intenta nuevamente."
@@ -472,108 +547,320 @@ class MotorRespuestasAvanzado:
         except Exception as e:
             logger.error(f"Error inesperado al usar DeepSeek: {str(e)}")
             return "Lo siento, ocurrió un error inesperado al procesar tu solicitud."
+
+    async def usar_deepseek_openrouter_async(self, mensaje_usuario, usar_cache=True, mensaje_corregido=None, user_id="default"):
+        """
+        Versión asíncrona de usar_deepseek_openrouter: no bloquea el hilo mientras espera a OpenRouter
+        """
+        try:
+            if mensaje_corregido is None:
+                # La corrección ortográfica es CPU: se ejecuta fuera del event loop
+                mensaje_corregido = await asyncio.to_thread(self.corregir_ortografia, mensaje_usuario)
+            respuesta = await self._clasificar_async(mensaje_corregido, usar_cache, mensaje_usuario)
+            return self._interpretar_respuesta_deepseek(respuesta, mensaje_corregido, user_id)
+                
+        except CircuitoAbiertoError:
+            raise
+        except ProveedorOcupadoError as e:
+            logger.warning(f"🚦 Solicitud rechazada por el limitador: {e}")
+            return RESPUESTA_OCUPADO
+        except httpx.HTTPStatusError as e:
+            self._registrar_error_http(e)
+            return None
+        except httpx.TimeoutException:
+            logger.error("Timeout al conectar con OpenRouter")
+            return "Lo siento, el servicio de inteligencia artificial está tardando en responder. Por favor, intenta nuevamente."
+        except httpx.RequestError as e:
+            logger.error(f"Error de conexión con OpenRouter: {str(e)}")
+            return "Lo siento, hay problemas de conexión con el servicio de inteligencia artificial."
+        except Exception as e:
+            logger.error(f"Error inesperado al usar DeepSeek: {str(e)}")
+            return "Lo siento, ocurrió un error inesperado al procesar tu solicitud."
         
     def procesar_mensaje(self, mensaje_usuario, user_id="default"):
-        """Procesa el mensaje con gestión de nombre del usuario"""
+        """Procesa el mensaje recorriendo las etapas en orden hasta que una lo resuelve"""
+        solicitud = self._iniciar_solicitud(mensaje_usuario, user_id)
+        for etapa in ETAPAS_PROCESAMIENTO:
+            inicio = time.perf_counter()
+            respuesta = self._ejecutar_etapa(etapa, getattr(self, etapa.metodo), solicitud)
+            if self._registrar_etapa(solicitud, etapa, inicio, respuesta):
+                return self._cerrar_solicitud(solicitud, respuesta, etapa.formatear)
+        return self._cerrar_solicitud(solicitud, RESPUESTA_GENERICA, True)
+
+    async def procesar_mensaje_async(self, mensaje_usuario, user_id="default"):
+        """Versión asíncrona de procesar_mensaje para el servidor ASGI"""
+        solicitud = self._iniciar_solicitud(mensaje_usuario, user_id)
+        for etapa in ETAPAS_PROCESAMIENTO:
+            inicio = time.perf_counter()
+            metodo = getattr(self, f"{etapa.metodo}_async", None)
+            if metodo is None:
+                respuesta = self._ejecutar_etapa(etapa, getattr(self, etapa.metodo), solicitud)
+            else:
+                try:
+                    respuesta = await metodo(solicitud)
+                except Exception as e:
+                    respuesta = self._error_etapa(etapa, e)
+            if self._registrar_etapa(solicitud, etapa, inicio, respuesta):
+                return self._cerrar_solicitud(solicitud, respuesta, etapa.formatear)
+        return self._cerrar_solicitud(solicitud, RESPUESTA_GENERICA, True)
+
+    def procesar_mensaje_stream(self, mensaje_usuario, user_id="default"):
+        """
+        Igual que procesar_mensaje pero genera la respuesta por fragmentos (para SSE).
+        Las respuestas de módulos salen en un solo fragmento; el texto libre del LLM se reenvía conforme llega.
+        """
+        solicitud = self._iniciar_solicitud(mensaje_usuario, user_id)
+        for etapa in ETAPAS_PROCESAMIENTO:
+            inicio = time.perf_counter()
+            metodo = getattr(self, f"{etapa.metodo}_stream", None)
+            if metodo is None:
+                respuesta = self._ejecutar_etapa(etapa, getattr(self, etapa.metodo), solicitud)
+            else:
+                try:
+                    respuesta = yield from metodo(solicitud)
+                except Exception as e:
+                    respuesta = self._error_etapa(etapa, e)
+            if self._registrar_etapa(solicitud, etapa, inicio, respuesta):
+                if respuesta is _TRANSMITIDA:
+                    # El texto ya se transmitió y quedó guardado en el contexto
+                    self._registrar_tiempos(solicitud)
+                    return
+                yield self._cerrar_solicitud(solicitud, respuesta, etapa.formatear)
+                return
+        yield self._cerrar_solicitud(solicitud, RESPUESTA_GENERICA, True)
+
+    def _iniciar_solicitud(self, mensaje_usuario, user_id):
+        """Guarda el mensaje del usuario y lee su contexto una sola vez"""
         logger.info(f"Procesando: {mensaje_usuario}")
-        
-        # Obtener contexto actual
-        contexto = self.context_manager.obtener_contexto(user_id)
-        if not isinstance(contexto, dict):
-            contexto = {}
-            self.context_manager.guardar_contexto(user_id, contexto)
-        
-        # Guardar mensaje en contexto
         self.context_manager.agregar_mensaje(user_id, "user", mensaje_usuario)
-        
-        # 1. Verificar si estamos solicitando nombre
-        if contexto.get('solicitando_nombre'):
-            respuesta = self._procesar_entrada_nombre(mensaje_usuario, user_id)
-            self.context_manager.agregar_mensaje(user_id, "assistant", respuesta)
-            return respuesta
-        
-        # 2. Verificar si es el primer mensaje (sin nombre registrado)
-        historial = self.context_manager.obtener_historial(user_id)
-        es_primer_mensaje = len(historial) == 0
-        
-        if es_primer_mensaje:
-            # Solicitar nombre amablemente
-            self.context_manager.guardar_contexto(user_id, "solicitando_nombre", True)
-            respuesta = (
-                "¡Hola! 👋 Bienvenido/a a ARGO Almacenadora.\n\n"
-                "Para poder ofrecerte un mejor servicio, ¿podrías decirme tu nombre?\n\n"
-                "Por ejemplo: 'Soy Ana' o 'Me llamo Roberto'"
-            )
-            self.context_manager.agregar_mensaje(user_id, "assistant", respuesta)
-            return respuesta
-        
-        # 3. Verificar si el usuario está proporcionando su nombre espontáneamente
-        if self._es_solicitud_nombre(mensaje_usuario) and not contexto.get('nombre_usuario'):
-            respuesta = self._procesar_entrada_nombre(mensaje_usuario, user_id)
-            self.context_manager.agregar_mensaje(user_id, "assistant", respuesta)
-            return respuesta
-    
-        
-        # Verificar si estamos esperando ubicación del usuario
-        contexto = self.context_manager.obtener_contexto(user_id)
-        
-        # Asegurarse de que contexto es un diccionario
-        if isinstance(contexto, dict) and contexto.get('esperando_ubicacion') == 'true':
-            # Limpiar el contexto
-            self.context_manager.guardar_contexto(user_id, "esperando_ubicacion", "false")
-            # Procesar la ubicación proporcionada
-            ubicaciones_module = UbicacionesModule(self.db_manager, self.context_manager)
-            respuesta = ubicaciones_module.procesar_ubicacion_usuario(mensaje_usuario, user_id)
-            # Guardar respuesta en contexto y retornar
-            self.context_manager.agregar_mensaje(user_id, "assistant", respuesta)
-            return respuesta
+        return SolicitudMensaje(
+            MensajeNormalizado(mensaje_usuario), user_id, self.context_manager.obtener_contexto(user_id)
+        )
 
-        # Si contexto no es un diccionario, inicializarlo como tal
-        if not isinstance(contexto, dict):
-            contexto = {}
-            self.context_manager.guardar_contexto(user_id, contexto)
-        
-        # Guardar mensaje en contexto
-        self.context_manager.agregar_mensaje(user_id, "user", mensaje_usuario)
-        # Verificar si estamos esperando ubicación del usuario
-        if contexto.get('esperando_ubicacion') == 'true':
-            self.context_manager.guardar_contexto(user_id, "esperando_ubicacion", "false")
-            ubicaciones_module = UbicacionesModule(self.db_manager, self.context_manager)
-            respuesta = ubicaciones_module.procesar_ubicacion_usuario(mensaje_usuario, user_id)
-        else:    
-            # 1. Saludos y despedidas
-            if self.es_saludo(mensaje_usuario):
-                respuesta = self.procesar_saludo(mensaje_usuario)
-            elif self.es_despedida(mensaje_usuario):
-                respuesta = self.procesar_despedida(mensaje_usuario)
-            else:
-                # 2. Procesar selección de menú si es una opción numérica
-                if mensaje_usuario.strip() in ['1', '2', '3', '4', '5', '6']:
-                    respuesta = self._procesar_opcion_menu(mensaje_usuario, user_id)
-                else:
-                    # 3. Intentar con OpenRouter para clasificación
-                    try:
-                        respuesta_deepseek = self.usar_deepseek_openrouter(mensaje_usuario)
-                        
-                        # Verificar si es una respuesta especializada
-                        if respuesta_deepseek and respuesta_deepseek.startswith(("UBICACIONES:", "SERVICIOS:", "HORARIOS:", "RESTRICCIONES:", "COTIZACION:", "ATENCION_CLIENTE:")):
-                            respuesta = self._procesar_respuesta_especializada(respuesta_deepseek, mensaje_usuario, user_id)
-                        else:
-                            # Si no es una respuesta especializada, usar la respuesta de DeepSeek directamente
-                            respuesta = respuesta_deepseek
-                            
-                    except Exception as e:
-                        logger.error(f"Error con OpenRouter: {str(e)}")
-                        # 4. Fallback a módulos especializados
-                        respuesta = self._procesar_con_modulos(mensaje_usuario, user_id)
-            
-            # Aplicar formato con nombre (ocasionalmente)
-            respuesta_final = self._formatear_respuesta_con_nombre(respuesta, user_id)
+    def _ejecutar_etapa(self, etapa, metodo, solicitud):
+        """Ejecuta una etapa; si falla, se registra el error y el mensaje pasa a la siguiente"""
+        try:
+            return metodo(solicitud)
+        except Exception as e:
+            return self._error_etapa(etapa, e)
+
+    def _error_etapa(self, etapa, error):
+        if isinstance(error, CircuitoAbiertoError):
+            logger.warning(f"⚡ {error}: respondiendo con módulos locales")
+        else:
+            logger.error(f"Error en la etapa {etapa.nombre}: {str(error)}")
+        self.metricas_etapas.registrar_error(etapa.nombre)
+        return None
+
+    def _registrar_etapa(self, solicitud, etapa, inicio, respuesta):
+        """Registra la latencia de la etapa e indica si resolvió el mensaje"""
+        duracion = time.perf_counter() - inicio
+        solicitud.tiempos[etapa.nombre] = duracion
+        self.metricas_etapas.registrar(etapa.nombre, duracion, respuesta is not None)
+        return respuesta is not None
+
+    def _cerrar_solicitud(self, solicitud, respuesta, formatear):
+        """Etapa final de formato: aplica el nombre (si corresponde) y guarda la respuesta en el contexto"""
+        inicio = time.perf_counter()
+        respuesta_final = self._finalizar_respuesta(respuesta, solicitud.user_id, formatear)
+        self._registrar_etapa(solicitud, ETAPA_FORMATO, inicio, respuesta_final)
+        self._registrar_tiempos(solicitud)
+        return respuesta_final
+
+    def _registrar_tiempos(self, solicitud):
+        tiempos = ", ".join(f"{nombre}={segundos * 1000:.1f}ms" for nombre, segundos in solicitud.tiempos.items())
+        logger.debug(f"⏱️ Etapas: {tiempos}")
+
+    def _corregir_solicitud(self, solicitud):
+        """Corrección ortográfica perezosa: solo la pagan los mensajes que llegan a la caché"""
+        if solicitud.mensaje_corregido is None:
+            solicitud.mensaje_corregido = self.corregir_ortografia(solicitud.mensaje)
+        return solicitud.mensaje_corregido
+
+    # ---- Etapas (ver ETAPAS_PROCESAMIENTO): retornan la respuesta o None para pasar a la siguiente ----
+
+    def _etapa_nombre(self, solicitud):
+        """Captura el nombre cuando se le pidió al usuario o cuando lo da por iniciativa propia"""
+        if valor_contexto(solicitud.contexto, 'solicitando_nombre') or (
+                self._es_solicitud_nombre(solicitud.mensaje)
+                and not valor_contexto(solicitud.contexto, 'nombre_usuario')):
+            return self._procesar_entrada_nombre(solicitud.mensaje.limpio, solicitud.user_id)
+        return None
+
+    def _etapa_ubicacion_pendiente(self, solicitud):
+        """Respuesta a la pregunta de ciudad que hizo el módulo de ubicaciones"""
+        if valor_contexto(solicitud.contexto, 'esperando_ubicacion') != 'true':
+            return None
+        self.context_manager.guardar_contexto(solicitud.user_id, "esperando_ubicacion", "false")
+        return self.modulo_ubicaciones.procesar_ubicacion_usuario(solicitud.mensaje, solicitud.user_id)
+
+    def _etapa_saludo_despedida(self, solicitud):
+        if self.es_saludo(solicitud.mensaje):
+            return self.procesar_saludo(solicitud.mensaje)
+        if self.es_despedida(solicitud.mensaje):
+            return self.procesar_despedida(solicitud.mensaje)
+        return None
+
+    def _etapa_menu(self, solicitud):
+        opcion = solicitud.mensaje.limpio
+        if opcion in ['1', '2', '3', '4', '5', '6']:
+            return self._procesar_opcion_menu(opcion, solicitud.user_id)
+        return None
+
+    def _etapa_ubicacion_directa(self, solicitud):
+        """
+        '¿Dónde queda Ulua?': pregunta de dirección con un almacén o ciudad reconocible en el índice.
+        '¿Cuál almacén me queda más cerca de Xalapa?': los más cercanos a una ciudad del gazetteer.
+        """
+        coincidencias = solicitud.mensaje.coincidencias
+        # Solo si el mensaje nombra un lugar ("acerca de sus almacenes" también contiene "cerca")
+        if 'ubicacion_cercana' in coincidencias and 'ubicacion' in coincidencias:
+            respuesta = self.modulo_ubicaciones.responder_cercanas(solicitud.mensaje.limpio)
+            if respuesta:
+                return respuesta
+            # "¿Cuál está más cercano a la playa?": sin un lugar claro se pregunta la ciudad en vez de adivinarla
+            if any(palabra != 'cerca' for palabra in coincidencias.palabras('ubicacion_cercana')):
+                return self.modulo_ubicaciones.pedir_ciudad(solicitud.user_id)
+        if 'intencion_ubicacion' not in coincidencias:
+            return None
+        # "¿Dónde puedo almacenar zapatos en Puebla?" es de servicios: la decide el LLM
+        if any(categoria.startswith('servicio:') for categoria in coincidencias.categorias):
+            return None
+        # Coincidencias débiles ("puedo" ~ "puebla") las decide el LLM
+        candidato = buscar_ubicacion_confiable(solicitud.mensaje.limpio)
+        if candidato is None:
+            return None
+        return self.modulo_ubicaciones.responder_candidato(candidato)
+
+    def _etapa_cache(self, solicitud):
+        """Clasificación ya conocida para el mensaje corregido"""
+        return self._respuesta_desde_cache(solicitud, self._corregir_solicitud(solicitud))
+
+    async def _etapa_cache_async(self, solicitud):
+        if solicitud.mensaje_corregido is None:
+            # La corrección ortográfica es CPU: se ejecuta fuera del event loop
+            solicitud.mensaje_corregido = await asyncio.to_thread(self.corregir_ortografia, solicitud.mensaje)
+        return self._respuesta_desde_cache(solicitud, solicitud.mensaje_corregido)
+
+    def _respuesta_desde_cache(self, solicitud, mensaje_corregido):
+        etiqueta = self.cache_clasificaciones.obtener(clave_normalizada(mensaje_corregido))
+        if etiqueta is None:
+            return None
+        logger.info(f"Clasificación desde caché: {etiqueta}")
+        respuesta = self._interpretar_respuesta_deepseek(etiqueta, mensaje_corregido, solicitud.user_id)
+        return self._resolver_respuesta_deepseek(respuesta, solicitud.mensaje, solicitud.user_id)
+
+    def _etapa_clasificador_local(self, solicitud):
+        """Clasificador local: responde sin LLM cuando tiene confianza suficiente"""
+        etiqueta_local = self._clasificar_localmente(solicitud.mensaje.original)
+        if not etiqueta_local:
+            return None
+        return self._resolver_respuesta_deepseek(etiqueta_local, solicitud.mensaje, solicitud.user_id)
+
+    def _etapa_servicios(self, solicitud):
+        """'Necesito custodia y vigilancia': un servicio gana con confianza por palabras clave; empates y dudas van al LLM"""
+        return self.modulo_servicios.procesar_confiable(solicitud.mensaje, solicitud.user_id)
+
+    def _etapa_llm(self, solicitud):
+        """Clasificación con OpenRouter; con el circuito abierto se pasa directo a los módulos"""
+        if not self.circuito.permite_llamadas():
+            return None
+        respuesta_deepseek = self.usar_deepseek_openrouter(
+            solicitud.mensaje.original, usar_cache=False, mensaje_corregido=self._corregir_solicitud(solicitud),
+            user_id=solicitud.user_id
+        )
+        return self._resolver_respuesta_deepseek(respuesta_deepseek, solicitud.mensaje, solicitud.user_id)
+
+    async def _etapa_llm_async(self, solicitud):
+        if not self.circuito.permite_llamadas():
+            return None
+        respuesta_deepseek = await self.usar_deepseek_openrouter_async(
+            solicitud.mensaje.original, usar_cache=False, mensaje_corregido=solicitud.mensaje_corregido,
+            user_id=solicitud.user_id
+        )
+        return self._resolver_respuesta_deepseek(respuesta_deepseek, solicitud.mensaje, solicitud.user_id)
+
+    def _etapa_llm_stream(self, solicitud):
+        """
+        Transmite el texto libre del LLM conforme llega y retorna _TRANSMITIDA; si el LLM responde
+        con una etiqueta, la despacha y retorna la respuesta del módulo para enviarla completa.
+        """
+        if not self.circuito.permite_llamadas():
+            return None
+        user_id = solicitud.user_id
+        transmitido = ''
+        try:
+            mensaje_corregido = self._corregir_solicitud(solicitud)
+            pendiente = ''
+            for fragmento in self._llamar_proveedor_stream(mensaje_corregido):
+                if transmitido:
+                    transmitido += fragmento
+                    yield fragmento
+                    continue
+                pendiente += fragmento
+                # Se retiene el inicio hasta saber si es una etiqueta o texto para el usuario
+                if not _puede_ser_etiqueta(pendiente):
+                    transmitido = pendiente
+                    yield pendiente
             
-            # Guardar respuesta en contexto
-            self.context_manager.agregar_mensaje(user_id, "assistant", respuesta_final)
+            if transmitido:
+                self._guardar_clasificacion(clave_normalizada(mensaje_corregido), transmitido, solicitud.mensaje.original)
+                self.context_manager.agregar_mensaje(user_id, "assistant", transmitido)
+                return _TRANSMITIDA
             
-            return respuesta_final
+            etiqueta = pendiente.strip()
+            self._guardar_clasificacion(clave_normalizada(mensaje_corregido), etiqueta, solicitud.mensaje.original)
+            respuesta = self._interpretar_respuesta_deepseek(etiqueta, mensaje_corregido, user_id)
+            return self._resolver_respuesta_deepseek(respuesta, solicitud.mensaje, user_id)
+        
+        except CircuitoAbiertoError:
+            raise
+        except ProveedorOcupadoError as e:
+            logger.warning(f"🚦 Solicitud rechazada por el limitador: {e}")
+            return RESPUESTA_OCUPADO
+        except requests.exceptions.Timeout:
+            logger.error("Timeout al conectar con OpenRouter")
+            respuesta = "Lo siento, el servicio de inteligencia artificial está tardando en responder. Por favor, intenta nuevamente."
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error de conexión con OpenRouter: {str(e)}")
+            respuesta = "Lo siento, hay problemas de conexión con el servicio de inteligencia artificial."
+        except Exception as e:
+            logger.error(f"Error inesperado al usar DeepSeek: {str(e)}")
+            respuesta = "Lo siento, ocurrió un error inesperado al procesar tu solicitud."
+        
+        if transmitido:
+            # El error llegó a mitad de la transmisión: se conserva lo que el usuario ya vio
+            self.context_manager.agregar_mensaje(user_id, "assistant", transmitido)
+            return _TRANSMITIDA
+        return respuesta
+
+    def _etapa_modulos(self, solicitud):
+        """Último recurso: enrutamiento por palabras clave a los módulos especializados"""
+        return self._procesar_con_modulos(solicitud.mensaje, solicitud.user_id)
+
+    def _clasificar_localmente(self, mensaje_usuario):
+        """Etiqueta del clasificador local si supera el umbral; None si no hay modelo o no está seguro"""
+        if self.clasificador_local is None:
+            return None
+        return self.clasificador_local.clasificar(mensaje_usuario)
+
+    def _resolver_respuesta_deepseek(self, respuesta_deepseek, mensaje_usuario, user_id):
+        """Convierte la respuesta de DeepSeek en la respuesta final para el usuario"""
+        # Verificar si es una respuesta especializada
+        if respuesta_deepseek and respuesta_deepseek.startswith(ETIQUETAS_CLASIFICACION):
+            return self._procesar_respuesta_especializada(respuesta_deepseek, mensaje_usuario, user_id)
+        # Si no es una respuesta especializada, usar la respuesta de DeepSeek directamente
+        return respuesta_deepseek
+
+    def _finalizar_respuesta(self, respuesta, user_id, formatear=True):
+        """Aplica el formato con nombre y guarda la respuesta en el contexto"""
+        # Aplicar formato con nombre (ocasionalmente)
+        respuesta_final = self._formatear_respuesta_con_nombre(respuesta, user_id) if formatear else respuesta
+        
+        # Guardar respuesta en contexto
+        self.context_manager.agregar_mensaje(user_id, "assistant", respuesta_final)
+        
+        return respuesta_final
 
     def _procesar_opcion_menu(self, opcion, user_id):
         """Procesa la selección de opciones del menú inicial"""
@@ -661,52 +948,19 @@ class MotorRespuestasAvanzado:
         )
             
     def _procesar_respuesta_especializada(self, respuesta_etiquetada, mensaje_original, user_id):
-        """Procesa respuestas etiquetadas de OpenRouter"""
-        # Primero, limpiar la respuesta de cualquier contenido adicional después del pipe
-        if "|" in respuesta_etiquetada:
-            # Tomar solo la parte antes del pipe y el pipe mismo, ignorando lo que viene después
-            respuesta_limpia = respuesta_etiquetada.split("|")[0] + "|"
-        else:
-            respuesta_limpia = respuesta_etiquetada
-        
-        # Ahora procesar con la respuesta limpia
-        if respuesta_limpia.startswith("UBICACIONES:"):
-            partes = respuesta_limpia.split("|")
-            tipo_consulta = partes[0].split(":")[1].strip()
-            ubicacion_extraida = partes[1].strip() if len(partes) > 1 else None
-            
-            ubicaciones_module = UbicacionesModule(self.db_manager, self.context_manager)
-            return ubicaciones_module.procesar_con_tipo(
-                mensaje_original, tipo_consulta, user_id, ubicacion_extraida
-            )
-        
-        elif respuesta_limpia.startswith("SERVICIOS:"):
-            partes = respuesta_limpia.split("|")
-            tipo_servicio = partes[0].split(":")[1].strip()
-            detalle_servicio = partes[1].strip() if len(partes) > 1 else None
-            
-            servicios_module = ServiciosModule(self.db_manager, self.context_manager)
-            return servicios_module.procesar_con_tipo(mensaje_original, tipo_servicio, user_id, detalle_servicio)
-        
-        elif respuesta_limpia.startswith("HORARIOS:"):
-            # Procesamiento para horarios
-            servicios_module = ServiciosModule(self.db_manager, self.context_manager)
-            return servicios_module._procesar_horarios(mensaje_original, user_id)
-        
-        elif respuesta_limpia.startswith("RESTRICCIONES:"):
-            # Procesamiento para restricciones
-            servicios_module = ServiciosModule(self.db_manager, self.context_manager)
-            return servicios_module._procesar_restricciones(mensaje_original, user_id)
-        
-        elif respuesta_limpia.startswith("COTIZACION:"):
-            # Lógica para cotizaciones
-            return self._procesar_cotizacion(respuesta_limpia, user_id)
-        
-        elif respuesta_limpia.startswith("ATENCION_CLIENTE:"):
-            # Lógica para atención a clientes
-            return self._procesar_atencion_cliente(respuesta_limpia, user_id)
-        
-        return "Un ejecutivo se pondrá en contacto para atender su solicitud."
+        """Procesa respuestas etiquetadas de OpenRouter con el manejador registrado para la etiqueta"""
+        respuesta = self.registro_modulos.despachar(respuesta_etiquetada, mensaje_original, user_id)
+        if respuesta is None:
+            return "Un ejecutivo se pondrá en contacto para atender su solicitud."
+        return respuesta
+
+    def _atender_cotizacion(self, mensaje, tipo_consulta, user_id, valor=None):
+        """Etiqueta COTIZACION: mismos datos que la opción 2 del menú"""
+        return self._procesar_opcion_cotizacion(user_id)
+
+    def _atender_contacto(self, mensaje, tipo_consulta, user_id, valor=None):
+        """Etiquetas ATENCION_CLIENTE y CONTACTO: canalizar con un ejecutivo"""
+        return self._redirigir_a_comercial(user_id)
 
     def _procesar_con_modulos(self, mensaje, user_id):
         """Procesa el mensaje con los módulos especializados"""
@@ -716,4 +970,4 @@ class MotorRespuestasAvanzado:
                 return modulo.procesar(mensaje, user_id)
         
         # Último recurso: respuesta genérica
-        return "¿Podría proporcionar más detalles sobre su consulta? Un ejecutivo se pondrá en contacto si es necesario."
\ No newline at end of file
+        return RESPUESTA_GENERICA
\ No newline at end of file
@@ -1,25 +1,38 @@
 import os
 import logging
 import requests
-import time
-import random
+import threading
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from utils.http_client import obtener_cliente_http
+from utils.rate_limiter import LimitadorProveedores, ProveedorOcupadoError
+from utils.provider_router import DestinoLLM, RouterProveedores
 
 # Cargar variables de entorno
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_APP_NAME = "ALMAssist-Chatbot"
+OPENROUTER_APP_URL = "https://09a4e4543e5d.ngrok-free.app/"
+
+# Modelos de OpenRouter entre los que se reparten las clasificaciones
+OPENROUTER_MODELOS = [
+    modelo.strip() for modelo in os.environ.get(
+        "OPENROUTER_MODELOS", "deepseek/deepseek-chat-v3.1:free,deepseek/deepseek-r1:free"
+    ).split(",") if modelo.strip()
+]
+
 class OpenRouterKeyManager:
     def __init__(self):
         self.api_key = None
         self.key_expires_at = None
-        self.last_request_time = 0
-        self.request_delay = 3  # 2 segundos entre requests para evitar 429
+        self.request_delay = 3  # Penalización base tras un 429
         self.consecutive_errors = 0
+        self._lock = threading.Lock()
         self.max_delay = 30
-        self.app_name = "ALMAssist-Chatbot"
-        self.app_url = "https://09a4e4543e5d.ngrok-free.app/"
+        self.app_name = OPENROUTER_APP_NAME
+        self.app_url = OPENROUTER_APP_URL
         
     def get_fresh_key(self):
         """Obtiene una API key fresca"""
@@ -54,64 +67,55 @@ class OpenRouterKeyManager:
             logger.error(f"❌ Error inicializando API key: {e}")
             raise
     
-    def rate_limit(self):
-        """Implementa rate limiting para evitar error 429"""
-        current_time = time.time()
-        elapsed = current_time - self.last_request_time
-        
-         # Delay base + jitter aleatorio para evitar patrones
-        base_delay = self.request_delay
-        jitter = random.uniform(0.1, 0.5)  # Aleatoriedad
-        total_delay = base_delay + jitter
-        
-        if elapsed < total_delay:
-            sleep_time = total_delay - elapsed
-            logger.debug(f"⏳ Rate limiting: esperando {sleep_time:.1f}s")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+    def rate_limit(self, modelo=None, plazo=None):
+        """Obtiene turno en el token bucket de la key y del modelo; lanza ProveedorOcupadoError si tardaría más que el plazo"""
+        limitador.adquirir(self.get_fresh_key(), modelo, plazo)
     
-    def handle_429_error(self):
-        """Maneja errores 429 aumentando el delay progresivamente"""
-        self.consecutive_errors += 1
-        
-        # Aumento exponencial con backoff
-        if self.consecutive_errors == 1:
-            self.request_delay = 5  # Primer error: 5 segundos
-        elif self.consecutive_errors == 2:
-            self.request_delay = 10  # Segundo error: 10 segundos
-        elif self.consecutive_errors == 3:
-            self.request_delay = 20  # Tercer error: 20 segundos
-        else:
-            self.request_delay = self.max_delay  # Máximo
+    def handle_429_error(self, modelo=None):
+        """Maneja errores 429 penalizando el bucket de la key en lugar de dormir el hilo"""
+        with self._lock:
+            self.consecutive_errors += 1
+            
+            # Aumento exponencial con backoff
+            if self.consecutive_errors == 1:
+                self.request_delay = 5  # Primer error: 5 segundos
+            elif self.consecutive_errors == 2:
+                self.request_delay = 10  # Segundo error: 10 segundos
+            elif self.consecutive_errors == 3:
+                self.request_delay = 20  # Tercer error: 20 segundos
+            else:
+                self.request_delay = self.max_delay  # Máximo
         
-        logger.warning(f"⚠️ Error 429 - Aumentando delay a {self.request_delay}s")
+        logger.warning(f"⚠️ Error 429 - Pausando la key {self.request_delay}s")
         
-        # Esperar antes del próximo intento
-        time.sleep(self.request_delay)
+        # Las siguientes solicitudes esperan (o fallan rápido) en el limitador
+        limitador.penalizar(self.api_key, self.request_delay, modelo)
 
     def reset_error_count(self):
         """Resetea el contador de errores después de una solicitud exitosa"""
-        if self.consecutive_errors > 0:
-            logger.info("✅ Conexión restaurada - reseteando contador de errores")
-            self.consecutive_errors = 0
-            self.request_delay = 3  # Volver al delay base
+        with self._lock:
+            if self.consecutive_errors > 0:
+                logger.info("✅ Conexión restaurada - reseteando contador de errores")
+                self.consecutive_errors = 0
+                self.request_delay = 3  # Volver al delay base
                 
-# Instancia global del manager
+# Instancias globales del limitador y del manager
+limitador = LimitadorProveedores()
 key_manager = OpenRouterKeyManager()
 
 # Configuración de OpenRouter
-def get_openrouter_config():
+def get_openrouter_config(modelo=None):
     """Obtiene configuración con rate limiting integrado"""
-    key_manager.rate_limit()  # Aplicar rate limiting antes de cada request
-    
+    key_manager.rate_limit(modelo)  # Aplicar rate limiting antes de cada request
+    return _armar_openrouter_config()
+
+def _armar_openrouter_config():
     api_key = key_manager.get_fresh_key()
-    logger.info(api_key)
     return {
-        "api_url": "https://openrouter.ai/api/v1/chat/completions",
+        "api_url": OPENROUTER_API_URL,
         "api_key": api_key,
-        "app_name": "ALMAssist-Chatbot",
-        "app_url": "https://09a4e4543e5d.ngrok-free.app/",
+        "app_name": OPENROUTER_APP_NAME,
+        "app_url": OPENROUTER_APP_URL,
         "headers": {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}",
@@ -144,7 +148,7 @@ def handle_openrouter_error(response):
 def make_openrouter_request(messages, model="deepseek/deepseek-chat"):
     """Realiza una solicitud a la API de OpenRouter"""
     try:
-        config = get_openrouter_config()
+        config = get_openrouter_config(model)
         
         payload = {
             "model": model,
@@ -153,7 +157,7 @@ def make_openrouter_request(messages, model="deepseek/deepseek-chat"):
             "max_tokens": 1000
         }
         
-        response = requests.post(
+        response = obtener_cliente_http().post(
             config["api_url"],
             headers=config["headers"],
             json=payload,
@@ -167,6 +171,9 @@ def make_openrouter_request(messages, model="deepseek/deepseek-chat"):
             error_message = handle_openrouter_error(response)
             return f"Error: {error_message}"
             
+    except ProveedorOcupadoError as e:
+        logger.warning(f"🚦 {e}")
+        return "Error: Servicio ocupado. Por favor intenta nuevamente en unos segundos."
     except requests.exceptions.Timeout:
         logger.error("⏰ Timeout en la solicitud a OpenRouter")
         return "Error: Timeout del servicio. Por favor intenta nuevamente."
@@ -211,14 +218,12 @@ def get_deepseek_config():
 
 def make_deepseek_request(messages):
     """Función simplificada para DeepSeek API"""
-    import requests
-    
     try:
         config = get_deepseek_config()
         payload = config["payload"].copy()
         payload["messages"] = messages
         
-        response = requests.post(
+        response = obtener_cliente_http().post(
             config["api_url"],
             headers=config["headers"],
             json=payload,
@@ -232,6 +237,35 @@ def make_deepseek_request(messages):
             
     except Exception as e:
         return f"Error de conexión: {e}"
+
+def construir_destinos_llm():
+    """Combina todas las API keys y modelos configurados en destinos para el router"""
+    keys = os.environ.get("OPENROUTER_API_KEYS") or os.environ.get("OPENROUTER_API_KEY") or ""
+    keys = [key.strip() for key in keys.split(",") if key.strip()]
+    
+    destinos = [
+        DestinoLLM(
+            "openrouter", OPENROUTER_API_URL, key, modelo,
+            headers_extra={"HTTP-Referer": OPENROUTER_APP_URL, "X-Title": OPENROUTER_APP_NAME}
+        )
+        for key in keys
+        for modelo in OPENROUTER_MODELOS
+    ]
+    
+    # DeepSeek directo como proveedor adicional si hay key
+    if DEEPSEEK_CONFIG["api_key"]:
+        destinos.append(DestinoLLM("deepseek", DEEPSEEK_CONFIG["api_url"], DEEPSEEK_CONFIG["api_key"], DEEPSEEK_CONFIG["model"]))
+    
+    return destinos
+
+router_proveedores = RouterProveedores(construir_destinos_llm(), limitador)
+
+def preconectar_proveedores():
+    """Abre por adelantado las conexiones keep-alive con los proveedores de LLM"""
+    urls = [OPENROUTER_API_URL]
+    if DEEPSEEK_CONFIG["api_key"]:
+        urls.append(DEEPSEEK_CONFIG["api_url"])
+    obtener_cliente_http().preconectar(urls)
         
 # Configuración de OpenRouter
 #OPENROUTER_API_URL = "https://openrouter.ai/api/v1/chat/completions"
@@ -0,0 +1,148 @@
+# construir_indice_ortografico.py
+# Construye el índice SymSpell del corrector ortográfico (lista de frecuencias en español + vocabulario del dominio)
+# y lo compara contra autocorrect.Speller en velocidad y calidad de corrección.
+# Uso: python construir_indice_ortografico.py [--frecuencias es_50k.txt] [--max-palabras 80000] [--benchmark 2000]
+import re
+import time
+import random
+import argparse
+
+from utils.symspell import IndiceSymSpell, RUTA_INDICE
+from data.vocabulario_data import PALABRAS_PERSONALIZADAS
+from data import ubicaciones_data, servicios_data
+
+_PALABRA = re.compile(r'[^\W\d_]{3,}')
+_LETRAS = "abcdefghijklmnñopqrstuvwxyzáéíóú"
+
+
+def leer_frecuencias(ruta):
+    """Lista 'palabra frecuencia' por línea (formato de FrequencyWords / SymSpell)"""
+    frecuencias = {}
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            partes = linea.split()
+            if len(partes) >= 2 and partes[1].isdigit():
+                frecuencias[partes[0].lower()] = frecuencias.get(partes[0].lower(), 0) + int(partes[1])
+    return frecuencias
+
+
+def frecuencias_autocorrect():
+    """Diccionario de frecuencias en español que ya usa autocorrect"""
+    from autocorrect import Speller
+    return dict(Speller(lang='es').nlp_data)
+
+
+def palabras_de(valor):
+    """Palabras contenidas en las estructuras de datos del dominio (claves y valores, sin URLs)"""
+    if isinstance(valor, str):
+        if not valor.startswith("http"):
+            yield from _PALABRA.findall(valor.lower())
+    elif isinstance(valor, dict):
+        for clave, contenido in valor.items():
+            yield from palabras_de(clave)
+            yield from palabras_de(contenido)
+    elif isinstance(valor, (list, tuple, set)):
+        for elemento in valor:
+            yield from palabras_de(elemento)
+
+
+def vocabulario_dominio():
+    """Palabras personalizadas y todos los nombres de data/ubicaciones_data.py y data/servicios_data.py"""
+    palabras = set(PALABRAS_PERSONALIZADAS)
+    for modulo in (ubicaciones_data, servicios_data):
+        for nombre in dir(modulo):
+            if nombre.isupper():
+                palabras.update(palabras_de(getattr(modulo, nombre)))
+    return palabras
+
+
+def sumar_dominio(frecuencias, dominio, percentil=0.5):
+    """
+    Suma a cada palabra del dominio la frecuencia del percentil indicado (la mediana por omisión).
+    Se suma en vez de fijarla al máximo: así 'almacén' gana a sus vecinas raras pero no a 'y', 'de' o 'que'.
+    """
+    ordenadas = sorted(frecuencias.values())
+    bono = ordenadas[int(percentil * (len(ordenadas) - 1))] if ordenadas else 1
+    for palabra in dominio:
+        frecuencias[palabra] = frecuencias.get(palabra, 0) + bono
+    return bono
+
+
+def con_error(palabra, rng):
+    """Introduce un error de tecleo: borrado, inserción, sustitución o transposición"""
+    i = rng.randrange(len(palabra))
+    operacion = rng.choice(("borrar", "insertar", "sustituir", "transponer"))
+    if operacion == "borrar":
+        return palabra[:i] + palabra[i + 1:]
+    if operacion == "insertar":
+        return palabra[:i] + rng.choice(_LETRAS) + palabra[i:]
+    if operacion == "sustituir":
+        return palabra[:i] + rng.choice(_LETRAS.replace(palabra[i], "")) + palabra[i + 1:]
+    i = min(i, len(palabra) - 2)
+    return palabra[:i] + palabra[i + 1] + palabra[i] + palabra[i + 2:]
+
+
+def evaluar(corrector, pares, correctas):
+    """Exactitud sobre palabras con error, cambios indebidos sobre palabras correctas y velocidad"""
+    inicio = time.perf_counter()
+    aciertos = sum(corrector(con_typo) == original for con_typo, original in pares)
+    duracion = time.perf_counter() - inicio
+    cambios_indebidos = sum(corrector(palabra) != palabra for palabra in correctas)
+    return {
+        "exactitud": round(aciertos / len(pares), 4),
+        "cambios_indebidos": round(cambios_indebidos / len(correctas), 4),
+        "palabras_por_segundo": round(len(pares) / duracion),
+        "latencia_media_us": round(duracion / len(pares) * 1e6, 1)
+    }
+
+
+def benchmark(indice, cantidad, semilla):
+    rng = random.Random(semilla)
+    # Palabras frecuentes de longitud media: las que realmente escriben los usuarios
+    poblacion = [p for p in indice.palabras[:20000] if 5 <= len(p) <= 12 and p.isalpha()]
+    muestra = rng.sample(poblacion, min(cantidad, len(poblacion)))
+    pares = [(con_error(palabra, rng), palabra) for palabra in muestra]
+
+    correctores = {"symspell": indice}
+    try:
+        from autocorrect import Speller
+        correctores["autocorrect"] = Speller(lang='es')
+    except Exception as e:
+        print(f"⚠️ No se pudo cargar autocorrect para comparar: {e}")
+
+    print(f"📊 Benchmark con {len(pares)} palabras con error de tecleo:")
+    for nombre, corrector in correctores.items():
+        print(f"   {nombre}: {evaluar(corrector, pares, muestra)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construye el índice SymSpell del corrector ortográfico")
+    parser.add_argument("--frecuencias", help="Archivo 'palabra frecuencia' (por omisión, el diccionario de autocorrect)")
+    parser.add_argument("--salida", default=RUTA_INDICE, help="Ruta del índice .npz")
+    parser.add_argument("--max-palabras", type=int, default=80000, help="Palabras más frecuentes a indexar")
+    parser.add_argument("--benchmark", type=int, default=2000, help="Palabras para comparar contra autocorrect (0 = no comparar)")
+    parser.add_argument("--semilla", type=int, default=13)
+    args = parser.parse_args()
+
+    frecuencias = leer_frecuencias(args.frecuencias) if args.frecuencias else frecuencias_autocorrect()
+    mas_frecuentes = sorted(frecuencias, key=frecuencias.get, reverse=True)[:args.max_palabras]
+    frecuencias = {palabra: frecuencias[palabra] for palabra in mas_frecuentes}
+
+    dominio = vocabulario_dominio()
+    bono = sumar_dominio(frecuencias, dominio)
+    print(f"➕ Palabras del dominio: +{bono} a su frecuencia")
+    print(f"📚 {len(mas_frecuentes)} palabras frecuentes + {len(dominio)} del dominio")
+
+    inicio = time.time()
+    indice = IndiceSymSpell.construir(frecuencias)
+    print(f"⏱️ Índice construido en {time.time() - inicio:.1f}s: {len(indice)} palabras, {len(indice.claves)} borrados")
+
+    indice.guardar(args.salida)
+    print(f"✅ Índice v{indice.version} guardado en {args.salida}")
+
+    if args.benchmark:
+        benchmark(indice, args.benchmark, args.semilla)
+
+
+if __name__ == "__main__":
+    main()
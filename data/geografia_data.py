@@ -0,0 +1,199 @@
+# data/geografia_data.py
+# Gazetteer offline para ubicar al usuario: municipios/ciudades principales de México (nombre, estado, lat, lng).
+# Coordenadas aproximadas del centro de cada localidad; para el catálogo completo de municipios
+# de INEGI se puede cargar un CSV adicional con GEO_MUNICIPIOS (ver utils/geo.py).
+MUNICIPIOS = [
+    # Aguascalientes
+    ("Aguascalientes", "Aguascalientes", 21.8818, -102.2916),
+    # Baja California
+    ("Mexicali", "Baja California", 32.6245, -115.4523),
+    ("Tijuana", "Baja California", 32.5149, -117.0382),
+    ("Ensenada", "Baja California", 31.8667, -116.5964),
+    # Baja California Sur
+    ("La Paz", "Baja California Sur", 24.1426, -110.3128),
+    ("Los Cabos", "Baja California Sur", 23.0630, -109.7028),
+    # Campeche
+    ("Campeche", "Campeche", 19.8454, -90.5237),
+    ("Ciudad del Carmen", "Campeche", 18.6490, -91.8221),
+    # Chiapas
+    ("Tuxtla Gutiérrez", "Chiapas", 16.7516, -93.1152),
+    ("Tapachula", "Chiapas", 14.9056, -92.2633),
+    ("San Cristóbal de las Casas", "Chiapas", 16.7370, -92.6376),
+    # Chihuahua
+    ("Chihuahua", "Chihuahua", 28.6330, -106.0691),
+    ("Ciudad Juárez", "Chihuahua", 31.6904, -106.4245),
+    # Ciudad de México
+    ("Ciudad de México", "Ciudad de México", 19.4326, -99.1332),
+    ("Azcapotzalco", "Ciudad de México", 19.4869, -99.1840),
+    ("Gustavo A. Madero", "Ciudad de México", 19.4820, -99.1133),
+    ("Iztapalapa", "Ciudad de México", 19.3574, -99.0671),
+    ("Coyoacán", "Ciudad de México", 19.3467, -99.1617),
+    ("Tlalpan", "Ciudad de México", 19.2940, -99.1700),
+    ("Álvaro Obregón", "Ciudad de México", 19.3587, -99.2030),
+    ("Miguel Hidalgo", "Ciudad de México", 19.4320, -99.2000),
+    ("Cuauhtémoc", "Ciudad de México", 19.4440, -99.1520),
+    ("Venustiano Carranza", "Ciudad de México", 19.4300, -99.1000),
+    ("Xochimilco", "Ciudad de México", 19.2570, -99.1030),
+    # Coahuila
+    ("Saltillo", "Coahuila", 25.4232, -101.0053),
+    ("Torreón", "Coahuila", 25.5428, -103.4068),
+    ("Monclova", "Coahuila", 26.9080, -101.4215),
+    ("Piedras Negras", "Coahuila", 28.7000, -100.5231),
+    # Colima
+    ("Colima", "Colima", 19.2433, -103.7250),
+    ("Manzanillo", "Colima", 19.0522, -104.3158),
+    # Durango
+    ("Durango", "Durango", 24.0277, -104.6532),
+    ("Gómez Palacio", "Durango", 25.5611, -103.4983),
+    # Estado de México
+    ("Toluca", "Estado de México", 19.2826, -99.6557),
+    ("Tlalnepantla", "Estado de México", 19.5400, -99.1950),
+    ("Naucalpan", "Estado de México", 19.4785, -99.2396),
+    ("Ecatepec", "Estado de México", 19.6010, -99.0500),
+    ("Nezahualcóyotl", "Estado de México", 19.4006, -99.0148),
+    ("Cuautitlán Izcalli", "Estado de México", 19.6470, -99.2460),
+    ("Texcoco", "Estado de México", 19.5067, -98.8825),
+    # Guanajuato
+    ("Guanajuato", "Guanajuato", 21.0190, -101.2574),
+    ("León", "Guanajuato", 21.1250, -101.6860),
+    ("Irapuato", "Guanajuato", 20.6767, -101.3563),
+    ("Celaya", "Guanajuato", 20.5235, -100.8157),
+    ("Silao", "Guanajuato", 20.9436, -101.4275),
+    # Guerrero
+    ("Chilpancingo", "Guerrero", 17.5515, -99.5006),
+    ("Acapulco", "Guerrero", 16.8531, -99.8237),
+    # Hidalgo
+    ("Pachuca", "Hidalgo", 20.1011, -98.7591),
+    ("Tula de Allende", "Hidalgo", 20.0539, -99.3404),
+    # Jalisco
+    ("Guadalajara", "Jalisco", 20.6597, -103.3496),
+    ("Zapopan", "Jalisco", 20.7214, -103.3918),
+    ("Tlaquepaque", "Jalisco", 20.6409, -103.2933),
+    ("Puerto Vallarta", "Jalisco", 20.6534, -105.2253),
+    # Michoacán
+    ("Morelia", "Michoacán", 19.7060, -101.1950),
+    ("Uruapan", "Michoacán", 19.4114, -102.0570),
+    ("Lázaro Cárdenas", "Michoacán", 17.9583, -102.2000),
+    # Morelos
+    ("Cuernavaca", "Morelos", 18.9242, -99.2216),
+    ("Cuautla", "Morelos", 18.8120, -98.9548),
+    # Nayarit
+    ("Tepic", "Nayarit", 21.5042, -104.8946),
+    # Nuevo León
+    ("Monterrey", "Nuevo León", 25.6866, -100.3161),
+    ("San Nicolás de los Garza", "Nuevo León", 25.7417, -100.3022),
+    ("Apodaca", "Nuevo León", 25.7817, -100.1886),
+    ("San Pedro Garza García", "Nuevo León", 25.6573, -100.4026),
+    ("Santa Catarina", "Nuevo León", 25.6733, -100.4581),
+    ("General Escobedo", "Nuevo León", 25.7933, -100.3131),
+    # Oaxaca
+    ("Oaxaca", "Oaxaca", 17.0732, -96.7266),
+    ("Salina Cruz", "Oaxaca", 16.1733, -95.1950),
+    # Puebla
+    ("Puebla", "Puebla", 19.0414, -98.2063),
+    ("Cuautlancingo", "Puebla", 19.0867, -98.2739),
+    ("Cholula", "Puebla", 19.0633, -98.3064),
+    ("Tehuacán", "Puebla", 18.4617, -97.3928),
+    ("Atlixco", "Puebla", 18.9086, -98.4364),
+    # Querétaro
+    ("Querétaro", "Querétaro", 20.5888, -100.3899),
+    ("San Juan del Río", "Querétaro", 20.3886, -99.9961),
+    # Quintana Roo
+    ("Chetumal", "Quintana Roo", 18.5001, -88.2961),
+    ("Cancún", "Quintana Roo", 21.1619, -86.8515),
+    ("Playa del Carmen", "Quintana Roo", 20.6296, -87.0739),
+    # San Luis Potosí
+    ("San Luis Potosí", "San Luis Potosí", 22.1565, -100.9855),
+    ("Ciudad Valles", "San Luis Potosí", 21.9850, -99.0108),
+    # Sinaloa
+    ("Culiacán", "Sinaloa", 24.8091, -107.3940),
+    ("Mazatlán", "Sinaloa", 23.2494, -106.4111),
+    ("Los Mochis", "Sinaloa", 25.7904, -108.9859),
+    # Sonora
+    ("Hermosillo", "Sonora", 29.0729, -110.9559),
+    ("Ciudad Obregón", "Sonora", 27.4863, -109.9408),
+    ("Nogales", "Sonora", 31.3086, -110.9422),
+    # Tabasco
+    ("Villahermosa", "Tabasco", 17.9892, -92.9475),
+    # Tamaulipas
+    ("Ciudad Victoria", "Tamaulipas", 23.7369, -99.1411),
+    ("Reynosa", "Tamaulipas", 26.0922, -98.2779),
+    ("Matamoros", "Tamaulipas", 25.8697, -97.5027),
+    ("Nuevo Laredo", "Tamaulipas", 27.4763, -99.5164),
+    ("Tampico", "Tamaulipas", 22.2331, -97.8611),
+    ("Altamira", "Tamaulipas", 22.3933, -97.9431),
+    # Tlaxcala
+    ("Tlaxcala", "Tlaxcala", 19.3182, -98.2375),
+    ("Apizaco", "Tlaxcala", 19.4167, -98.1406),
+    # Veracruz
+    ("Veracruz", "Veracruz", 19.1738, -96.1342),
+    ("Boca del Río", "Veracruz", 19.1056, -96.1069),
+    ("Xalapa", "Veracruz", 19.5438, -96.9102),
+    ("Córdoba", "Veracruz", 18.8842, -96.9256),
+    ("Orizaba", "Veracruz", 18.8500, -97.1000),
+    ("Fortín", "Veracruz", 18.9000, -97.0000),
+    ("Amatlán de los Reyes", "Veracruz", 18.8456, -96.9147),
+    ("Coatzacoalcos", "Veracruz", 18.1345, -94.4590),
+    ("Minatitlán", "Veracruz", 17.9935, -94.5467),
+    ("Poza Rica", "Veracruz", 20.5331, -97.4594),
+    ("Tuxpan", "Veracruz", 20.9561, -97.4047),
+    # Yucatán
+    ("Mérida", "Yucatán", 20.9674, -89.5926),
+    ("Kanasín", "Yucatán", 20.9344, -89.5578),
+    ("Progreso", "Yucatán", 21.2817, -89.6650),
+    ("Valladolid", "Yucatán", 20.6896, -88.2011),
+    # Zacatecas
+    ("Zacatecas", "Zacatecas", 22.7709, -102.5833),
+    ("Fresnillo", "Zacatecas", 23.1750, -102.8683),
+]
+
+# Estado -> coordenadas de su capital (cuando el usuario solo dice el estado)
+ESTADOS = {
+    "Aguascalientes": (21.8818, -102.2916),
+    "Baja California": (32.6245, -115.4523),
+    "Baja California Sur": (24.1426, -110.3128),
+    "Campeche": (19.8454, -90.5237),
+    "Chiapas": (16.7516, -93.1152),
+    "Chihuahua": (28.6330, -106.0691),
+    "Ciudad de México": (19.4326, -99.1332),
+    "Coahuila": (25.4232, -101.0053),
+    "Colima": (19.2433, -103.7250),
+    "Durango": (24.0277, -104.6532),
+    "Estado de México": (19.2826, -99.6557),
+    "Guanajuato": (21.0190, -101.2574),
+    "Guerrero": (17.5515, -99.5006),
+    "Hidalgo": (20.1011, -98.7591),
+    "Jalisco": (20.6597, -103.3496),
+    "Michoacán": (19.7060, -101.1950),
+    "Morelos": (18.9242, -99.2216),
+    "Nayarit": (21.5042, -104.8946),
+    "Nuevo León": (25.6866, -100.3161),
+    "Oaxaca": (17.0732, -96.7266),
+    "Puebla": (19.0414, -98.2063),
+    "Querétaro": (20.5888, -100.3899),
+    "Quintana Roo": (18.5001, -88.2961),
+    "San Luis Potosí": (22.1565, -100.9855),
+    "Sinaloa": (24.8091, -107.3940),
+    "Sonora": (29.0729, -110.9559),
+    "Tabasco": (17.9892, -92.9475),
+    "Tamaulipas": (23.7369, -99.1411),
+    "Tlaxcala": (19.3182, -98.2375),
+    "Veracruz": (19.5438, -96.9102),
+    "Yucatán": (20.9674, -89.5926),
+    "Zacatecas": (22.7709, -102.5833),
+}
+
+# Abreviaturas comunes -> nombre en MUNICIPIOS o ESTADOS
+ALIAS_LUGARES = {
+    "cdmx": "Ciudad de México",
+    "méxico": "Ciudad de México",
+    "df": "Ciudad de México",
+    "edomex": "Estado de México",
+    "gdl": "Guadalajara",
+    "mty": "Monterrey",
+    "qro": "Querétaro",
+    "slp": "San Luis Potosí",
+    "bcs": "Baja California Sur",
+    "qroo": "Quintana Roo",
+    "nl": "Nuevo León",
+}
@@ -37,27 +37,10 @@ MERCANCIAS_NO_SUSCEPTIBLES = {
     'fundamento': 'Ley Aduanera, art. 123: faculta a la autoridad para señalar por reglas las mercancías no permitidas en Depósito Fiscal. Anexo 18 de las RGCE: contiene el listado detallado.'
 }
 
-# Actualizar PALABRAS_CLAVE para incluir nuevas categorías
-PALABRAS_CLAVE = {
-    'almacenamiento': ['almacenar', 'guardar', 'depósito', 'bodega', 'almacén', 'inventario', 'resguardo'],
-    'logistica': ['logística', 'transporte', 'distribución', 'entregas', 'traslado', 'terrestre'],
-    'aduanas': ['aduanal', 'importación', 'exportación', 'pedimento', 'fiscal', 'impuestos', 'aduanera'],
-    'custodia': ['custodia', 'vigilancia', 'seguridad', 'protección', 'créditos', 'prendarios'],
-    'acondicionamiento': ['acondicionamiento', 'etiquetas', 'marbetes', 'armado', 'pedidos', 'paquetes', 
-                         'paletizado', 'emplayado', 'empacado', 'consolidación', 'desconsolidación'],
-    'habilitacion': ['habilitación', 'facultades', 'instalaciones', 'clientes', 'extensivas'],
-    'horarios': ['horario', 'horarios', 'atención', 'atencion', 'horas', 'abierto', 'cerrado', 
-                'cargas', 'descargas', 'lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado'],
-    'restricciones': ['prohibido', 'no permitido', 'no almacenar', 'mercancía peligrosa', 'peligrosa',
-                     'restricción', 'restringido', 'armas', 'explosivos', 'radioactivo', 'nuclear',
-                     'químicos', 'preciosos', 'joyería', 'relojes', 'cigarros', 'textiles', 'calzado',
-                     'vehículos', 'no susceptible', 'depósito fiscal']
-}
-
 # Lista expandida de palabras relacionadas con calzado y textiles
 PALABRAS_CALZADO = [
     'zapato', 'zapatos', 'calzado', 'tenis', 'sneakers', 'deportivos', 
-    'botas', 'botines', 'sandalia', 'sandalias', 'tacones', 'zapatilla',
+    'bota', 'botas', 'botines', 'sandalia', 'sandalias', 'tacones', 'zapatilla',
     'zapatillas', 'plataforma', 'mocasín', 'mocasines', 'chancla', 'chanclas',
     'alpargata', 'alpargatas', 'huarache', 'huaraches', 'zapato deportivo',
     'calzado deportivo', 'zapato formal', 'calzado infantil'
@@ -71,6 +54,25 @@ PALABRAS_TEXTILES = [
     'suéter', 'suéteres', 'chaqueta', 'chaquetas', 'abrigo', 'abrigos'
 ]
 
+# Horarios y mercancías no permitidas: las decide el LLM (HORARIOS/RESTRICCIONES) aunque también mencionen un servicio
+PALABRAS_HORARIOS = [
+    'horario', 'horarios', 'qué hora', 'que hora', 'abren', 'abre ', 'abierto', 'abierta', 'cierran', 'cierra ',
+    'cerrado', 'lunes', 'martes', 'miércoles', 'miercoles', 'jueves', 'viernes', 'sábado', 'sabado',
+    'domingo', 'fin de semana', 'días hábiles', 'dias habiles'
+]
+PALABRAS_RESTRICCIONES = [
+    'no puedo', 'no se puede', 'no pueden', 'prohibido', 'prohibida', 'permitido', 'permitida', 'permitidos',
+    'restricción', 'restriccion', 'restricciones', 'restringido', 'peligrosa', 'peligroso', 'peligrosos',
+    'armas', 'explosivos', 'radioactivo', 'químicos', 'quimicos', 'joyería', 'joyeria', 'cigarros',
+    'no susceptible', 'qué mercancía', 'que mercancía', 'qué mercancia', 'que mercancia'
+]
+
+# Solicitudes de precio: las decide el LLM (COTIZACION) aunque también mencionen un servicio
+PALABRAS_COTIZACION = [
+    'cotización', 'cotizacion', 'cotizar', 'cotizan', 'precio', 'precios', 'costo', 'costos',
+    'tarifa', 'tarifas', 'cuánto cuesta', 'cuanto cuesta', 'cuánto cobran', 'cuanto cobran'
+]
+
 # Palabras clave para detección de servicios
 PALABRAS_CLAVE = {
     'almacenamiento': ['almacenar', 'guardar', 'depósito', 'bodega', 'almacén', 'inventario', 'resguardo'],
@@ -82,6 +84,17 @@ PALABRAS_CLAVE = {
     'habilitacion': ['habilitación', 'facultades', 'instalaciones', 'clientes', 'extensivas']
 }
 
+# Peso de cada palabra clave al puntuar servicios (utils/indice_servicios.py); las demás valen 1.0.
+# Los nombres de cada servicio y los términos técnicos pesan más que las palabras de uso general.
+PESOS_PALABRAS_CLAVE = {
+    'logística': 2.0, 'custodia': 2.0, 'aduanal': 2.0, 'aduanera': 2.0, 'pedimento': 2.0,
+    'acondicionamiento': 2.0, 'habilitación': 2.0, 'prendarios': 2.0, 'marbetes': 2.0,
+    'paletizado': 2.0, 'emplayado': 2.0, 'consolidación': 2.0, 'desconsolidación': 2.0,
+    'almacén': 0.5, 'bodega': 0.5, 'inventario': 0.5, 'depósito': 0.5, 'resguardo': 0.5,
+    'guardar': 0.5, 'fiscal': 0.5, 'impuestos': 0.5, 'seguridad': 0.5, 'protección': 0.5,
+    'pedidos': 0.5, 'paquetes': 0.5, 'armado': 0.5, 'etiquetas': 0.5, 'clientes': 0.5, 'instalaciones': 0.5
+}
+
 # Información detallada de cada servicio
 SERVICIOS_INFO = {
     'almacenamiento': {
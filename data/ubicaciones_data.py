@@ -141,4 +141,52 @@ PLAZAS = [
     "CENTRAL CÓRDOBA", "PLAZA GOLFO", "PLAZA PUEBLA", 
     "PLAZA MÉXICO", "PLAZA BAJÍO", "PLAZA OCCIDENTE", 
     "PLAZA PENÍNSULA", "PLAZA NORESTE"
-]
\ No newline at end of file
+]
+
+# Palabras clave de consultas sobre ubicaciones (UbicacionesModule.puede_manejar)
+PALABRAS_UBICACION = [
+    'ubicacion', 'ubicación', 'ubicaciones', 'donde', 'dónde',
+    'sucursal', 'sucursales', 'almacén', 'almacen', 'bodega',
+    'direccion', 'dirección', 'maps', 'mapa', 'google maps',
+    'córdoba', 'veracruz', 'puebla', 'méxico', 'cdmx',
+    'querétaro', 'guadalajara', 'mérida', 'monterrey',
+    'plaza', 'centro', 'corporativo'
+]
+
+# Palabras que piden una dirección concreta ("¿dónde queda Ulua?"): con ellas el motor responde
+# desde el índice de ubicaciones sin esperar al LLM
+PALABRAS_INTENCION_UBICACION = [
+    'ubicacion', 'ubicación', 'ubicaciones', 'donde', 'dónde', 'sucursal', 'sucursales',
+    'direccion', 'dirección', 'maps', 'mapa'
+]
+
+# Tipo de consulta dentro de ubicaciones
+PALABRAS_LISTADO_UBICACIONES = ['todos', 'todas', 'listado', 'lista', 'cuales', 'cuáles']
+PALABRAS_CERCANIA = ['cerca', 'cercano', 'cercana', 'próximo', 'proximo']
+PALABRAS_REFERENCIA = [
+    '1', '2', '3', '4', '5', '6', '7', '8', '9', '10',
+    'primera', 'segunda', 'tercera', 'cuarta', 'quinta'
+]
+
+# Referencia (número u ordinal) -> posición en UBICACIONES; el orden importa: gana la primera que aparezca
+REFERENCIAS_UBICACION = {
+    '1': 0, 'primera': 0, 'primero': 0,
+    '2': 1, 'segunda': 1, 'segundo': 1,
+    '3': 2, 'tercera': 2, 'tercero': 2,
+    '4': 3, 'cuarta': 3, 'cuarto': 3,
+    '5': 4, 'quinta': 4, 'quinto': 4,
+    '6': 5, 'sexta': 5, 'sexto': 5,
+    '7': 6, 'séptima': 6, 'septima': 6, 'séptimo': 6, 'septimo': 6,
+    '8': 7, 'octava': 7, 'octavo': 7,
+    '9': 8, 'novena': 8, 'noveno': 8,
+    '10': 9, 'décima': 9, 'decima': 9, 'décimo': 9, 'decimo': 9
+}
+
+# Abreviaturas y nombres alternos que usan los clientes (se suman al índice de trigramas)
+ALIAS_UBICACIONES = {
+    "df": ["CEYLAN", "PANTACO"],
+    "gdl": ["GUADALAJARA"],
+    "mty": ["MONTERREY"],
+    "qro": ["QUERÉTARO"],
+    "san juan de ulúa": ["ULÚA"]
+}
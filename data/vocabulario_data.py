@@ -0,0 +1,23 @@
+# data/vocabulario_data.py
+# Palabras del dominio que el corrector ortográfico nunca debe cambiar
+PALABRAS_PERSONALIZADAS = {
+    'argo', 'almacenadora', 'almacén', 'almacen', 'logística',
+    'bajio', 'bajío', 'córdoba', 'golfo', 'noreste', 'occidente',
+    'peninsula', 'puebla', 'querétaro', 'yucatán', 'jalisco',
+    'mercancia', 'mercancía', 'producto', 'cliente', 'pedido',
+    'factura', 'servicio', 'almacenamiento', 'distribución'
+}
+
+# Detectores de intención sin LLM del motor (ver utils/palabras_clave.py)
+SALUDOS = ['hola', 'buenos días', 'buenas tardes', 'buenas noches', 'saludos', 'hi', 'hello']
+DESPEDIDAS = ['adiós', 'adios', 'hasta luego', 'nos vemos', 'gracias', 'bye', 'goodbye']
+INDICADORES_NOMBRE = ['me llamo', 'mi nombre es', 'soy ', 'me dicen', 'puedes llamarme', 'para mí es']
+PALABRAS_CONTACTO = [
+    'ejecutivo', 'ejecutiva', 'asesor', 'asesora', 'contacto', 'contactar', 'comunicarme', 'llamar',
+    'llámenme', 'teléfono', 'telefono', 'correo', 'whatsapp', 'hablar con', 'atención al cliente',
+    'atencion al cliente', 'atención a clientes', 'queja', 'reclamo'
+]
+PALABRAS_CONSULTA_BD = [
+    'productos', 'stock', 'inventario', 'existencias', 'precio', 'costos',
+    'clientes', 'pedidos', 'ventas', 'facturas', 'cotizaciones'
+]
@@ -0,0 +1,106 @@
+# entrenar_clasificador.py
+# Entrena el clasificador local de intención con las etiquetas que ya produjo el LLM.
+# Uso: python entrenar_clasificador.py [--registro data/etiquetas_llm.jsonl] [--umbral 0.85]
+import argparse
+import random
+import time
+from collections import Counter, defaultdict
+
+from utils.clasificador_local import (
+    ClasificadorIntencion, RegistroEtiquetas, ETIQUETA_OTRO, RUTA_MODELO, RUTA_REGISTRO_ETIQUETAS
+)
+
+
+def evaluar(clasificador, ejemplos, umbral):
+    """Calcula exactitud global, cobertura/exactitud sobre el umbral y latencia por predicción"""
+    if not ejemplos:
+        return {"ejemplos": 0}
+    aciertos = 0
+    aceptados = 0
+    aciertos_aceptados = 0
+    latencias = []
+    por_clase = defaultdict(lambda: [0, 0])
+
+    for texto, etiqueta in ejemplos:
+        inicio = time.perf_counter()
+        prediccion, confianza = clasificador.predecir(texto)
+        latencias.append(time.perf_counter() - inicio)
+
+        acierto = prediccion == etiqueta
+        aciertos += acierto
+        por_clase[etiqueta][0] += acierto
+        por_clase[etiqueta][1] += 1
+        # Solo cuenta como respuesta local lo que el motor respondería sin el LLM
+        if confianza >= umbral and prediccion not in clasificador.no_locales:
+            aceptados += 1
+            aciertos_aceptados += acierto
+
+    latencias.sort()
+    total = len(ejemplos)
+    return {
+        "ejemplos": total,
+        "exactitud": round(aciertos / total, 4),
+        "cobertura_umbral": round(aceptados / total, 4),
+        "exactitud_umbral": round(aciertos_aceptados / aceptados, 4) if aceptados else None,
+        "latencia_media_us": round(sum(latencias) / total * 1e6, 1),
+        "latencia_p95_us": round(latencias[int(0.95 * (total - 1))] * 1e6, 1),
+        "exactitud_por_clase": {clase: round(a / n, 4) for clase, (a, n) in sorted(por_clase.items())}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entrena el clasificador local de intención")
+    parser.add_argument("--registro", default=RUTA_REGISTRO_ETIQUETAS, help="JSONL con las etiquetas del LLM")
+    parser.add_argument("--salida", default=RUTA_MODELO, help="Ruta del modelo .npz")
+    parser.add_argument("--umbral", type=float, default=0.85, help="Confianza mínima para responder sin LLM")
+    parser.add_argument("--prueba", type=float, default=0.2, help="Fracción reservada para evaluación")
+    parser.add_argument("--epocas", type=int, default=30)
+    parser.add_argument("--semilla", type=int, default=13)
+    args = parser.parse_args()
+    if not 0 < args.prueba < 1:
+        parser.error("--prueba debe estar entre 0 y 1 (sin ejemplos de prueba no hay evaluación)")
+
+    registro = RegistroEtiquetas(args.registro)
+    ejemplos = registro.leer()
+    con_valor = registro.etiquetas_con_valor()
+    if len(ejemplos) < 20:
+        print(f"❌ Solo hay {len(ejemplos)} ejemplos en {args.registro}; se necesitan al menos 20")
+        return
+
+    print(f"📚 {len(ejemplos)} ejemplos únicos")
+    for etiqueta, cantidad in Counter(e for _, e in ejemplos).most_common():
+        print(f"   {etiqueta:<30} {cantidad}{'  (con valor: siempre al LLM)' if etiqueta in con_valor else ''}")
+    if ETIQUETA_OTRO not in {e for _, e in ejemplos}:
+        print(f"⚠️ No hay ejemplos {ETIQUETA_OTRO} (respuestas de texto libre): el modelo no sabrá rechazar mensajes ajenos")
+
+    random.Random(args.semilla).shuffle(ejemplos)
+    corte = int(len(ejemplos) * (1 - args.prueba))
+    entrenamiento, prueba = ejemplos[:corte], ejemplos[corte:]
+
+    inicio = time.time()
+    clasificador = ClasificadorIntencion.entrenar(
+        [t for t, _ in entrenamiento], [e for _, e in entrenamiento],
+        umbral=args.umbral, epocas=args.epocas, semilla=args.semilla, con_valor=con_valor
+    )
+    print(f"⏱️ Entrenamiento: {time.time() - inicio:.1f}s, {len(clasificador.vocabulario)} características")
+
+    metricas = evaluar(clasificador, prueba, args.umbral)
+    if prueba:
+        print("📊 Evaluación:")
+        for clave, valor in metricas.items():
+            print(f"   {clave}: {valor}")
+    else:
+        print(f"⚠️ Con {len(ejemplos)} ejemplos y --prueba {args.prueba} no queda ninguno para evaluar; se omite la evaluación")
+
+    # El modelo final se entrena con todos los ejemplos y guarda las métricas de la evaluación
+    clasificador = ClasificadorIntencion.entrenar(
+        [t for t, _ in ejemplos], [e for _, e in ejemplos],
+        umbral=args.umbral, epocas=args.epocas, semilla=args.semilla, con_valor=con_valor
+    )
+    clasificador.metricas = metricas
+    clasificador.guardar(args.salida)
+    print(f"✅ Modelo v{clasificador.version} guardado en {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
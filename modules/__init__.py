@@ -0,0 +1,2 @@
+# Importar cada módulo lo registra (ver modules/registro.py); el orden es la prioridad de puede_manejar
+from modules import ubicaciones_module, servicios_module
@@ -4,6 +4,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 class BaseModule(ABC):
+    # Etiqueta del LLM ("UBICACIONES", "HORARIOS"...) -> nombre del método que la atiende.
+    # El método recibe (mensaje, subtipo, user_id, valor), como procesar_con_tipo.
+    ETIQUETAS = {}
+
     def __init__(self, db_manager, context_manager):
         self.db_manager = db_manager
         self.context_manager = context_manager
@@ -20,4 +24,7 @@ class BaseModule(ABC):
     
     def get_name(self):
         """Retorna el nombre del módulo"""
-        return self.__class__.__name__
\ No newline at end of file
+        return self.__class__.__name__
+
+    def manejadores_etiquetas(self):
+        return {etiqueta: getattr(self, metodo) for etiqueta, metodo in self.ETIQUETAS.items()}
@@ -0,0 +1,65 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Clases de módulo en orden de registro (= prioridad de puede_manejar); se llena con @registrar_modulo
+MODULOS_REGISTRADOS = []
+
+
+def registrar_modulo(clase):
+    """Decorador: el motor creará una instancia de la clase al arrancar (ver modules/__init__.py)"""
+    if clase not in MODULOS_REGISTRADOS:
+        MODULOS_REGISTRADOS.append(clase)
+    return clase
+
+
+def separar_etiqueta(respuesta):
+    """'UBICACIONES: CERCANA|Toluca' -> ('UBICACIONES', 'CERCANA', 'Toluca'); el valor vacío es None"""
+    etiqueta, _, resto = respuesta.partition(':')
+    subtipo, _, valor = resto.partition('|')
+    # El LLM a veces agrega texto en otra línea después de la etiqueta
+    valor = valor.split('\n')[0].strip()
+    return etiqueta.strip(), subtipo.strip(), valor or None
+
+
+class RegistroModulos:
+    """
+    Una instancia de cada módulo por motor y un dict etiqueta del LLM -> manejador.
+    Los manejadores reciben (mensaje, subtipo, user_id, valor), como procesar_con_tipo.
+    """
+
+    def __init__(self, db_manager, context_manager, clases=None):
+        self.modulos = []
+        self._por_clase = {}
+        self._manejadores = {}
+        for clase in (MODULOS_REGISTRADOS if clases is None else clases):
+            self.registrar(clase(db_manager, context_manager))
+
+    def registrar(self, modulo):
+        self.modulos.append(modulo)
+        self._por_clase[type(modulo)] = modulo
+        for etiqueta, manejador in modulo.manejadores_etiquetas().items():
+            self.registrar_manejador(etiqueta, manejador)
+        logger.info(f"🧩 Módulo {modulo.get_name()} registrado ({', '.join(modulo.ETIQUETAS) or 'sin etiquetas'})")
+
+    def registrar_manejador(self, etiqueta, manejador):
+        if etiqueta in self._manejadores:
+            logger.warning(f"⚠️ La etiqueta {etiqueta} ya tenía manejador: se reemplaza")
+        self._manejadores[etiqueta] = manejador
+
+    def obtener(self, clase):
+        return self._por_clase[clase]
+
+    def etiquetas(self):
+        return tuple(self._manejadores)
+
+    def despachar(self, respuesta, mensaje, user_id):
+        """Respuesta del manejador de la etiqueta, o None si la respuesta no es una etiqueta registrada"""
+        if ':' not in respuesta:
+            return None
+        etiqueta, subtipo, valor = separar_etiqueta(respuesta)
+        manejador = self._manejadores.get(etiqueta)
+        if manejador is None:
+            return None
+        logger.info(f"Etiqueta {etiqueta}: tipo={subtipo}, valor={valor}")
+        return manejador(mensaje, subtipo, user_id, valor)
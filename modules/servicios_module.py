@@ -2,19 +2,47 @@
 
 import logging
 from database import DatabaseManager
+from modules.base_module import BaseModule
+from modules.registro import registrar_modulo
 from data.servicios_data import PALABRAS_CLAVE, SERVICIOS_INFO, RESPUESTA_GENERAL, HORARIOS_ATENCION, MERCANCIAS_NO_SUSCEPTIBLES
+from utils.mensaje_normalizado import normalizar
+from utils.renderizado import RenderizadosCatalogo
+from utils.indice_servicios import obtener_indice_servicios
+
+# Palabras de otras intenciones (ubicaciones, consultas, cotizaciones, horarios, restricciones, contacto,
+# calzado/textiles): con ellas el mensaje no es solo de servicios y lo decide el LLM aunque un servicio gane
+CATEGORIAS_OTRA_INTENCION = (
+    'ubicacion', 'consulta_bd', 'cotizacion', 'horarios', 'restricciones', 'contacto', 'calzado', 'textil'
+)
 
 logger = logging.getLogger(__name__)
 
-class ServiciosModule:
+@registrar_modulo
+class ServiciosModule(BaseModule):
+    ETIQUETAS = {
+        'SERVICIOS': 'procesar_con_tipo',
+        'HORARIOS': 'procesar_horarios_con_tipo',
+        'RESTRICCIONES': 'procesar_restricciones_con_tipo'
+    }
+
     def __init__(self, db_manager, context_manager):
-        self.db_manager = db_manager
-        self.context_manager = context_manager
+        super().__init__(db_manager, context_manager)
         self.palabras_clave = PALABRAS_CLAVE
         self.servicios_info = SERVICIOS_INFO
         self.respuesta_general = RESPUESTA_GENERAL
         self.horarios_atencion = HORARIOS_ATENCION
         self.mercancias_no_susceptibles = MERCANCIAS_NO_SUSCEPTIBLES
+        self.indice_servicios = obtener_indice_servicios()
+        
+        # Respuestas que solo dependen del catálogo: se generan una vez
+        self.renderizados = RenderizadosCatalogo(
+            (self.servicios_info, self.respuesta_general, self.horarios_atencion, self.mercancias_no_susceptibles)
+        )
+        self.renderizados.registrar('servicio', self._renderizar_servicio, lambda: [(servicio,) for servicio in self.servicios_info])
+        self.renderizados.registrar('horarios', self._renderizar_horarios)
+        self.renderizados.registrar('restricciones', self._renderizar_restricciones)
+        self.renderizados.registrar('general', self._renderizar_respuesta_general)
+        self.renderizados.precalcular()
 
     def procesar_con_tipo(self, mensaje, tipo_servicio, user_id, servicio_especifico=None):
         """
@@ -73,36 +101,22 @@ class ServiciosModule:
         # Si no, procesar normalmente
         return self.procesar(mensaje, user_id)
     
+    def procesar_horarios_con_tipo(self, mensaje, tipo_consulta, user_id, valor=None):
+        return self._procesar_horarios(mensaje, user_id)
+
+    def procesar_restricciones_con_tipo(self, mensaje, tipo_consulta, user_id, valor=None):
+        return self._procesar_restricciones(mensaje, user_id)
+    
     def _procesar_servicio_especifico(self, servicio_especifico, user_id):
         """
         Procesa servicios específicos detectados por DeepSeek
         """
-        servicio_especifico_lower = servicio_especifico.lower()
-        
-        # Listas expandidas de palabras relacionadas
-        palabras_calzado = [
-            'zapato', 'zapatos', 'calzado', 'tenis', 'sneakers', 'deportivos', 
-            'botas', 'botines', 'sandalia', 'sandalias', 'tacones', 'zapatilla',
-            'zapatillas', 'plataforma', 'mocasín', 'mocasines', 'chancla', 'chanclas',
-            'alpargata', 'alpargatas', 'huarache', 'huaraches', 'zapato deportivo',
-            'calzado deportivo', 'zapato formal', 'calzado infantil'
-        ]
-        
-        palabras_textiles = [
-            'textil', 'textiles', 'tela', 'telas', 'tejido', 'tejidos', 'prenda',
-            'prendas', 'ropa', 'vestimenta', 'indumentaria', 'moda', 'confección',
-            'costura', 'hilado', 'hilo', 'algodón', 'poliester', 'nylon', 'seda',
-            'lana', 'lino', 'jeans', 'mezclilla', 'pantalón', 'pantalones', 'camisa',
-            'camisas', 'blusa', 'blusas', 'vestido', 'vestidos', 'falda', 'faldas',
-            'suéter', 'suéteres', 'chaqueta', 'chaquetas', 'abrigo', 'abrigos'
-        ]
-        
-        # Verificar si es calzado
-        if any(palabra in servicio_especifico_lower for palabra in palabras_calzado):
-            return self._procesar_almacenamiento_textiles_calzado(servicio_especifico)
+        especifico = normalizar(servicio_especifico)
+        servicio_especifico_lower = especifico.minusculas
+        coincidencias = especifico.coincidencias
         
-        # Verificar si es textil
-        if any(palabra in servicio_especifico_lower for palabra in palabras_textiles):
+        # Verificar si es calzado o textil
+        if 'calzado' in coincidencias or 'textil' in coincidencias:
             return self._procesar_almacenamiento_textiles_calzado(servicio_especifico)
         
         # Buscar en todos los servicios el tipo específico
@@ -135,17 +149,12 @@ class ServiciosModule:
         
         # Si se especificó un servicio concreto, dar información detallada
         if servicio_especifico:
-            servicio_especifico_lower = servicio_especifico.lower()
-            
-            # Listas expandidas para mejor detección
-            palabras_calzado = ['zapato', 'zapatos', 'calzado', 'tenis', 'botas', 'sandalias']
-            palabras_textiles = ['textil', 'tela', 'ropa', 'prenda', 'vestimenta']
+            especifico = normalizar(servicio_especifico)
+            servicio_especifico_lower = especifico.minusculas
+            coincidencias = especifico.coincidencias
             
             # Caso especial para consultas sobre almacenamiento de textiles/calzado
-            if tipo_servicio == 'almacenamiento' and (
-                any(palabra in servicio_especifico_lower for palabra in palabras_calzado) or
-                any(palabra in servicio_especifico_lower for palabra in palabras_textiles)
-            ):
+            if tipo_servicio == 'almacenamiento' and ('calzado' in coincidencias or 'textil' in coincidencias):
                 return self._procesar_almacenamiento_textiles_calzado(servicio_especifico)
                 
             for nombre_servicio, descripcion in servicio_data['tipos'].items():
@@ -163,13 +172,7 @@ class ServiciosModule:
                     return respuesta
         
         # Respuesta general del servicio
-        respuesta = f"**{servicio_data['nombre']}**\n\n"
-        respuesta += f"{servicio_data['descripcion_general']}\n\n"
-        
-        for nombre_servicio, descripcion in servicio_data['tipos'].items():
-            respuesta += f"• **{nombre_servicio.upper()}**: {descripcion}\n"
-        
-        respuesta += f"\n{servicio_data['pregunta_final']}"
+        respuesta = self.renderizados.obtener('servicio', tipo_servicio)
         
         # Guardar contexto
         self.context_manager.guardar_contexto(
@@ -180,10 +183,33 @@ class ServiciosModule:
         
         return respuesta
 
+    def _renderizar_servicio(self, tipo_servicio):
+        servicio_data = self.servicios_info[tipo_servicio]
+        respuesta = f"**{servicio_data['nombre']}**\n\n"
+        respuesta += f"{servicio_data['descripcion_general']}\n\n"
+
+        for nombre_servicio, descripcion in servicio_data['tipos'].items():
+            respuesta += f"• **{nombre_servicio.upper()}**: {descripcion}\n"
+
+        respuesta += f"\n{servicio_data['pregunta_final']}"
+        return respuesta
+
     def _procesar_horarios(self, mensaje, user_id):
         """
         Procesa consultas sobre horarios de atención
         """
+        respuesta = self.renderizados.obtener('horarios')
+        
+        # Guardar contexto
+        self.context_manager.guardar_contexto(
+            user_id, 
+            "interes_horarios", 
+            "usuario preguntando sobre horarios de atención"
+        )
+        
+        return respuesta
+
+    def _renderizar_horarios(self):
         respuesta = f"**{self.horarios_atencion['titulo']}**\n\n"
         
         respuesta += "📞 **Atención a clientes:**\n"
@@ -195,20 +221,24 @@ class ServiciosModule:
         respuesta += f"• {self.horarios_atencion['cargas_descargas']['sabados']}\n\n"
         
         respuesta += "¿Necesitas información adicional sobre nuestros servicios?"
+        return respuesta
+
+    def _procesar_restricciones(self, mensaje, user_id):
+        """
+        Procesa consultas sobre mercancías no susceptibles de almacenaje
+        """
+        respuesta = self.renderizados.obtener('restricciones')
         
         # Guardar contexto
         self.context_manager.guardar_contexto(
             user_id, 
-            "interes_horarios", 
-            "usuario preguntando sobre horarios de atención"
+            "interes_restricciones", 
+            "usuario preguntando sobre mercancías no susceptibles"
         )
         
         return respuesta
 
-    def _procesar_restricciones(self, mensaje, user_id):
-        """
-        Procesa consultas sobre mercancías no susceptibles de almacenaje
-        """
+    def _renderizar_restricciones(self):
         respuesta = f"**{self.mercancias_no_susceptibles['titulo']}**\n\n"
         respuesta += f"{self.mercancias_no_susceptibles['introduccion']}\n\n"
         
@@ -219,42 +249,38 @@ class ServiciosModule:
         respuesta += f"\n💡 **Nota importante:** {self.mercancias_no_susceptibles['nota_textiles']}\n\n"
         respuesta += f"**Fundamento legal:** {self.mercancias_no_susceptibles['fundamento']}\n\n"
         respuesta += "Para mercancías nacionales o nacionalizadas (impuestos pagados), contamos con servicios de almacenaje nacional. ¿Te interesa conocer más?"
-        
-        # Guardar contexto
-        self.context_manager.guardar_contexto(
-            user_id, 
-            "interes_restricciones", 
-            "usuario preguntando sobre mercancías no susceptibles"
-        )
-        
         return respuesta
 
     def puede_manejar(self, mensaje):
-        mensaje_lower = mensaje.lower()
-        return any(
-            any(palabra in mensaje_lower for palabra in palabras) 
-            for servicio, palabras in self.palabras_clave.items()
-        )
+        return bool(self.indice_servicios.clasificar(mensaje).ranking)
 
     def procesar(self, mensaje, user_id):
-        mensaje_lower = mensaje.lower()
-        
-        # Determinar tipo de servicio basado en palabras clave
-        for servicio, palabras in self.palabras_clave.items():
-            if any(palabra in mensaje_lower for palabra in palabras):
-                if servicio in ['horarios', 'restricciones']:
-                    # Para horarios y restricciones, usar métodos específicos
-                    if servicio == 'horarios':
-                        return self._procesar_horarios(mensaje, user_id)
-                    else:
-                        return self._procesar_restricciones(mensaje, user_id)
-                else:
-                    # Para otros servicios, usar el método genérico
-                    return self._procesar_servicio_generico(mensaje, user_id, servicio)
-        
-        return self._respuesta_general_servicios()
+        # Servicio con mayor puntaje; aquí ya no hay LLM al cual escalar, así que también se usa en empates
+        clasificacion = self.indice_servicios.clasificar(mensaje)
+        if not clasificacion.ranking:
+            return self._respuesta_general_servicios()
+        return self._procesar_servicio_generico(mensaje, user_id, clasificacion.servicio or clasificacion.ranking[0][0])
+
+    def procesar_confiable(self, mensaje, user_id):
+        """Respuesta solo si un servicio gana con claridad; None para que lo decida el LLM (empates y dudas)"""
+        mensaje = normalizar(mensaje)
+        coincidencias = mensaje.coincidencias
+        for categoria in CATEGORIAS_OTRA_INTENCION:
+            if any(palabra not in self.indice_servicios for palabra in coincidencias.palabras(categoria)):
+                return None
+        
+        clasificacion = self.indice_servicios.clasificar(mensaje)
+        if clasificacion.servicio is None:
+            if clasificacion.ranking:
+                logger.info(f"Servicio incierto (confianza {clasificacion.confianza}): {clasificacion.ranking}")
+            return None
+        logger.info(f"Servicio {clasificacion.servicio} por palabras clave (confianza {clasificacion.confianza})")
+        return self._procesar_servicio_generico(mensaje, user_id, clasificacion.servicio)
 
     def _respuesta_general_servicios(self):
+        return self.renderizados.obtener('general')
+
+    def _renderizar_respuesta_general(self):
         respuesta = f"**{self.respuesta_general['titulo']}**\n\n"
         respuesta += f"{self.respuesta_general['descripcion']}\n\n"
         
@@ -270,13 +296,12 @@ class ServiciosModule:
         Procesa consultas específicas sobre almacenamiento de textiles y calzado
         """
         # Determinar el tipo de producto para personalizar el mensaje
-        palabras_calzado = ['zapato', 'calzado', 'tenis', 'bota', 'sandalia']
-        palabras_textiles = ['textil', 'tela', 'ropa', 'prenda', 'vestimenta']
+        coincidencias = normalizar(producto_especifico).coincidencias
         
         tipo_producto = "textiles y calzado"
-        if any(palabra in producto_especifico.lower() for palabra in palabras_calzado):
+        if 'calzado' in coincidencias:
             tipo_producto = "calzado"
-        elif any(palabra in producto_especifico.lower() for palabra in palabras_textiles):
+        elif 'textil' in coincidencias:
             tipo_producto = "textiles"
         
         respuesta = f"**ALMACENAJE DE {tipo_producto.upper()} - ARGO**\n\n"
@@ -1,45 +1,52 @@
 import logging
 import re
-from data.ubicaciones_data import UBICACIONES, CIUDADES_UBICACIONES, PLAZAS
+from modules.base_module import BaseModule
+from modules.registro import registrar_modulo
+from data.ubicaciones_data import UBICACIONES, CIUDADES_UBICACIONES, PLAZAS, REFERENCIAS_UBICACION
+from utils.mensaje_normalizado import normalizar
+from utils.indice_ubicaciones import buscar_ubicaciones
+from utils.geo import almacenes_cercanos
+from utils.renderizado import RenderizadosCatalogo
 
 logger = logging.getLogger(__name__)
 
-class UbicacionesModule:
+@registrar_modulo
+class UbicacionesModule(BaseModule):
+    ETIQUETAS = {'UBICACIONES': 'procesar_con_tipo'}
+
     def __init__(self, db_manager, context_manager):
-        self.context_manager = context_manager
+        super().__init__(db_manager, context_manager)
         self.ubicaciones = UBICACIONES
         self.ciudades_ubicaciones = CIUDADES_UBICACIONES
         self.plazas = PLAZAS
+        
+        # Respuestas que solo dependen del catálogo: se generan una vez
+        self.renderizados = RenderizadosCatalogo((self.ubicaciones, self.plazas))
+        self.renderizados.registrar('consulta_general', self._renderizar_consulta_general)
+        self.renderizados.registrar('detalles', self._renderizar_detalles, lambda: [(clave,) for clave in self.ubicaciones])
+        self.renderizados.registrar('ayuda', self._renderizar_ayuda)
+        self.renderizados.precalcular()
 
     def puede_manejar(self, mensaje):
         """Determina si el mensaje es sobre ubicaciones"""
-        mensaje_lower = mensaje.lower()
-        palabras_clave = [
-            'ubicacion', 'ubicación', 'ubicaciones', 'donde', 'dónde',
-            'sucursal', 'sucursales', 'almacén', 'almacen', 'bodega',
-            'direccion', 'dirección', 'maps', 'mapa', 'google maps',
-            'córdoba', 'veracruz', 'puebla', 'méxico', 'cdmx',
-            'querétaro', 'guadalajara', 'mérida', 'monterrey',
-            'plaza', 'centro', 'corporativo'
-        ]
-        return any(palabra in mensaje_lower for palabra in palabras_clave)
+        return 'ubicacion' in normalizar(mensaje).coincidencias
 
     def procesar(self, mensaje, user_id):
         """Procesa mensajes sobre ubicaciones"""
-        mensaje_lower = mensaje.lower()
+        mensaje = normalizar(mensaje)
+        coincidencias = mensaje.coincidencias
         
         # Guardar contexto
         self.context_manager.guardar_contexto(user_id, "tema_consulta", "ubicaciones")
         
         # Detectar tipo de consulta
-        if any(palabra in mensaje_lower for palabra in ['todos', 'todas', 'listado', 'lista', 'cuales', 'cuáles']):
+        if 'ubicacion_listado' in coincidencias:
             return self._procesar_consulta_general()
         
-        elif any(palabra in mensaje_lower for palabra in ['cerca', 'cercano', 'cercana', 'próximo', 'proximo']):
+        elif 'ubicacion_cercana' in coincidencias:
             return self._procesar_ubicacion_cercana(mensaje, user_id)
         
-        elif any(palabra in mensaje_lower for palabra in ['1', '2', '3', '4', '5', '6', '7', '8', '9', '10', 
-                                                         'primera', 'segunda', 'tercera', 'cuarta', 'quinta']):
+        elif 'ubicacion_referencia' in coincidencias:
             return self._procesar_por_referencia(mensaje)
         
         else:
@@ -56,11 +63,16 @@ class UbicacionesModule:
             return self._mostrar_detalles_completos(ubicacion_extraida)
         elif tipo_consulta == "REFERENCIA" and ubicacion_extraida:
             return self._procesar_por_referencia(ubicacion_extraida)
+        elif tipo_consulta == "CERCANA":
+            return self._procesar_ubicacion_cercana(mensaje, user_id, ubicacion_extraida)
         else:
             return self.procesar(mensaje, user_id)
 
     def _procesar_consulta_general(self):
         """Muestra todas las ubicaciones disponibles"""
+        return self.renderizados.obtener('consulta_general')
+
+    def _renderizar_consulta_general(self):
         respuesta = "📍 *UBICACIONES ARGO ALMACENADORA*\n\n"
         respuesta += "Tenemos presencia en las siguientes plazas:\n\n"
         
@@ -74,34 +86,46 @@ class UbicacionesModule:
         respuesta += "¿Te interesa alguna ubicación en específico? Puedo darte todos los detalles."
         return respuesta
 
-    def _procesar_ubicacion_cercana(self, mensaje, user_id):
-        """Pregunta por la ubicación del usuario para recomendar la más cercana"""
-        # Guardar contexto para seguimiento
+    def _procesar_ubicacion_cercana(self, mensaje, user_id, ubicacion_extraida=None):
+        """Las más cercanas si el mensaje dice dónde está el usuario; si no, se lo pregunta"""
+        respuesta = self.responder_cercanas(ubicacion_extraida or normalizar(mensaje).limpio)
+        if respuesta:
+            return respuesta
+        return self.pedir_ciudad(user_id)
+
+    def pedir_ciudad(self, user_id):
+        """Pregunta dónde está el usuario; su siguiente mensaje se toma como la ciudad"""
         self.context_manager.guardar_contexto(user_id, "esperando_ubicacion", "true")
-        
         return "Para recomendarte la ubicación más cercana, ¿podrías decirme en qué ciudad o estado te encuentras?"
 
+    def responder_cercanas(self, texto):
+        """Almacenes más cercanos a la ciudad o estado mencionado en el texto, o None si no menciona ninguno"""
+        lugar, cercanos = almacenes_cercanos(texto)
+        if not cercanos:
+            return None
+        
+        origen = lugar.nombre if lugar.nombre == lugar.estado else f"{lugar.nombre}, {lugar.estado}"
+        respuesta = f"📍 *ALMACENES MÁS CERCANOS A {origen.upper()}*\n\n"
+        
+        for cercano in cercanos:
+            ubicacion = self.ubicaciones[cercano.clave]
+            respuesta += f"🏢 *{ubicacion['nombre']}* ({cercano.distancia_km:,.0f} km)\n"
+            respuesta += f"📮 {ubicacion['direccion']}\n"
+            respuesta += f"🗺️ {ubicacion['maps']}\n\n"
+        
+        respuesta += "_Distancias aproximadas en línea recta._\n"
+        respuesta += "¿Te interesa alguna en específico?"
+        return respuesta
+
     def _procesar_por_referencia(self, mensaje):
         """Procesa consultas por número de referencia"""
-        mensaje_lower = mensaje.lower()
+        encontradas = normalizar(mensaje).coincidencias.palabras('referencia_indice')
         
         # Mapeo de números a ubicaciones
         ubicaciones_lista = list(self.ubicaciones.keys())
-        mapeo_numeros = {
-            '1': 0, 'primera': 0, 'primero': 0,
-            '2': 1, 'segunda': 1, 'segundo': 1,
-            '3': 2, 'tercera': 2, 'tercero': 2,
-            '4': 3, 'cuarta': 3, 'cuarto': 3,
-            '5': 4, 'quinta': 4, 'quinto': 4,
-            '6': 5, 'sexta': 5, 'sexto': 5,
-            '7': 6, 'séptima': 6, 'septima': 6, 'séptimo': 6, 'septimo': 6,
-            '8': 7, 'octava': 7, 'octavo': 7,
-            '9': 8, 'novena': 8, 'noveno': 8,
-            '10': 9, 'décima': 9, 'decima': 9, 'décimo': 9, 'decimo': 9
-        }
-        
-        for palabra, indice in mapeo_numeros.items():
-            if palabra in mensaje_lower:
+        
+        for palabra, indice in REFERENCIAS_UBICACION.items():
+            if palabra in encontradas:
                 if indice < len(ubicaciones_lista):
                     ubicacion_key = ubicaciones_lista[indice]
                     return self._mostrar_detalles_completos(ubicacion_key)
@@ -111,25 +135,21 @@ class UbicacionesModule:
         return "No entendí la referencia. ¿Podrías ser más específico?"
 
     def _procesar_ubicacion_especifica(self, mensaje):
-        """Busca ubicación por nombre o ciudad"""
-        mensaje_lower = mensaje.lower()
-        
-        # Buscar por nombre de ubicación
-        for ubicacion_key, datos in self.ubicaciones.items():
-            if ubicacion_key.lower() in mensaje_lower or datos['nombre'].lower() in mensaje_lower:
-                return self._mostrar_detalles_completos(ubicacion_key)
-        
-        # Buscar por ciudad
-        for ciudad, ubicaciones in self.ciudades_ubicaciones.items():
-            if ciudad in mensaje_lower:
-                if len(ubicaciones) == 1:
-                    return self._mostrar_detalles_completos(ubicaciones[0])
-                else:
-                    return self._mostrar_ubicaciones_ciudad(ciudad, ubicaciones)
+        """Busca ubicación por nombre o ciudad (tolerante a acentos y errores de tecleo)"""
+        candidatos = buscar_ubicaciones(normalizar(mensaje).limpio, limite=1)
+        if candidatos:
+            return self.responder_candidato(candidatos[0])
         
         # Si no encuentra, ofrecer ayuda
         return self._ofrecer_ayuda_ubicaciones()
 
+    def responder_candidato(self, candidato):
+        """Detalles si el candidato es un solo almacén; si es una ciudad o plaza, la lista de sus almacenes"""
+        logger.info(f"Ubicación '{candidato.texto}' (puntaje {candidato.puntaje})")
+        if len(candidato.valor) == 1:
+            return self._mostrar_detalles_completos(candidato.valor[0])
+        return self._mostrar_ubicaciones_ciudad(candidato.texto, candidato.valor)
+
     def _buscar_ubicacion_por_nombre(self, nombre_ubicacion):
         """Busca ubicación por nombre aproximado"""
         nombre_lower = nombre_ubicacion.lower()
@@ -139,6 +159,11 @@ class UbicacionesModule:
             if ubicacion_key.lower() == nombre_lower:
                 return self._mostrar_detalles_completos(ubicacion_key)
         
+        # Búsqueda por similitud (acentos, errores de tecleo, alias)
+        candidatos = buscar_ubicaciones(nombre_ubicacion, limite=1)
+        if candidatos:
+            return self.responder_candidato(candidatos[0])
+        
         # Búsqueda parcial
         for ubicacion_key, datos in self.ubicaciones.items():
             if (nombre_lower in ubicacion_key.lower() or 
@@ -150,6 +175,9 @@ class UbicacionesModule:
 
     def _mostrar_detalles_completos(self, ubicacion_key):
         """Muestra todos los detalles de una ubicación"""
+        return self.renderizados.obtener('detalles', ubicacion_key)
+
+    def _renderizar_detalles(self, ubicacion_key):
         if ubicacion_key not in self.ubicaciones:
             return "Ubicación no encontrada."
         
@@ -180,6 +208,9 @@ class UbicacionesModule:
 
     def _ofrecer_ayuda_ubicaciones(self):
         """Ofrece ayuda para encontrar ubicaciones"""
+        return self.renderizados.obtener('ayuda')
+
+    def _renderizar_ayuda(self):
         respuesta = "📍 *UBICACIONES ARGO*\n\n"
         respuesta += "Puedo ayudarte a encontrar nuestras ubicaciones. Puedes preguntar por:\n\n"
         respuesta += "• 'Ubicaciones en [ciudad]' (ej: Ubicaciones en Veracruz)\n"
@@ -191,25 +222,29 @@ class UbicacionesModule:
         return respuesta
 
     def procesar_ubicacion_usuario(self, ciudad, user_id):
-        """Procesa la ubicación proporcionada por el usuario"""
-        ciudad_lower = ciudad.lower()
+        """Procesa la ubicación proporcionada por el usuario (respuesta a '¿en qué ciudad te encuentras?')"""
+        ciudad = normalizar(ciudad)
         
-        # Buscar ubicaciones en esa ciudad
-        ubicaciones_encontradas = []
+        # Ciudad o estado del gazetteer: los almacenes más cercanos con su distancia
+        respuesta = self.responder_cercanas(ciudad.limpio)
+        if respuesta:
+            return respuesta
         
-        for ciudad_map, ubicaciones in self.ciudades_ubicaciones.items():
-            if ciudad_lower in ciudad_map:
-                ubicaciones_encontradas.extend(ubicaciones)
+        # Buscar la ciudad en el índice de ubicaciones
+        candidatos = buscar_ubicaciones(ciudad.limpio, limite=1)
+        if candidatos:
+            return self.responder_candidato(candidatos[0])
         
-        # También buscar en las ciudades de las ubicaciones
+        # También buscar en las ciudades de las ubicaciones (estado, municipio)
+        ubicaciones_encontradas = []
         for ubicacion_key, datos in self.ubicaciones.items():
-            if ciudad_lower in datos['ciudad'].lower():
+            if ciudad.minusculas in datos['ciudad'].lower():
                 ubicaciones_encontradas.append(ubicacion_key)
         
         if ubicaciones_encontradas:
             if len(ubicaciones_encontradas) == 1:
                 return self._mostrar_detalles_completos(ubicaciones_encontradas[0])
             else:
-                return self._mostrar_ubicaciones_ciudad(ciudad, ubicaciones_encontradas)
+                return self._mostrar_ubicaciones_ciudad(ciudad.limpio, ubicaciones_encontradas)
         else:
-            return f"No tenemos ubicaciones en {ciudad}. Te recomiendo consultar nuestras ubicaciones disponibles."
\ No newline at end of file
+            return f"No tenemos ubicaciones en {ciudad.limpio}. Te recomiendo consultar nuestras ubicaciones disponibles."
\ No newline at end of file
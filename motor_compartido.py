@@ -0,0 +1,58 @@
+# motor_compartido.py
+# Motor de respuestas compartido por los dos servidores: app.py (Flask, WSGI) y asgi.py (Quart, ASGI).
+# Ninguno importa al otro; cada proceso crea su motor una sola vez con obtener_motor().
+from dotenv import load_dotenv
+load_dotenv()
+
+import logging
+import threading
+from chatbot_engine import MotorRespuestasAvanzado
+from config import preconectar_proveedores, limitador, router_proveedores
+from utils.http_client import obtener_cliente_http
+from utils.spell_checker import obtener_corrector
+
+logger = logging.getLogger(__name__)
+
+_motor = None
+_motor_lock = threading.Lock()
+
+def obtener_motor():
+    """Retorna el motor del proceso; la primera vez lo crea y precalienta conexiones y diccionario en segundo plano"""
+    global _motor
+    if _motor is None:
+        with _motor_lock:
+            if _motor is None:
+                _motor = MotorRespuestasAvanzado()
+                # Precalentar conexiones con los proveedores de LLM sin bloquear el arranque
+                threading.Thread(target=preconectar_proveedores, daemon=True).start()
+                # Cargar el diccionario ortográfico en segundo plano (una sola vez por proceso)
+                threading.Thread(target=obtener_corrector().precargar, daemon=True).start()
+    return _motor
+
+def es_solicitud_valida_twilio(request):
+    """Verifica que la solicitud viene de Twilio (opcional pero recomendado)"""
+    # Puedes implementar verificación de firma Twilio aquí
+    # https://www.twilio.com/docs/usage/webhooks/webhooks-security
+    return True  # Por ahora retornamos True para testing
+
+def estado_interno():
+    """Estadísticas internas del chatbot para el endpoint /status de ambos servidores"""
+    motor = obtener_motor()
+    return {
+        'status': 'ok',
+        'http_pool': obtener_cliente_http().estadisticas(),
+        'rate_limits': limitador.estadisticas(),
+        'proveedores': router_proveedores.estadisticas(),
+        'cache_clasificaciones': motor.cache_clasificaciones.estadisticas(),
+        'llamadas_agrupadas': motor.vuelo_unico.estadisticas(),
+        'hedging': motor.cobertura.estadisticas(),
+        'circuito_llm': motor.circuito.estadisticas(),
+        'micro_lotes': motor.micro_lotes.estadisticas(),
+        'ortografia': obtener_corrector().estadisticas(),
+        'etapas': motor.metricas_etapas.estadisticas(),
+        'palabras_clave': motor.detector_palabras.estadisticas(),
+        'renderizados': {type(modulo).__name__: modulo.renderizados.estadisticas() for modulo in motor.modulos},
+        'clasificador_local': motor.clasificador_local.estadisticas() if motor.clasificador_local else None,
+        'tokens': motor.contador_tokens.estadisticas(),
+        'sesiones': motor.context_manager.estadisticas()
+    }
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+
+# Las pruebas importan los módulos desde la raíz del repositorio (no hay paquete instalable)
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+# Sin modelo local ni registro de etiquetas en data/: las pruebas no dependen de archivos del despliegue
+os.environ.setdefault("CLASIFICADOR_DESHABILITADO", "1")
+os.environ.setdefault("LLM_REGISTRO_ETIQUETAS", os.path.join(tempfile.mkdtemp(prefix="etiquetas_"), "etiquetas.jsonl"))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def motor():
+    """Motor completo, construido una vez para las pruebas de enrutamiento"""
+    from chatbot_engine import MotorRespuestasAvanzado
+    return MotorRespuestasAvanzado()
+
+
+@pytest.fixture
+def etapa_que_resuelve(motor):
+    """Recorre las etapas como procesar_mensaje y retorna (nombre de la etapa que respondió, respuesta)"""
+    from chatbot_engine import ETAPAS_PROCESAMIENTO
+    contador = iter(range(10 ** 9))
+
+    def recorrer(texto, user_id=None):
+        user_id = user_id or f"prueba-{next(contador)}"
+        solicitud = motor._iniciar_solicitud(texto, user_id)
+        for etapa in ETAPAS_PROCESAMIENTO:
+            respuesta = getattr(motor, etapa.metodo)(solicitud)
+            if respuesta is not None:
+                return etapa.nombre, respuesta
+        return None, None
+
+    return recorrer
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from utils.aho_corasick import AutomataAhoCorasick
+from utils.palabras_clave import DetectorPalabras, categorias_palabras, obtener_detector
+
+
+def apariciones(automata, texto):
+    return sorted((posicion, palabra) for posicion, palabra, _ in automata.buscar(texto))
+
+
+def test_palabras_traslapadas_y_sufijos():
+    automata = AutomataAhoCorasick([("he", "a"), ("she", "a"), ("his", "a"), ("hers", "a")])
+    assert apariciones(automata, "ushers") == [(3, "he"), (3, "she"), (5, "hers")]
+
+
+def test_palabra_dentro_de_otra():
+    automata = AutomataAhoCorasick([("zapato", "calzado"), ("zapato deportivo", "calzado")])
+    assert [p for _, p, _ in automata.buscar("un zapato deportivo")] == ["zapato", "zapato deportivo"]
+
+
+def test_una_palabra_en_varias_categorias():
+    automata = AutomataAhoCorasick([("almacén", "ubicacion"), ("almacén", "servicio"), ("almacén", "servicio")])
+    assert sorted(c for _, _, c in automata.buscar("almacén")) == ["servicio", "ubicacion"]
+
+
+def test_sin_palabras_y_texto_vacio():
+    assert list(AutomataAhoCorasick([]).buscar("hola")) == []
+    assert list(AutomataAhoCorasick([("a", "x")]).buscar("")) == []
+
+
+def test_equivale_a_buscar_cada_palabra():
+    rng = random.Random(3)
+    palabras = {"".join(rng.choice("abñ") for _ in range(rng.randint(1, 4))) for _ in range(30)}
+    automata = AutomataAhoCorasick([(p, "c") for p in palabras])
+    for _ in range(200):
+        texto = "".join(rng.choice("abñ ") for _ in range(rng.randint(0, 20)))
+        esperadas = sorted(
+            (inicio + len(p) - 1, p) for p in palabras for inicio in range(len(texto)) if texto.startswith(p, inicio)
+        )
+        assert apariciones(automata, texto) == esperadas
+
+
+def test_detector_agrupa_por_categoria_en_orden():
+    detector = DetectorPalabras({"saludo": ["hola", "buenos días"], "despedida": ["adiós"]})
+    coincidencias = detector.detectar("Hola, buenos días... y adiós, hola")
+    assert coincidencias.categorias == ("saludo", "despedida")
+    assert coincidencias.palabras("saludo") == ("hola", "buenos días")
+    assert "despedida" in coincidencias and "menu" not in coincidencias
+    assert coincidencias.palabras("menu") == ()
+
+
+def test_detector_memoriza_por_mensaje():
+    detector = DetectorPalabras({"saludo": ["hola"]})
+    assert detector.detectar("HOLA") is detector.detectar("hola")
+    assert detector.estadisticas()["tasa_memo"] == 0.5
+
+
+@pytest.mark.parametrize("mensaje, categoria", [
+    ("¿Dónde están sus almacenes?", "intencion_ubicacion"),
+    ("¿a qué hora abren?", "horarios"),
+    ("necesito paletizado", "servicio:acondicionamiento"),
+])
+def test_detector_compartido(mensaje, categoria):
+    assert categoria in obtener_detector().detectar(mensaje)
+    assert obtener_detector() is obtener_detector()
+
+
+def test_categorias_de_todos_los_detectores():
+    categorias = categorias_palabras()
+    assert {"saludo", "despedida", "horarios", "restricciones", "contacto", "cotizacion"} <= categorias.keys()
+    assert any(nombre.startswith("servicio:") for nombre in categorias)
@@ -0,0 +1,96 @@
+import pytest
+
+import utils.cache as cache
+from utils.cache import CacheTTL, clave_normalizada, crear_cache_clasificaciones
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache, "time", reloj)
+    return reloj
+
+
+def test_expira_tras_el_ttl(reloj):
+    memoria = CacheTTL(ttl=10)
+    memoria.guardar("a", 1)
+    reloj.ahora = 9.9
+    assert memoria.obtener("a") == 1
+    reloj.ahora = 10
+    assert memoria.obtener("a") is None
+    assert memoria.estadisticas()["expirados"] == 1
+    assert memoria.estadisticas()["entradas"] == 0
+
+
+def test_guardar_de_nuevo_renueva_el_ttl(reloj):
+    memoria = CacheTTL(ttl=10)
+    memoria.guardar("a", 1)
+    reloj.ahora = 8
+    memoria.guardar("a", 2)
+    reloj.ahora = 15
+    assert memoria.obtener("a") == 2
+
+
+def test_desaloja_el_menos_usado(reloj):
+    memoria = CacheTTL(max_entradas=2)
+    memoria.guardar("a", 1)
+    memoria.guardar("b", 2)
+    memoria.obtener("a")            # "b" queda como la menos usada
+    memoria.guardar("c", 3)
+    assert memoria.obtener("b") is None
+    assert memoria.obtener("a") == 1
+    assert memoria.obtener("c") == 3
+    assert memoria.estadisticas()["desalojados"] == 1
+
+
+def test_contadores(reloj):
+    memoria = CacheTTL()
+    memoria.obtener("x")
+    memoria.guardar("x", "y")
+    memoria.obtener("x")
+    estado = memoria.estadisticas()
+    assert (estado["aciertos"], estado["fallos"], estado["tasa_aciertos"]) == (1, 1, 0.5)
+
+
+def test_bypass_no_guarda():
+    memoria = CacheTTL(bypass=True)
+    memoria.guardar("a", 1)
+    assert memoria.obtener("a") is None
+    assert memoria.estadisticas()["entradas"] == 0
+
+
+def test_invalidar():
+    memoria = CacheTTL()
+    memoria.guardar("a", 1)
+    memoria.guardar("b", 2)
+    memoria.invalidar("a")
+    memoria.invalidar("no-existe")
+    assert memoria.obtener("a") is None
+    assert memoria.obtener("b") == 2
+    memoria.invalidar()
+    assert memoria.estadisticas()["entradas"] == 0
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("¿Dónde están?", "donde estan"),
+    ("  HOLA,   buenos   días!! ", "hola buenos dias"),
+    ("", ""),
+])
+def test_clave_normalizada(texto, esperado):
+    assert clave_normalizada(texto) == esperado
+
+
+def test_configuracion_por_entorno(monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_MAX_ENTRADAS", "7")
+    monkeypatch.setenv("LLM_CACHE_TTL", "30")
+    monkeypatch.setenv("LLM_CACHE_DESHABILITADA", "sí")
+    memoria = crear_cache_clasificaciones()
+    assert (memoria.max_entradas, memoria.ttl, memoria.bypass) == (7, 30, True)
@@ -0,0 +1,114 @@
+import pytest
+
+import utils.circuit_breaker as circuit_breaker
+from utils.circuit_breaker import ABIERTO, CERRADO, SEMIABIERTO, CircuitBreaker, CircuitoAbiertoError
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+
+class ErrorLocal(Exception):
+    pass
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(circuit_breaker, "time", reloj)
+    return reloj
+
+
+def circuito(**opciones):
+    parametros = dict(ventana=10, min_solicitudes=4, umbral_error=0.5, max_fallos_consecutivos=3,
+                      tiempo_apertura=30, max_sondas=1, exitos_para_cerrar=2,
+                      es_fallo=lambda error: not isinstance(error, ErrorLocal))
+    parametros.update(opciones)
+    return CircuitBreaker(nombre="prueba", **parametros)
+
+
+def llamar(breaker, error=None):
+    try:
+        with breaker.llamada():
+            if error is not None:
+                raise error
+    except (RuntimeError, ErrorLocal):
+        pass
+
+
+def test_abre_por_fallos_consecutivos(reloj):
+    breaker = circuito()
+    for _ in range(3):
+        llamar(breaker, RuntimeError())
+    assert breaker.estado == ABIERTO
+    with pytest.raises(CircuitoAbiertoError):
+        llamar(breaker)
+    assert breaker.estadisticas()["rechazadas"] == 1
+    assert not breaker.permite_llamadas()
+
+
+def test_abre_por_tasa_de_error(reloj):
+    breaker = circuito(max_fallos_consecutivos=100)
+    for error in (RuntimeError(), None, RuntimeError(), None):
+        llamar(breaker, error)
+    assert breaker.estado == ABIERTO
+
+
+def test_no_abre_antes_del_minimo_de_muestras(reloj):
+    breaker = circuito(max_fallos_consecutivos=100)
+    for error in (RuntimeError(), None, RuntimeError()):
+        llamar(breaker, error)
+    assert breaker.estado == CERRADO
+
+
+def test_errores_locales_no_cuentan(reloj):
+    breaker = circuito()
+    for _ in range(5):
+        llamar(breaker, ErrorLocal())
+    assert breaker.estado == CERRADO
+    assert breaker.estadisticas()["muestras"] == 0
+
+
+def test_semiabierto_deja_pasar_una_sonda(reloj):
+    breaker = circuito()
+    for _ in range(3):
+        llamar(breaker, RuntimeError())
+    reloj.ahora = 30
+    assert breaker.permite_llamadas()
+    with breaker.llamada():
+        assert breaker.estado == SEMIABIERTO
+        # Solo una sonda a la vez
+        with pytest.raises(CircuitoAbiertoError):
+            with breaker.llamada():
+                pass
+    assert breaker.estado == SEMIABIERTO
+    llamar(breaker)
+    assert breaker.estado == CERRADO
+    assert breaker.estadisticas()["muestras"] == 0
+
+
+def test_sonda_fallida_vuelve_a_abrir(reloj):
+    breaker = circuito()
+    for _ in range(3):
+        llamar(breaker, RuntimeError())
+    reloj.ahora = 30
+    llamar(breaker, RuntimeError())
+    assert breaker.estado == ABIERTO
+    assert breaker.aperturas == 2
+    assert breaker.estadisticas()["segundos_para_sonda"] == 30
+
+
+def test_sonda_con_error_local_libera_el_turno(reloj):
+    breaker = circuito()
+    for _ in range(3):
+        llamar(breaker, RuntimeError())
+    reloj.ahora = 30
+    llamar(breaker, ErrorLocal())
+    assert breaker.estado == SEMIABIERTO
+    llamar(breaker)
+    llamar(breaker)
+    assert breaker.estado == CERRADO
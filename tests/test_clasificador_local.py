@@ -0,0 +1,105 @@
+import pytest
+
+from entrenar_clasificador import evaluar
+from utils.clasificador_local import (
+    ClasificadorIntencion, RegistroEtiquetas, ETIQUETA_OTRO, etiqueta_canonica, tiene_valor
+)
+
+EJEMPLOS = [
+    ("hola buenos dias", "SALUDO: GENERAL|"),
+    ("hola buenas tardes", "SALUDO: GENERAL|"),
+    ("buenos dias hola", "SALUDO: GENERAL|"),
+    ("que servicios ofrecen", "SERVICIOS: GENERAL|"),
+    ("cuales servicios ofrecen", "SERVICIOS: GENERAL|"),
+    ("servicios que ofrecen ustedes", "SERVICIOS: GENERAL|"),
+    ("tienen almacen en veracruz", "UBICACIONES: ESPECIFICA|"),
+    ("tienen almacen en toluca", "UBICACIONES: ESPECIFICA|"),
+    ("almacen en veracruz tienen", "UBICACIONES: ESPECIFICA|"),
+    ("cuentame un chiste", ETIQUETA_OTRO),
+    ("cuentame otro chiste", ETIQUETA_OTRO),
+    ("un chiste cuentame", ETIQUETA_OTRO),
+]
+
+
+@pytest.fixture(scope="module")
+def clasificador():
+    textos, etiquetas = zip(*EJEMPLOS)
+    return ClasificadorIntencion.entrenar(
+        textos, etiquetas, umbral=0.3, min_df=1, epocas=60, con_valor=["UBICACIONES: ESPECIFICA|"]
+    )
+
+
+def test_responde_clase_conocida(clasificador):
+    assert clasificador.clasificar("hola buenos dias") == "SALUDO: GENERAL|"
+
+
+def test_sin_cobertura_va_al_llm(clasificador):
+    assert clasificador.predecir("xyzzy qwerty") == (None, 0.0)
+    assert clasificador.predecir("") == (None, 0.0)
+    assert clasificador.clasificar("xyzzy qwerty") is None
+
+
+def test_umbral_rechaza_confianza_baja(clasificador):
+    etiqueta, confianza = clasificador.predecir("hola buenos dias")
+    clasificador.umbral = confianza + 0.01
+    try:
+        assert clasificador.clasificar("hola buenos dias") is None
+    finally:
+        clasificador.umbral = 0.3
+
+
+@pytest.mark.parametrize("mensaje", ["cuentame un chiste", "tienen almacen en veracruz"])
+def test_otro_y_etiquetas_con_valor_no_se_responden(clasificador, mensaje):
+    etiqueta, _ = clasificador.predecir(mensaje)
+    assert etiqueta in clasificador.no_locales
+    assert clasificador.clasificar(mensaje) is None
+
+
+def test_guardar_y_cargar(clasificador, tmp_path):
+    ruta = str(tmp_path / "modelo.npz")
+    clasificador.guardar(ruta)
+    cargado = ClasificadorIntencion.cargar(ruta)
+    assert cargado.clases == clasificador.clases
+    assert cargado.no_locales == clasificador.no_locales
+    assert cargado.predecir("que servicios ofrecen")[0] == clasificador.predecir("que servicios ofrecen")[0]
+
+
+def test_evaluar_sin_ejemplos(clasificador):
+    assert evaluar(clasificador, [], 0.85) == {"ejemplos": 0}
+
+
+def test_evaluar_con_un_ejemplo(clasificador):
+    metricas = evaluar(clasificador, EJEMPLOS[:1], 0.3)
+    assert metricas["ejemplos"] == 1
+    assert metricas["exactitud"] == 1.0
+
+
+@pytest.mark.parametrize("respuesta, esperado", [
+    ("UBICACIONES: ESPECIFICA|Veracruz", "UBICACIONES: ESPECIFICA|"),
+    ("servicios : general|", "SERVICIOS: GENERAL|"),
+    (ETIQUETA_OTRO, ETIQUETA_OTRO),
+    ("texto libre sin etiqueta", None),
+])
+def test_etiqueta_canonica(respuesta, esperado):
+    assert etiqueta_canonica(respuesta) == esperado
+
+
+@pytest.mark.parametrize("respuesta, esperado", [
+    ("SERVICIOS: ESPECIFICO|Depósito fiscal", True),
+    ("SERVICIOS: GENERAL|", False),
+    ("SERVICIOS: GENERAL|   ", False),
+    (ETIQUETA_OTRO, False),
+])
+def test_tiene_valor(respuesta, esperado):
+    assert tiene_valor(respuesta) is esperado
+
+
+def test_registro_deduplica_y_conserva_la_mas_reciente(tmp_path):
+    registro = RegistroEtiquetas(str(tmp_path / "etiquetas.jsonl"))
+    registro.registrar("Hola", "SALUDO: GENERAL|")
+    registro.registrar("hola", "OTRO")
+    registro.registrar("dónde están", "UBICACIONES: ESPECIFICA|Toluca")
+    with open(registro.ruta, "a", encoding="utf-8") as archivo:
+        archivo.write("no es json\n")
+    assert sorted(registro.leer()) == [("dónde están", "UBICACIONES: ESPECIFICA|"), ("hola", ETIQUETA_OTRO)]
+    assert registro.etiquetas_con_valor() == ["UBICACIONES: ESPECIFICA|"]
@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from utils.edit_distance import distancia_levenshtein
+
+
+def referencia(a, b):
+    anterior = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        actual = [i]
+        for j, y in enumerate(b, 1):
+            actual.append(min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + (x != y)))
+        anterior = actual
+    return anterior[-1]
+
+
+@pytest.mark.parametrize("a, b, esperada", [
+    ("", "", 0),
+    ("", "abc", 3),
+    ("almacen", "almacén", 1),
+    ("veracruz", "veracrus", 1),
+    ("casa", "acsa", 2),         # sin transposiciones: dos sustituciones
+    ("kitten", "sitting", 3),
+])
+def test_casos_conocidos(a, b, esperada):
+    assert distancia_levenshtein(a, b) == esperada
+    assert distancia_levenshtein(b, a) == esperada
+
+
+def test_coincide_con_programacion_dinamica():
+    rng = random.Random(7)
+    letras = "abcñé"
+    for _ in range(500):
+        a = "".join(rng.choice(letras) for _ in range(rng.randint(0, 12)))
+        b = "".join(rng.choice(letras) for _ in range(rng.randint(0, 12)))
+        assert distancia_levenshtein(a, b) == referencia(a, b), (a, b)
+
+
+def test_patron_de_mas_de_64_letras():
+    a = "ab" * 50
+    b = "ba" * 50
+    assert distancia_levenshtein(a, b) == referencia(a, b)
+
+
+@pytest.mark.parametrize("a, b", [("almacenes", "xyz"), ("abcdefgh", "hgfedcba"), ("", "abcd")])
+def test_corte_por_maximo(a, b):
+    real = referencia(a, b)
+    for maximo in range(0, 4):
+        esperado = real if real <= maximo else maximo + 1
+        assert distancia_levenshtein(a, b, maximo) == esperado
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from utils.geo import (
+    BuscadorAlmacenes, Geocodificador, Lugar, almacenes_cercanos, cargar_municipios_csv,
+    distancias_haversine, entradas_lugares
+)
+
+
+@pytest.mark.parametrize("texto, nombre, primero", [
+    ("Xalapa", "Xalapa", "CENTRAL CÓRDOBA"),
+    ("estoy en toluca", "Toluca", "CEYLAN"),
+    ("cdmx", "Ciudad de México", "PANTACO"),
+    ("xalap", "Xalapa", "CENTRAL CÓRDOBA"),
+    ("yucatan", "Yucatán", "MÉRIDA"),
+])
+def test_almacenes_cercanos(texto, nombre, primero):
+    lugar, cercanos = almacenes_cercanos(texto)
+    assert lugar.nombre == nombre
+    assert cercanos[0].clave == primero
+    assert [c.distancia_km for c in cercanos] == sorted(c.distancia_km for c in cercanos)
+
+
+@pytest.mark.parametrize("texto", ["la playa", "hola", ""])
+def test_sin_lugar_claro(texto):
+    assert almacenes_cercanos(texto) == (None, [])
+
+
+def test_todas_las_palabras_del_lugar_deben_aparecer():
+    geocodificador = Geocodificador([("Playa del Carmen", "pdc"), ("Celaya", "celaya")])
+    assert geocodificador.geocodificar("cerca de la playa") is None
+    assert geocodificador.geocodificar("voy a playa del carmen") == "pdc"
+
+
+def test_municipio_antes_que_estado():
+    entradas = entradas_lugares()
+    veracruz = [lugar for texto, lugar in entradas if texto == "Veracruz"]
+    # El puerto (19.17, -96.13) va antes que el estado, registrado en su capital Xalapa
+    assert len(veracruz) == 2
+    assert veracruz[0].lng == pytest.approx(-96.13, abs=0.01)
+    assert almacenes_cercanos("veracruz")[0] == veracruz[0]
+
+
+def test_haversine_conocida():
+    # CDMX - Guadalajara: ~460 km en línea recta
+    lat, lng = np.radians([20.6597]), np.radians([-103.3496])
+    distancia = distancias_haversine(19.4326, -99.1332, lat, lng, np.cos(lat))[0]
+    assert 455 < distancia < 465
+    assert distancias_haversine(19.0, -99.0, np.radians([19.0]), np.radians([-99.0]), np.cos(np.radians([19.0])))[0] == 0
+
+
+def test_buscador_k_mayor_que_almacenes_y_sin_coordenadas():
+    ubicaciones = {
+        "A": {"coordenadas": {"lat": 19.0, "lng": -99.0}},
+        "B": {"coordenadas": {"lat": 20.0, "lng": -99.0}},
+        "C": {"coordenadas": None},
+    }
+    buscador = BuscadorAlmacenes(ubicaciones)
+    assert len(buscador) == 2
+    assert [c.clave for c in buscador.cercanos(19.9, -99.0, k=10)] == ["B", "A"]
+    assert buscador.cercanos(19.9, -99.0, k=0) == []
+    assert BuscadorAlmacenes({}).cercanos(0, 0) == []
+
+
+def test_csv_ignora_filas_incompletas(tmp_path):
+    ruta = tmp_path / "municipios.csv"
+    ruta.write_text("nombre,estado,lat,lng\nCoatepec,Veracruz,19.45,-96.96\nSin coordenadas,Veracruz,,\n", encoding="utf-8")
+    assert cargar_municipios_csv(str(ruta)) == [Lugar("Coatepec", "Veracruz", 19.45, -96.96)]
+    assert cargar_municipios_csv(str(tmp_path / "no-existe.csv")) == []
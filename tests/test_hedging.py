@@ -0,0 +1,126 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.hedging import CoberturaLatencia
+from utils.rate_limiter import ProveedorOcupadoError
+
+
+class Destino:
+    def __init__(self, nombre, latencia=0.05):
+        self.nombre = self.modelo = nombre
+        self.latencia = latencia
+
+    def percentil_latencia(self, percentil):
+        return self.latencia
+
+
+class Router:
+    """Router mínimo: el primer destino es el principal; el respaldo se pide con plazo=0"""
+
+    def __init__(self, *destinos, respaldo_libre=True):
+        self.destinos = list(destinos)
+        self.respaldo_libre = respaldo_libre
+
+    def adquirir_destino(self, plazo=None, excluir=None):
+        if excluir is None:
+            return self.destinos[0]
+        if not self.respaldo_libre:
+            raise ProveedorOcupadoError("sin turno")
+        return next(d for d in self.destinos if d is not excluir)
+
+    async def adquirir_destino_async(self, plazo=None, excluir=None):
+        return self.adquirir_destino(plazo, excluir)
+
+
+def cobertura(router, **opciones):
+    return CoberturaLatencia(router, habilitado=True, min_espera=0.01, **opciones)
+
+
+def test_sin_historial_no_cubre():
+    principal = Destino("a", latencia=None)
+    hedging = cobertura(Router(principal, Destino("b")))
+    assert hedging.ejecutar(lambda destino: destino.nombre) == "a"
+    assert hedging.estadisticas()["modelos"] == {}
+
+
+def test_principal_rapido_gana_sin_respaldo():
+    hedging = cobertura(Router(Destino("a"), Destino("b")))
+    assert hedging.ejecutar(lambda destino: destino.nombre) == "a"
+    assert hedging.estadisticas()["modelos"]["a"]["ganadas_principal"] == 1
+    assert "b" not in hedging.estadisticas()["modelos"]
+
+
+def test_principal_lento_lo_cubre_el_respaldo():
+    liberar = threading.Event()
+
+    def llamar(destino):
+        if destino.nombre == "a":
+            liberar.wait(2)
+        return destino.nombre
+
+    hedging = cobertura(Router(Destino("a"), Destino("b")))
+    try:
+        assert hedging.ejecutar(llamar) == "b"
+    finally:
+        liberar.set()
+    modelos = hedging.estadisticas()["modelos"]
+    assert modelos["b"]["ganadas_respaldo"] == 1
+    assert modelos["b"]["llamadas_extra"] == 1
+
+
+def test_sin_respaldo_libre_espera_al_principal():
+    def llamar(destino):
+        time.sleep(0.05)
+        return destino.nombre
+
+    hedging = cobertura(Router(Destino("a"), Destino("b"), respaldo_libre=False))
+    assert hedging.ejecutar(llamar) == "a"
+
+
+def test_error_del_principal_no_gana_si_el_respaldo_responde():
+    def llamar(destino):
+        if destino.nombre == "a":
+            time.sleep(0.2)
+            raise RuntimeError("502")
+        return destino.nombre
+
+    hedging = cobertura(Router(Destino("a"), Destino("b")))
+    assert hedging.ejecutar(llamar) == "b"
+
+
+def test_ambos_fallan_propaga_el_error():
+    def llamar(destino):
+        time.sleep(0.05)
+        raise RuntimeError(destino.nombre)
+
+    with pytest.raises(RuntimeError):
+        cobertura(Router(Destino("a"), Destino("b"))).ejecutar(llamar)
+
+
+def test_async_cancela_la_perdedora():
+    canceladas = []
+
+    async def llamar(destino):
+        try:
+            await asyncio.sleep(1 if destino.nombre == "a" else 0)
+            return destino.nombre
+        except asyncio.CancelledError:
+            canceladas.append(destino.nombre)
+            raise
+
+    async def escenario():
+        resultado = await cobertura(Router(Destino("a"), Destino("b"))).ejecutar_async(llamar)
+        await asyncio.sleep(0)
+        return resultado
+
+    assert asyncio.run(escenario()) == "b"
+    assert canceladas == ["a"]
+
+
+def test_deshabilitado_no_crea_hilos():
+    hedging = CoberturaLatencia(Router(Destino("a"), Destino("b")))
+    assert hedging._executor is None
+    assert hedging.ejecutar(lambda destino: destino.nombre) == "a"
@@ -0,0 +1,100 @@
+import pytest
+
+from utils.historial import HistorialCircular, Turno, tamano_turno
+from utils.context_manager import ContextManager
+
+
+def turno(secuencia, mensaje="hola"):
+    return Turno(secuencia, "user", mensaje, "2024-01-01T00:00:00", tamano_turno("user", mensaje, "2024-01-01T00:00:00"))
+
+
+def test_descarta_el_mas_antiguo_al_llenarse():
+    historial = HistorialCircular(2)
+    assert historial.agregar(turno(1)) is None
+    assert historial.agregar(turno(2)) is None
+    descartado = historial.agregar(turno(3))
+    assert descartado.secuencia == 1
+    assert [t.secuencia for t in historial] == [2, 3]
+    assert historial.primera_secuencia() == 2
+
+
+def test_bytes_siguen_a_los_turnos():
+    historial = HistorialCircular(2)
+    for secuencia, mensaje in enumerate(["a", "ñandú", "más texto"], 1):
+        historial.agregar(turno(secuencia, mensaje))
+    assert historial.bytes == sum(t.bytes for t in historial)
+
+
+def test_tamano_cuenta_bytes_utf8():
+    assert tamano_turno("user", "ñ", "") == len("user") + 2
+
+
+@pytest.mark.parametrize("capacidad", [0, -1])
+def test_capacidad_invalida(capacidad):
+    with pytest.raises(ValueError):
+        HistorialCircular(capacidad)
+
+
+@pytest.mark.parametrize("n, esperado", [(-1, []), (0, []), (2, [2, 3]), (3, [1, 2, 3]), (10, [1, 2, 3])])
+def test_ultimos_acota_n(n, esperado):
+    historial = HistorialCircular(5)
+    for secuencia in (1, 2, 3):
+        historial.agregar(turno(secuencia))
+    assert [t.secuencia for t in historial.ultimos(n)] == esperado
+
+
+def test_primera_secuencia_vacio():
+    assert HistorialCircular(1).primera_secuencia() is None
+
+
+def test_context_manager_rechaza_max_turnos_cero():
+    with pytest.raises(ValueError):
+        ContextManager(max_turnos=0)
+
+
+def test_obtener_historial_ultimos_negativo():
+    contexto = ContextManager(max_turnos=5)
+    contexto.agregar_mensaje("u", "user", "hola")
+    assert contexto.obtener_historial("u", ultimos=-1) == []
+    assert [t["mensaje"] for t in contexto.obtener_historial("u", ultimos=1)] == ["hola"]
+
+
+def test_max_turnos_por_conversacion():
+    contexto = ContextManager(max_turnos=3)
+    for i in range(5):
+        contexto.agregar_mensaje("u", "user", f"m{i}")
+    assert [t["mensaje"] for t in contexto.obtener_historial("u")] == ["m2", "m3", "m4"]
+    assert contexto.estadisticas()["historial"]["turnos_descartados"] == 2
+
+
+def test_presupuesto_desaloja_lo_mas_antiguo_de_cualquier_sesion():
+    contexto = ContextManager(max_turnos=10, max_bytes=10 ** 9)
+    contexto.agregar_mensaje("a", "user", "x" * 100)
+    contexto.agregar_mensaje("b", "user", "y" * 100)
+    contexto.agregar_mensaje("a", "user", "z" * 100)
+    # Cabe un turno menos de los que hay: sale el primero de "a", no el de "b"
+    contexto.max_bytes = contexto.bytes_historial - 1
+    contexto.agregar_mensaje("b", "user", "w")
+
+    assert [t["mensaje"][0] for t in contexto.obtener_historial("a")] == ["z"]
+    assert [t["mensaje"][0] for t in contexto.obtener_historial("b")] == ["y", "w"]
+    assert contexto.bytes_historial <= contexto.max_bytes
+    assert contexto.estadisticas()["historial"]["turnos_desalojados"] == 1
+
+
+def test_contabilidad_de_bytes_consistente():
+    contexto = ContextManager(max_turnos=3, max_bytes=2000)
+    for i in range(200):
+        contexto.agregar_mensaje(f"u{i % 7}", "user", "mensaje " * (i % 13))
+    total = sum(contexto.bytes_sesion(f"u{i}") for i in range(7))
+    assert contexto.bytes_historial == total <= 2000
+    assert contexto.turnos_historial == sum(len(contexto.obtener_historial(f"u{i}")) for i in range(7))
+    assert len(contexto._llegadas) <= 2 * contexto.turnos_historial + 64
+
+
+def test_limpiar_contexto_descuenta_bytes():
+    contexto = ContextManager()
+    contexto.agregar_mensaje("u", "user", "hola")
+    contexto.limpiar_contexto_usuario("u")
+    assert contexto.bytes_historial == 0
+    assert contexto.obtener_historial("u") == []
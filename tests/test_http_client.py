@@ -0,0 +1,82 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from utils.http_client import ClienteHTTPProveedores, obtener_cliente_http
+
+
+class Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _responder(self):
+        cuerpo = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        self._responder()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._responder()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def servidor():
+    http = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    hilo = threading.Thread(target=http.serve_forever, daemon=True)
+    hilo.start()
+    yield f"http://127.0.0.1:{http.server_address[1]}"
+    http.shutdown()
+    http.server_close()
+
+
+def test_post_libera_el_contador(servidor):
+    cliente = ClienteHTTPProveedores(pool_maxsize=2)
+    assert cliente.post(f"{servidor}/v1", json={}).json() == {"ok": True}
+    estado = cliente.estadisticas()
+    assert estado["en_curso"] == 0
+    assert estado["en_curso_por_host"] == {}
+    assert estado["total_solicitudes"] == 1
+
+
+def test_stream_ocupa_la_conexion_hasta_cerrar(servidor):
+    cliente = ClienteHTTPProveedores(pool_maxsize=2)
+    with cliente.post(f"{servidor}/v1", json={}, stream=True) as respuesta:
+        assert cliente.estadisticas()["en_curso_por_host"] == {servidor: 1}
+        respuesta.content
+    assert cliente.estadisticas()["en_curso"] == 0
+    # Cerrar dos veces no descuenta dos veces
+    respuesta.close()
+    assert cliente.estadisticas()["en_curso"] == 0
+
+
+def test_cuenta_por_host_y_saturaciones(servidor):
+    cliente = ClienteHTTPProveedores(pool_maxsize=1)
+    abiertas = [cliente.get(f"{servidor}/a", stream=True) for _ in range(2)]
+    estado = cliente.estadisticas()
+    assert estado["max_en_curso"] == 2
+    assert estado["saturaciones"] == 1
+    assert estado["saturado"]
+    for respuesta in abiertas:
+        respuesta.close()
+    assert not cliente.estadisticas()["saturado"]
+
+
+def test_error_de_conexion_libera_el_contador():
+    cliente = ClienteHTTPProveedores()
+    with pytest.raises(requests.exceptions.ConnectionError):
+        cliente.post("http://127.0.0.1:9/", timeout=0.5)
+    assert cliente.estadisticas()["en_curso"] == 0
+
+
+def test_un_cliente_por_proceso():
+    assert obtener_cliente_http() is obtener_cliente_http()
@@ -0,0 +1,49 @@
+import pytest
+
+from utils import mensaje_normalizado
+from utils.mensaje_normalizado import MensajeNormalizado, normalizar, quitar_acentos
+
+
+def test_formas_del_mensaje():
+    mensaje = MensajeNormalizado("  ¿Dónde está el Almacén ÚNICO?  ")
+    assert mensaje.original == "  ¿Dónde está el Almacén ÚNICO?  "
+    assert mensaje.limpio == "¿Dónde está el Almacén ÚNICO?"
+    assert mensaje.minusculas == "¿dónde está el almacén único?"
+    assert mensaje.sin_acentos == "¿donde esta el almacen unico?"
+    assert mensaje.tokens == ("¿Dónde", "está", "el", "Almacén", "ÚNICO?")
+    assert str(mensaje) == mensaje.original
+
+
+def test_quitar_acentos_conserva_la_enie():
+    assert quitar_acentos("Peñuela pingüino ÁÉÍÓÚÜ") == "Peñuela pinguino AEIOUU"
+
+
+def test_mensaje_vacio():
+    mensaje = MensajeNormalizado("   ")
+    assert (mensaje.limpio, mensaje.tokens) == ("", ())
+
+
+def test_coincidencias_se_buscan_una_vez(monkeypatch):
+    llamadas = []
+
+    class Detector:
+        def detectar_minusculas(self, minusculas):
+            llamadas.append(minusculas)
+            return "coincidencias"
+
+    monkeypatch.setattr(mensaje_normalizado, "obtener_detector", lambda: Detector())
+    mensaje = MensajeNormalizado("Hola")
+    assert llamadas == []
+    assert mensaje.coincidencias == mensaje.coincidencias == "coincidencias"
+    assert llamadas == ["hola"]
+
+
+def test_slots_sin_atributos_extra():
+    with pytest.raises(AttributeError):
+        MensajeNormalizado("hola").otro = 1
+
+
+def test_normalizar_no_reprocesa():
+    mensaje = MensajeNormalizado("hola")
+    assert normalizar(mensaje) is mensaje
+    assert normalizar("hola").limpio == "hola"
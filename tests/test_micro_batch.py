@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+import pytest
+
+from utils.micro_batch import MicroLotes
+
+
+class Registro:
+    """procesar_lote / procesar_uno que anotan cómo se llamaron"""
+
+    def __init__(self, separable=True, error=None):
+        self.lotes = []
+        self.unos = []
+        self.separable = separable
+        self.error = error
+
+    def lote(self, elementos):
+        self.lotes.append(list(elementos))
+        if self.error:
+            raise self.error
+        return [e.upper() for e in elementos] if self.separable else None
+
+    def uno(self, elemento):
+        self.unos.append(elemento)
+        return elemento.upper()
+
+    async def lote_async(self, elementos):
+        return self.lote(elementos)
+
+    async def uno_async(self, elemento):
+        return self.uno(elemento)
+
+
+def lotes(registro, **opciones):
+    parametros = dict(habilitado=True, max_tamano=3, espera=0.2)
+    parametros.update(opciones)
+    return MicroLotes(registro.lote, registro.uno, registro.lote_async, registro.uno_async, **parametros)
+
+
+def enviar_en_hilos(micro, elementos):
+    resultados = {}
+    hilos = [threading.Thread(target=lambda e=e: resultados.__setitem__(e, micro.enviar(e))) for e in elementos]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+    return resultados
+
+
+def test_deshabilitado_procesa_uno_por_uno():
+    registro = Registro()
+    micro = lotes(registro, habilitado=False)
+    assert micro.enviar("a") == "A"
+    assert registro.lotes == [] and registro.unos == ["a"]
+
+
+def test_lote_lleno_se_despacha_sin_esperar_la_ventana():
+    registro = Registro()
+    micro = lotes(registro, espera=5)
+    resultados = enviar_en_hilos(micro, ["a", "b", "c"])
+    assert resultados == {"a": "A", "b": "B", "c": "C"}
+    assert len(registro.lotes) == 1 and sorted(registro.lotes[0]) == ["a", "b", "c"]
+    assert micro.estadisticas()["espera_promedio_ms"] < 1000
+
+
+def test_ventana_vencida_despacha_lo_que_haya():
+    registro = Registro()
+    micro = lotes(registro, espera=0.01)
+    assert micro.enviar("a") == "A"
+    # Un solo elemento no paga el formato de lote
+    assert registro.lotes == [] and registro.unos == ["a"]
+
+
+def test_salida_no_separable_reintenta_uno_por_uno():
+    registro = Registro(separable=False)
+    micro = lotes(registro, espera=5)
+    resultados = enviar_en_hilos(micro, ["a", "b", "c"])
+    assert resultados == {"a": "A", "b": "B", "c": "C"}
+    assert sorted(registro.unos) == ["a", "b", "c"]
+    estado = micro.estadisticas()
+    assert estado["reintentos_individuales"] == 1
+    assert estado["llamadas_ahorradas"] == -1
+
+
+def test_error_del_lote_llega_a_todos():
+    registro = Registro(error=RuntimeError("502"))
+    micro = lotes(registro, espera=5)
+    errores = []
+
+    def enviar(elemento):
+        try:
+            micro.enviar(elemento)
+        except RuntimeError as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=enviar, args=(e,)) for e in "abc"]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join(5)
+    assert len(errores) == 3
+
+
+def test_async_agrupa_y_respeta_el_orden():
+    registro = Registro()
+    micro = lotes(registro, max_tamano=8, espera=0.01)
+
+    async def escenario():
+        return await asyncio.gather(*(micro.enviar_async(e) for e in ["a", "b", "c"]))
+
+    assert asyncio.run(escenario()) == ["A", "B", "C"]
+    assert registro.lotes == [["a", "b", "c"]]
+    assert micro.estadisticas()["llamadas_ahorradas"] == 2
+
+
+def test_async_lote_lleno_abre_otro():
+    registro = Registro()
+    micro = lotes(registro, max_tamano=2, espera=0.01)
+
+    async def escenario():
+        return await asyncio.gather(*(micro.enviar_async(e) for e in ["a", "b", "c", "d"]))
+
+    assert asyncio.run(escenario()) == ["A", "B", "C", "D"]
+    assert registro.lotes == [["a", "b"], ["c", "d"]]
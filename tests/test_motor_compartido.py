@@ -0,0 +1,39 @@
+import ast
+import sys
+from pathlib import Path
+
+import motor_compartido
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+
+def modulos_importados(archivo):
+    arbol = ast.parse((RAIZ / archivo).read_text(encoding="utf-8"))
+    nombres = set()
+    for nodo in ast.walk(arbol):
+        if isinstance(nodo, ast.ImportFrom):
+            nombres.add(nodo.module)
+        elif isinstance(nodo, ast.Import):
+            nombres.update(alias.name for alias in nodo.names)
+    return nombres
+
+
+def test_un_motor_por_proceso():
+    assert motor_compartido.obtener_motor() is motor_compartido.obtener_motor()
+
+
+def test_no_depende_de_flask():
+    assert "flask" not in sys.modules
+    assert "app" not in sys.modules
+
+
+def test_servidores_no_se_importan_entre_si():
+    assert "app" not in modulos_importados("asgi.py")
+    assert "asgi" not in modulos_importados("app.py")
+    assert "motor_compartido" in modulos_importados("asgi.py") & modulos_importados("app.py")
+
+
+def test_estado_interno():
+    estado = motor_compartido.estado_interno()
+    assert estado["status"] == "ok"
+    assert {"etapas", "sesiones", "circuito_llm", "ortografia"} <= estado.keys()
@@ -0,0 +1,112 @@
+import asyncio
+import itertools
+
+import pytest
+
+from chatbot_engine import ETAPAS_PROCESAMIENTO
+from utils.cache import clave_normalizada
+from utils.pipeline import MetricasEtapas
+
+_usuarios = itertools.count()
+
+
+def usuario():
+    return f"pipeline-{next(_usuarios)}"
+
+
+@pytest.mark.parametrize("mensaje, etapa", [
+    ("hola", "saludo_despedida"),
+    ("adiós, gracias", "saludo_despedida"),
+    ("3", "menu"),
+    ("me llamo Carlos", "nombre"),
+    ("¿Dónde queda Ulua?", "ubicacion_directa"),
+    ("¿Cuál almacén me queda más cerca de Xalapa?", "ubicacion_directa"),
+    ("necesito custodia y vigilancia", "servicios"),
+])
+def test_etapa_que_resuelve_cada_mensaje(etapa_que_resuelve, mensaje, etapa):
+    resuelta, respuesta = etapa_que_resuelve(mensaje)
+    assert resuelta == etapa
+    assert respuesta
+
+
+@pytest.mark.parametrize("mensaje", [
+    "¿qué horarios tienen?",
+    "¿dónde puedo hablar con un asesor?",
+    "¿Dónde puedo almacenar zapatos en Puebla?",
+])
+def test_dudas_llegan_al_llm(etapa_que_resuelve, motor, monkeypatch, mensaje):
+    monkeypatch.setattr(motor.micro_lotes, "enviar", lambda texto: "CONTACTO: EJECUTIVO|")
+    motor.cache_clasificaciones.invalidar()
+    assert etapa_que_resuelve(mensaje)[0] == "llm"
+
+
+def test_ciudad_pendiente_la_responde_su_etapa(etapa_que_resuelve, motor, monkeypatch):
+    monkeypatch.setattr(motor.micro_lotes, "enviar", lambda texto: "UBICACIONES: GENERAL|")
+    user_id = usuario()
+    motor.context_manager.guardar_contexto(user_id, "esperando_ubicacion", "true")
+    etapa, respuesta = etapa_que_resuelve("Toluca", user_id)
+    assert etapa == "ubicacion_pendiente"
+    assert "TOLUCA" in respuesta
+    # La pregunta se contesta una sola vez
+    assert etapa_que_resuelve("Toluca", user_id)[0] != "ubicacion_pendiente"
+
+
+def test_cache_responde_antes_que_el_llm(etapa_que_resuelve, motor):
+    motor.cache_clasificaciones.invalidar()
+    mensaje = "cuéntame de sus horarios de servicio"
+    solicitud = motor._iniciar_solicitud(mensaje, usuario())
+    motor.cache_clasificaciones.guardar(clave_normalizada(motor._corregir_solicitud(solicitud)), "HORARIOS: |")
+    etapa, respuesta = etapa_que_resuelve(mensaje)
+    motor.cache_clasificaciones.invalidar()
+    assert etapa == "cache"
+    assert "Horarios de Atención" in respuesta
+
+
+def test_etapa_que_falla_pasa_a_la_siguiente(motor, monkeypatch):
+    def fallar(solicitud):
+        raise RuntimeError("falla de prueba")
+
+    monkeypatch.setattr(motor, "_etapa_menu", fallar)
+    monkeypatch.setattr(motor, "_etapa_llm", lambda solicitud: None)
+    errores = motor.metricas_etapas.estadisticas().get("menu", {}).get("errores", 0)
+    respuesta = motor.procesar_mensaje("3", usuario())
+    assert respuesta
+    assert motor.metricas_etapas.estadisticas()["menu"]["errores"] == errores + 1
+
+
+def test_sin_etapa_que_resuelva_responde_generico(motor, monkeypatch):
+    for etapa in ETAPAS_PROCESAMIENTO:
+        monkeypatch.setattr(motor, etapa.metodo, lambda solicitud: None)
+    assert motor.procesar_mensaje("algo", usuario())
+
+
+def test_async_resuelve_en_la_misma_etapa(motor):
+    sincrona = motor.procesar_mensaje("3", usuario())
+    asincrona = asyncio.run(motor.procesar_mensaje_async("3", usuario()))
+    assert asincrona == sincrona
+
+
+def test_respuesta_queda_en_el_historial(motor):
+    user_id = usuario()
+    respuesta = motor.procesar_mensaje("hola", user_id)
+    historial = motor.context_manager.obtener_historial(user_id)
+    assert [turno["mensaje"] for turno in historial] == ["hola", respuesta]
+
+
+def test_metricas_por_etapa():
+    metricas = MetricasEtapas(ventana=3)
+    for segundos, resolvio in [(0.001, False), (0.002, True), (0.003, False), (0.004, True)]:
+        metricas.registrar("cache", segundos, resolvio)
+    metricas.registrar_error("cache")
+    datos = metricas.estadisticas()
+    assert (datos["cache"]["ejecuciones"], datos["cache"]["resueltas"], datos["cache"]["errores"]) == (4, 2, 1)
+    # La ventana solo conserva las 3 últimas latencias
+    assert datos["cache"]["latencia_media_ms"] == 3.0
+
+
+def test_error_en_la_primera_ejecucion_se_cuenta():
+    metricas = MetricasEtapas()
+    metricas.registrar_error("llm")
+    assert metricas.estadisticas()["llm"]["errores"] == 1
+    metricas.registrar("llm", 0.01, False)
+    assert metricas.estadisticas()["llm"]["ejecuciones"] == 1
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.prompt_builder import (
+    ContadorTokens, MENSAJE_SISTEMA_CLASIFICACION, PREFIJO_CLASIFICACION,
+    construir_mensajes_clasificacion, construir_mensajes_lote, interpretar_respuesta_lote
+)
+
+
+def test_prefijo_identico_en_cada_llamada():
+    primera = construir_mensajes_clasificacion("hola")
+    segunda = construir_mensajes_clasificacion("¿dónde están?")
+    assert primera[0] is segunda[0] is MENSAJE_SISTEMA_CLASIFICACION
+    assert "{contexto}" not in PREFIJO_CLASIFICACION
+    assert segunda[1] == {'role': 'user', 'content': 'Pregunta: "¿dónde están?"'}
+
+
+def test_lote_comparte_el_prefijo_y_numera():
+    mensajes = construir_mensajes_lote(["hola", "horarios"])
+    assert mensajes[0] is MENSAJE_SISTEMA_CLASIFICACION
+    assert '1. "hola"\n2. "horarios"' in mensajes[1]['content']
+
+
+def test_interpretar_lote_en_desorden():
+    texto = '2. "HORARIOS: |"\n\n1. UBICACIONES: GENERAL|\n'
+    assert interpretar_respuesta_lote(texto, 2) == ["UBICACIONES: GENERAL|", "HORARIOS: |"]
+
+
+@pytest.mark.parametrize("texto", [
+    "1. A",                      # falta una
+    "1. A\n1. B",                # repetida
+    "1. A\n3. B",                # fuera de rango
+    "1. A\nsin número",          # línea no reconocida
+])
+def test_interpretar_lote_rechaza_respuestas_incompletas(texto):
+    assert interpretar_respuesta_lote(texto, 2) is None
+
+
+def test_contador_con_usage_del_proveedor():
+    contador = ContadorTokens()
+    contador.registrar("m", {'prompt_tokens': 100, 'completion_tokens': 5, 'prompt_tokens_details': {'cached_tokens': 80}})
+    contador.registrar("m", {'prompt_tokens': 100, 'completion_tokens': 5, 'prompt_cache_hit_tokens': 60})
+    datos = contador.estadisticas()["m"]
+    assert (datos['llamadas'], datos['tokens_cache'], datos['fraccion_cache']) == (2, 140, 0.7)
+    assert datos['llamadas_estimadas'] == 0
+
+
+def test_contador_estima_sin_usage():
+    contador = ContadorTokens()
+    mensajes = construir_mensajes_clasificacion("hola")
+    prompt_tokens = contador.registrar("m", None, mensajes)
+    assert prompt_tokens == sum(max(1, len(m['content']) // 4) for m in mensajes)
+    assert contador.estadisticas()["m"]['llamadas_estimadas'] == 1
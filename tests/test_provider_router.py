@@ -0,0 +1,123 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.provider_router import DestinoLLM, RouterProveedores
+from utils.rate_limiter import LimitadorProveedores, ProveedorOcupadoError
+
+
+def crear_router(*destinos, rpm_por_key=60):
+    # Ráfaga de 1 y 1 token por segundo por key: agotar una key obliga a esperar ~1 s
+    limitador = LimitadorProveedores(rpm_por_key=rpm_por_key, rpm_por_modelo=6000, rafaga=1, max_en_espera=5, plazo=5)
+    router = RouterProveedores(destinos, limitador)
+    return router, limitador
+
+
+def destino(nombre):
+    return DestinoLLM("openrouter", "https://ejemplo.invalid/v1", f"key-{nombre}", f"modelo-{nombre}")
+
+
+def fijar_orden(monkeypatch, router, orden):
+    monkeypatch.setattr(router, "_candidatos", lambda excluir=None: list(orden))
+
+
+def test_prefiere_destino_con_turno_inmediato(monkeypatch):
+    lento, libre = destino("a"), destino("b")
+    router, limitador = crear_router(lento, libre)
+    limitador.adquirir(lento.api_key, lento.modelo)
+    fijar_orden(monkeypatch, router, [lento, libre])
+
+    inicio = time.monotonic()
+    assert router.adquirir_destino() is libre
+    assert time.monotonic() - inicio < 0.1
+
+
+def test_prefiere_destino_con_turno_inmediato_async(monkeypatch):
+    lento, libre = destino("a"), destino("b")
+    router, limitador = crear_router(lento, libre)
+    limitador.adquirir(lento.api_key, lento.modelo)
+    fijar_orden(monkeypatch, router, [lento, libre])
+
+    assert asyncio.run(router.adquirir_destino_async()) is libre
+
+
+def test_espera_solo_si_ninguno_tiene_turno(monkeypatch):
+    a, b = destino("a"), destino("b")
+    router, limitador = crear_router(a, b, rpm_por_key=600)
+    limitador.adquirir(a.api_key, a.modelo)
+    limitador.adquirir(b.api_key, b.modelo)
+    fijar_orden(monkeypatch, router, [a, b])
+
+    inicio = time.monotonic()
+    assert router.adquirir_destino(plazo=1) is a
+    assert 0.05 < time.monotonic() - inicio < 1
+
+
+def test_plazo_cero_no_espera(monkeypatch):
+    a = destino("a")
+    router, limitador = crear_router(a)
+    limitador.adquirir(a.api_key, a.modelo)
+
+    with pytest.raises(ProveedorOcupadoError):
+        router.adquirir_destino(plazo=0)
+
+
+def test_excluir_prefiere_otro_modelo():
+    a, b = destino("a"), destino("b")
+    router, _ = crear_router(a, b)
+    assert router.adquirir_destino(plazo=0, excluir=a) is b
+
+
+def test_sin_destinos():
+    router, _ = crear_router()
+    with pytest.raises(ValueError):
+        router.adquirir_destino()
+
+
+def penalizaciones(monkeypatch, limitador):
+    pausas = []
+    monkeypatch.setattr(limitador, "penalizar", lambda api_key, segundos, modelo=None: pausas.append(segundos))
+    return pausas
+
+
+def test_backoff_cuenta_solo_429_consecutivos(monkeypatch):
+    a = destino("a")
+    router, limitador = crear_router(a)
+    pausas = penalizaciones(monkeypatch, limitador)
+
+    router.registrar_error(a, 1.0)                    # timeout: sin status
+    router.registrar_error(a, 1.0, status_code=429)
+    router.registrar_error(a, 1.0, status_code=429)
+    router.registrar_error(a, 1.0, status_code=500)
+    router.registrar_error(a, 1.0, status_code=429)
+    assert pausas == [5, 10, 5]
+
+
+def test_backoff_se_reinicia_con_exito_y_tiene_tope(monkeypatch):
+    a = destino("a")
+    router, limitador = crear_router(a)
+    pausas = penalizaciones(monkeypatch, limitador)
+
+    for _ in range(5):
+        router.registrar_error(a, 1.0, status_code=429)
+    router.registrar_exito(a, 0.5)
+    router.registrar_error(a, 1.0, status_code=429)
+    assert pausas == [5, 10, 20, 30, 30, 5]
+
+
+def test_holgura_y_tasa_error_por_headers():
+    a = destino("a")
+    a.registrar_exito(0.2, {'X-RateLimit-Limit': '100', 'X-RateLimit-Remaining': '25'})
+    a.registrar_error(0.4, {'X-RateLimit-Remaining': 'no-numero'})
+    assert a.holgura() == 0.25
+    assert a.tasa_error() == 0.5
+
+
+def test_costo_favorece_destino_rapido():
+    rapido, lento = destino("a"), destino("b")
+    router, _ = crear_router(rapido, lento)
+    for _ in range(10):
+        rapido.registrar_exito(0.2)
+        lento.registrar_exito(2.0)
+    assert router._costo(rapido) < router._costo(lento)
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+import utils.rate_limiter as rate_limiter
+from utils.rate_limiter import LimitadorProveedores, ProveedorOcupadoError, TokenBucket, etiqueta_key
+
+
+class Reloj:
+    """Sustituye al módulo time del limitador: sleep avanza el reloj en lugar de dormir"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+        self.dormido = []
+
+    def monotonic(self):
+        return self.ahora
+
+    def sleep(self, segundos):
+        self.dormido.append(segundos)
+        self.ahora += segundos
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(rate_limiter, "time", reloj)
+    return reloj
+
+
+def test_rafaga_sin_espera_y_luego_a_la_tasa(reloj):
+    bucket = TokenBucket(tasa=2, capacidad=3)
+    assert [bucket.reservar() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reservar() == pytest.approx(0.5)
+    assert bucket.reservar() == pytest.approx(1.0)
+
+
+def test_recarga_con_el_tiempo_sin_pasar_la_capacidad(reloj):
+    bucket = TokenBucket(tasa=1, capacidad=2)
+    bucket.reservar()
+    bucket.reservar()
+    reloj.ahora += 100
+    assert bucket.estadisticas()["tokens"] == 2
+
+
+def test_plazo_rechaza_y_devuelve_el_token(reloj):
+    bucket = TokenBucket(tasa=1, capacidad=1)
+    bucket.reservar()
+    with pytest.raises(ProveedorOcupadoError):
+        bucket.reservar(plazo=0)
+    assert bucket.rechazados == 1
+    assert bucket.reservar(plazo=1) == pytest.approx(1.0)
+
+
+def test_cola_llena_rechaza(reloj):
+    bucket = TokenBucket(tasa=1, capacidad=1, max_en_espera=1)
+    bucket.reservar()
+    bucket.reservar()
+    with pytest.raises(ProveedorOcupadoError):
+        bucket.reservar()
+    bucket.liberar_espera()
+    assert bucket.reservar() > 0
+
+
+def test_penalizar_bloquea_hasta_que_vence(reloj):
+    bucket = TokenBucket(tasa=1, capacidad=3)
+    bucket.penalizar(10)
+    assert bucket.reservar() == pytest.approx(11.0)
+    assert bucket.estadisticas()["penalizado_por"] == 10
+
+
+def test_limitador_exige_turno_en_key_y_modelo(reloj):
+    limitador = LimitadorProveedores(rpm_por_key=60, rpm_por_modelo=60, rafaga=1, plazo=5)
+    limitador.adquirir("key-a", "modelo-x")
+    # Otra key con el mismo modelo: el bucket del modelo obliga a esperar
+    limitador.adquirir("key-b", "modelo-x")
+    assert reloj.dormido == [pytest.approx(1.0)]
+
+
+def test_rechazo_en_el_modelo_devuelve_el_token_de_la_key(reloj):
+    limitador = LimitadorProveedores(rpm_por_key=60, rpm_por_modelo=60, rafaga=1, plazo=5)
+    limitador.adquirir("key-a", "modelo-x")
+    with pytest.raises(ProveedorOcupadoError):
+        limitador.adquirir("key-b", "modelo-x", plazo=0)
+    # La key-b no gastó su token
+    limitador.adquirir("key-b", "modelo-y", plazo=0)
+    assert reloj.dormido == []
+
+
+def test_adquirir_async_espera_sin_bloquear(reloj, monkeypatch):
+    esperas = []
+
+    async def dormir(segundos):
+        esperas.append(segundos)
+
+    monkeypatch.setattr(rate_limiter.asyncio, "sleep", dormir)
+    limitador = LimitadorProveedores(rpm_por_key=60, rafaga=1, plazo=5)
+    asyncio.run(limitador.adquirir_async("key"))
+    asyncio.run(limitador.adquirir_async("key"))
+    assert esperas == [pytest.approx(1.0)]
+    assert reloj.dormido == []
+
+
+def test_estadisticas_no_exponen_la_key(reloj):
+    limitador = LimitadorProveedores(rafaga=1)
+    limitador.adquirir("sk-or-v1-secreto123456")
+    assert list(limitador.estadisticas()) == ["key:...123456"]
+    assert etiqueta_key(None) == "sin-key"
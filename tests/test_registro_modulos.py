@@ -0,0 +1,74 @@
+import pytest
+
+import modules  # noqa: F401  (importarlo registra los módulos del bot)
+from modules.base_module import BaseModule
+from modules.registro import MODULOS_REGISTRADOS, RegistroModulos, registrar_modulo, separar_etiqueta
+from modules.servicios_module import ServiciosModule
+from modules.ubicaciones_module import UbicacionesModule
+from utils.context_manager import ContextManager
+
+
+class ModuloEco(BaseModule):
+    ETIQUETAS = {"ECO": "responder"}
+    creados = 0
+
+    def __init__(self, db_manager, context_manager):
+        super().__init__(db_manager, context_manager)
+        ModuloEco.creados += 1
+
+    def puede_manejar(self, mensaje):
+        return False
+
+    def procesar(self, mensaje, user_id):
+        return None
+
+    def responder(self, mensaje, subtipo, user_id, valor):
+        return (mensaje, subtipo, user_id, valor)
+
+
+@pytest.mark.parametrize("respuesta, esperado", [
+    ("UBICACIONES: CERCANA|Toluca", ("UBICACIONES", "CERCANA", "Toluca")),
+    ("HORARIOS: |", ("HORARIOS", "", None)),
+    ("SERVICIOS: ESPECIFICO|Custodia\nle comento que...", ("SERVICIOS", "ESPECIFICO", "Custodia")),
+    ("CONTACTO: EJECUTIVO", ("CONTACTO", "EJECUTIVO", None)),
+])
+def test_separar_etiqueta(respuesta, esperado):
+    assert separar_etiqueta(respuesta) == esperado
+
+
+def test_despacha_a_una_instancia_por_motor():
+    ModuloEco.creados = 0
+    registro = RegistroModulos(None, ContextManager(), clases=[ModuloEco])
+    assert registro.despachar("ECO: UNO|valor", "mensaje", "u") == ("mensaje", "UNO", "u", "valor")
+    registro.despachar("ECO: DOS|", "mensaje", "u")
+    assert ModuloEco.creados == 1
+    assert registro.obtener(ModuloEco) is registro.modulos[0]
+
+
+@pytest.mark.parametrize("respuesta", ["Le comento que...", "DESCONOCIDA: X|", ""])
+def test_texto_libre_o_etiqueta_desconocida(respuesta):
+    registro = RegistroModulos(None, ContextManager(), clases=[ModuloEco])
+    assert registro.despachar(respuesta, "mensaje", "u") is None
+
+
+def test_manejador_repetido_se_reemplaza():
+    registro = RegistroModulos(None, ContextManager(), clases=[ModuloEco])
+    registro.registrar_manejador("ECO", lambda *args: "nuevo")
+    assert registro.despachar("ECO: |", "m", "u") == "nuevo"
+    assert registro.etiquetas() == ("ECO",)
+
+
+def test_registrar_modulo_no_duplica():
+    antes = list(MODULOS_REGISTRADOS)
+    assert registrar_modulo(UbicacionesModule) is UbicacionesModule
+    assert MODULOS_REGISTRADOS == antes
+
+
+def test_modulos_del_bot_y_sus_etiquetas():
+    assert MODULOS_REGISTRADOS[:2] == [UbicacionesModule, ServiciosModule]
+    registro = RegistroModulos(None, ContextManager())
+    assert {"UBICACIONES", "SERVICIOS", "HORARIOS", "RESTRICCIONES"} <= set(registro.etiquetas())
+
+
+def test_el_motor_despacha_horarios(motor):
+    assert "Horarios de Atención" in motor.registro_modulos.despachar("HORARIOS: |", "¿a qué hora abren?", "registro")
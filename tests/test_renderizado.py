@@ -0,0 +1,100 @@
+import pytest
+
+import utils.renderizado as renderizado
+from utils.renderizado import RenderizadosCatalogo, huella_catalogo
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def perf_counter(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(renderizado, "time", reloj)
+    return reloj
+
+
+@pytest.fixture
+def catalogo():
+    return {"horario": "9 a 18", "almacenes": {"ULÚA": "Veracruz", "MÉRIDA": "Yucatán"}}
+
+
+def crear(catalogo, llamadas, intervalo=60):
+    renderizados = RenderizadosCatalogo(catalogo, intervalo_verificacion=intervalo)
+
+    def horarios():
+        llamadas.append("horarios")
+        return f"Horario: {catalogo['horario']}"
+
+    def detalles(clave):
+        llamadas.append(clave)
+        return f"{clave}: {catalogo['almacenes'].get(clave, '?')}"
+
+    renderizados.registrar("horarios", horarios)
+    renderizados.registrar("detalles", detalles, lambda: [(clave,) for clave in catalogo["almacenes"]])
+    renderizados.precalcular()
+    return renderizados
+
+
+def test_se_sirve_desde_el_precalculo(reloj, catalogo):
+    llamadas = []
+    renderizados = crear(catalogo, llamadas)
+    assert sorted(llamadas) == ["MÉRIDA", "ULÚA", "horarios"]
+    assert renderizados.obtener("detalles", "ULÚA") == "ULÚA: Veracruz"
+    assert renderizados.obtener("horarios") == "Horario: 9 a 18"
+    assert len(llamadas) == 3
+    assert renderizados.estadisticas()["respuestas"] == 3
+
+
+def test_variante_no_precalculada_se_genera_sin_guardarse(reloj, catalogo):
+    llamadas = []
+    renderizados = crear(catalogo, llamadas)
+    assert renderizados.obtener("detalles", "INVENTADO") == "INVENTADO: ?"
+    renderizados.obtener("detalles", "INVENTADO")
+    assert llamadas.count("INVENTADO") == 2
+    assert renderizados.estadisticas()["fallos"] == 2
+
+
+def test_cambio_del_catalogo_se_detecta_al_vencer_el_intervalo(reloj, catalogo):
+    renderizados = crear(catalogo, [])
+    catalogo["horario"] = "8 a 17"
+    reloj.ahora = 59
+    assert renderizados.obtener("horarios") == "Horario: 9 a 18"
+    reloj.ahora = 60
+    assert renderizados.obtener("horarios") == "Horario: 8 a 17"
+    assert renderizados.estadisticas()["regeneraciones"] == 2
+
+
+def test_verificar_sin_cambios_no_regenera(reloj, catalogo):
+    renderizados = crear(catalogo, [])
+    assert renderizados.verificar() is False
+    catalogo["almacenes"]["PUEBLA"] = "Puebla"
+    assert renderizados.verificar() is True
+    assert renderizados.obtener("detalles", "PUEBLA") == "PUEBLA: Puebla"
+
+
+def test_intervalo_cero_solo_con_invalidar(reloj, catalogo):
+    renderizados = crear(catalogo, [], intervalo=0)
+    catalogo["horario"] = "8 a 17"
+    reloj.ahora = 10 ** 6
+    assert renderizados.obtener("horarios") == "Horario: 9 a 18"
+    renderizados.invalidar()
+    assert renderizados.obtener("horarios") == "Horario: 8 a 17"
+
+
+def test_huella_estable_e_independiente_del_orden():
+    assert huella_catalogo({"a": 1, "b": [1, 2]}) == huella_catalogo({"b": [1, 2], "a": 1})
+    assert huella_catalogo({"a": 1}) != huella_catalogo({"a": 2})
+
+
+def test_modulos_precalculan_al_crearse(motor):
+    for modulo in motor.modulos:
+        assert modulo.renderizados.estadisticas()["respuestas"] > 0
@@ -0,0 +1,89 @@
+import pytest
+
+from modules.servicios_module import ServiciosModule
+from utils.context_manager import ContextManager
+from utils.indice_servicios import IndiceServicios
+from data.servicios_data import PALABRAS_CLAVE, PESOS_PALABRAS_CLAVE
+
+# Un solo servicio genérico ("almacén", "bodega", "inventario") no basta: son de horarios, restricciones o contacto
+OTRAS_INTENCIONES = [
+    "¿Cuál es el horario del almacén?",
+    "¿A qué hora abre la bodega?",
+    "qué mercancía no puedo guardar en su almacén",
+    "quiero hablar con un ejecutivo sobre mi inventario",
+]
+
+
+@pytest.fixture(scope="module")
+def modulo():
+    return ServiciosModule(None, ContextManager())
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceServicios(PALABRAS_CLAVE, PESOS_PALABRAS_CLAVE)
+
+
+@pytest.mark.parametrize("mensaje", OTRAS_INTENCIONES)
+def test_otras_intenciones_van_al_llm(modulo, mensaje):
+    assert modulo.procesar_confiable(mensaje, "u") is None
+
+
+@pytest.mark.parametrize("mensaje", OTRAS_INTENCIONES)
+def test_etapa_servicios_no_responde_otras_intenciones(motor, mensaje):
+    solicitud = motor._iniciar_solicitud(mensaje, "servicios")
+    assert motor._etapa_servicios(solicitud) is None
+
+
+@pytest.mark.parametrize("mensaje, etiqueta, esperado", [
+    ("¿Cuál es el horario del almacén?", "HORARIOS: GENERAL|", "Horarios de Atención"),
+    ("qué mercancía no puedo guardar en su almacén", "RESTRICCIONES: GENERAL|", "NO permitidas"),
+])
+def test_etiqueta_del_llm_llega_al_modulo(etapa_que_resuelve, motor, monkeypatch, mensaje, etiqueta, esperado):
+    monkeypatch.setattr(motor.micro_lotes, "enviar", lambda texto: etiqueta)
+    motor.cache_clasificaciones.invalidar()
+    etapa, respuesta = etapa_que_resuelve(mensaje)
+    assert etapa == "llm"
+    assert esperado in respuesta
+
+
+@pytest.mark.parametrize("mensaje, servicio", [
+    ("necesito custodia y vigilancia", "Custodia"),
+    ("servicio de paletizado y emplayado", "Acondicionamiento"),
+    ("pedimento de importación", "Aduanales"),
+])
+def test_servicio_especifico_se_responde_localmente(modulo, mensaje, servicio):
+    assert servicio in modulo.procesar_confiable(mensaje, "u")
+
+
+def test_acentos_no_cambian_la_decision(modulo):
+    con_acento = modulo.procesar_confiable("necesito custodia para mi almacén", "u")
+    sin_acento = modulo.procesar_confiable("necesito custodia para mi almacen", "u")
+    assert con_acento is not None
+    assert con_acento == sin_acento
+
+
+def test_cotizacion_va_al_llm(modulo):
+    assert modulo.procesar_confiable("¿Cuánto cuesta la custodia?", "u") is None
+
+
+def test_solo_palabras_genericas_no_tienen_ganador(indice):
+    clasificacion = indice.clasificar("tienen bodega")
+    assert clasificacion.servicio is None
+    assert clasificacion.ranking[0][0] == "almacenamiento"
+
+
+def test_empate_no_tiene_ganador(indice):
+    clasificacion = indice.clasificar("custodia de mercancía importada con pedimento")
+    assert clasificacion.servicio is None
+    assert clasificacion.ranking[0][1] == clasificacion.ranking[1][1]
+
+
+def test_sin_palabras_clave(indice):
+    assert indice.clasificar("buenas tardes").ranking == []
+
+
+def test_pertenencia_ignora_acentos(indice):
+    assert "almacen" in indice
+    assert "ALMACÉN" in indice
+    assert "zapato" not in indice
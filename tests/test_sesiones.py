@@ -0,0 +1,81 @@
+import pytest
+
+import utils.context_manager as context_manager
+from utils.context_manager import ContextManager, valor_contexto
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def time(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(context_manager, "time", reloj)
+    return reloj
+
+
+def test_sesion_inactiva_expira(reloj):
+    contexto = ContextManager(inactividad=60)
+    contexto.agregar_mensaje("u", "user", "hola")
+    reloj.ahora += 59
+    assert len(contexto.obtener_historial("u")) == 1
+    reloj.ahora += 1
+    assert contexto.obtener_historial("u") == []
+    estado = contexto.estadisticas()
+    assert (estado["sesiones_activas"], estado["sesiones_expiradas"]) == (0, 1)
+    assert estado["historial"]["bytes"] == 0
+
+
+def test_actividad_renueva_el_vencimiento(reloj):
+    contexto = ContextManager(inactividad=60)
+    contexto.agregar_mensaje("u", "user", "hola")
+    reloj.ahora += 50
+    contexto.guardar_contexto("u", "nombre_usuario", "Ana")
+    reloj.ahora += 50
+    # La entrada vieja del heap ya venció, pero la conversación tuvo actividad después
+    assert valor_contexto(contexto.obtener_contexto("u"), "nombre_usuario") == "Ana"
+    assert contexto.estadisticas()["sesiones_expiradas"] == 0
+
+
+def test_solo_expiran_las_inactivas(reloj):
+    contexto = ContextManager(inactividad=60)
+    contexto.agregar_mensaje("vieja", "user", "hola")
+    reloj.ahora += 30
+    contexto.agregar_mensaje("nueva", "user", "hola")
+    reloj.ahora += 30
+    assert contexto.obtener_historial("vieja") == []
+    assert len(contexto.obtener_historial("nueva")) == 1
+
+
+def test_heap_se_compacta_con_entradas_obsoletas(reloj):
+    contexto = ContextManager(inactividad=3600)
+    for i in range(500):
+        reloj.ahora += 0.01
+        contexto.guardar_contexto("u", "paso", i)
+    estado = contexto.estadisticas()
+    assert estado["entradas_heap"] <= 2 * estado["sesiones_activas"] + 64
+    assert estado["compactaciones"] > 0
+
+
+def test_sesion_expirada_empieza_de_cero(reloj):
+    contexto = ContextManager(inactividad=60)
+    contexto.guardar_contexto("u", "esperando_ubicacion", "true")
+    reloj.ahora += 61
+    contexto.agregar_mensaje("u", "user", "hola")
+    assert valor_contexto(contexto.obtener_contexto("u"), "esperando_ubicacion") is None
+    assert contexto.estadisticas()["sesiones_creadas"] == 2
+
+
+@pytest.mark.parametrize("contexto, esperado", [
+    ({"clave": {"valor": "x", "timestamp": "t"}}, "x"),
+    ({"clave": "crudo"}, "crudo"),
+    ({}, "defecto"),
+    (None, "defecto"),
+])
+def test_valor_contexto(contexto, esperado):
+    assert valor_contexto(contexto, "clave", "defecto") == esperado
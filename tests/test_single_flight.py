@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from utils.single_flight import VueloUnico
+
+
+def test_hilos_concurrentes_comparten_una_ejecucion():
+    vuelo = VueloUnico()
+    liberar = threading.Event()
+    llamadas = []
+
+    def funcion():
+        llamadas.append(1)
+        liberar.wait(2)
+        return "UBICACIONES: GENERAL|"
+
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(vuelo.ejecutar("k", funcion))) for _ in range(5)]
+    for hilo in hilos:
+        hilo.start()
+    limite = time.monotonic() + 2
+    while vuelo.estadisticas()["agrupadas"] < 4 and time.monotonic() < limite:
+        time.sleep(0.001)
+    liberar.set()
+    for hilo in hilos:
+        hilo.join()
+
+    assert llamadas == [1]
+    assert resultados == ["UBICACIONES: GENERAL|"] * 5
+    assert vuelo.estadisticas()["en_vuelo"] == 0
+
+
+def test_error_se_comparte_y_no_queda_en_vuelo():
+    vuelo = VueloUnico()
+    with pytest.raises(ValueError):
+        vuelo.ejecutar("k", lambda: (_ for _ in ()).throw(ValueError("falló")))
+    # La siguiente llamada vuelve a ejecutar
+    assert vuelo.ejecutar("k", lambda: 1) == 1
+    assert vuelo.estadisticas()["ejecuciones"] == 2
+
+
+def test_claves_distintas_no_se_agrupan():
+    vuelo = VueloUnico()
+    assert vuelo.ejecutar("a", lambda: 1) == 1
+    assert vuelo.ejecutar("b", lambda: 2) == 2
+    assert vuelo.estadisticas()["agrupadas"] == 0
+
+
+def test_async_agrupa():
+    async def escenario():
+        vuelo = VueloUnico()
+        llamadas = []
+
+        async def funcion():
+            llamadas.append(1)
+            await asyncio.sleep(0.01)
+            return "ok"
+
+        resultados = await asyncio.gather(*(vuelo.ejecutar_async("k", funcion) for _ in range(4)))
+        return resultados, llamadas, vuelo.estadisticas()
+
+    resultados, llamadas, estado = asyncio.run(escenario())
+    assert resultados == ["ok"] * 4
+    assert llamadas == [1]
+    assert (estado["agrupadas"], estado["en_vuelo"]) == (3, 0)
+
+
+def test_cancelar_al_lider_no_cancela_a_los_agrupados():
+    async def escenario():
+        vuelo = VueloUnico()
+        liberar = asyncio.Event()
+
+        async def funcion():
+            await liberar.wait()
+            return "ok"
+
+        lider = asyncio.ensure_future(vuelo.ejecutar_async("k", funcion))
+        await asyncio.sleep(0)
+        seguidor = asyncio.ensure_future(vuelo.ejecutar_async("k", funcion))
+        await asyncio.sleep(0)
+        lider.cancel()
+        await asyncio.sleep(0)
+        liberar.set()
+        return lider, await seguidor
+
+    lider, resultado = asyncio.run(escenario())
+    assert lider.cancelled()
+    assert resultado == "ok"
+
+
+def test_error_async_llega_a_todos():
+    async def escenario():
+        vuelo = VueloUnico()
+
+        async def funcion():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("proveedor caído")
+
+        return await asyncio.gather(*(vuelo.ejecutar_async("k", funcion) for _ in range(3)), return_exceptions=True)
+
+    errores = asyncio.run(escenario())
+    assert all(isinstance(error, RuntimeError) for error in errores)
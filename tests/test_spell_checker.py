@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+
+import utils.spell_checker as spell_checker
+from utils.mensaje_normalizado import MensajeNormalizado
+from utils.spell_checker import CorrectorOrtografico
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def monotonic(self):
+        return self.ahora
+
+    def perf_counter(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(spell_checker, "time", reloj)
+    return reloj
+
+
+@pytest.fixture
+def diccionario(monkeypatch):
+    """Sustituye la carga del índice: cuenta las cargas y puede fallar"""
+    estado = {"cargas": 0, "falla": False}
+
+    def cargar(ruta):
+        estado["cargas"] += 1
+        if estado["falla"]:
+            raise OSError("sin red")
+        return lambda palabra: {"almcen": "almacén", "bodga": "bodega"}.get(palabra, palabra)
+
+    monkeypatch.setattr(spell_checker, "cargar_indice", cargar)
+    return estado
+
+
+def test_fallo_de_carga_se_recuerda_hasta_el_reintento(reloj, diccionario):
+    diccionario["falla"] = True
+    corrector = CorrectorOrtografico(reintento=300)
+    assert corrector.corregir("almcen") == "almcen"
+    assert corrector.corregir("almcen") == "almcen"
+    assert diccionario["cargas"] == 1
+    assert corrector.estadisticas()["reintento_en_s"] == 300
+
+    diccionario["falla"] = False
+    reloj.ahora = 300
+    assert corrector.corregir("almcen") == "almacén"
+    estado = corrector.estadisticas()
+    assert (diccionario["cargas"], estado["fallos_carga"], estado["cargado"]) == (2, 1, True)
+
+
+def test_carga_una_sola_vez_con_hilos(diccionario):
+    corrector = CorrectorOrtografico()
+    hilos = [threading.Thread(target=corrector.precargar) for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert diccionario["cargas"] == 1
+
+
+def test_memoriza_cada_palabra(diccionario):
+    corrector = CorrectorOrtografico()
+    corrector.corregir("bodga bodga almcen")
+    memoria = corrector.estadisticas()["memoria"]
+    assert (memoria["entradas"], memoria["aciertos"]) == (2, 1)
+
+
+def test_preservar_y_es_valida(diccionario):
+    corrector = CorrectorOrtografico()
+    resultado = corrector.corregir(
+        "almcen bodga", preservar=lambda palabra: palabra == "almcen", es_valida=lambda original, correccion: False
+    )
+    assert resultado == "almcen bodga"
+    assert corrector.estadisticas()["preservadas"] == 1
+
+
+def test_acepta_mensaje_normalizado(diccionario):
+    corrector = CorrectorOrtografico()
+    assert corrector.corregir(MensajeNormalizado("  la bodga ")) == "la bodega"
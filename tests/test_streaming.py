@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from utils.formatters import formatear_evento_sse
+
+
+def test_evento_sse_con_datos_json():
+    assert formatear_evento_sse({'delta': 'Almacén ✅'}) == 'data: {"delta": "Almacén ✅"}\n\n'
+
+
+def test_evento_sse_con_nombre():
+    evento = formatear_evento_sse({}, evento='fin')
+    assert evento == 'event: fin\ndata: {}\n\n'
+
+
+def test_salto_de_linea_no_rompe_el_evento():
+    evento = formatear_evento_sse({'delta': 'a\nb'})
+    assert evento.count('\n') == 2
+    assert json.loads(evento[len('data: '):]) == {'delta': 'a\nb'}
+
+
+@pytest.fixture
+def proveedor(motor, monkeypatch):
+    """Sustituye la llamada en streaming al proveedor por fragmentos fijos"""
+    def fijar(*fragmentos):
+        monkeypatch.setattr(motor, "_llamar_proveedor_stream", lambda mensaje_corregido: iter(fragmentos))
+        motor.cache_clasificaciones.invalidar()
+    return fijar
+
+
+def test_texto_libre_se_transmite_por_fragmentos(motor, proveedor):
+    proveedor("Le comento", " que un certificado", " de depósito...")
+    fragmentos = list(motor.procesar_mensaje_stream("explícame qué es un certificado de depósito", "stream-1"))
+    assert fragmentos == ["Le comento", " que un certificado", " de depósito..."]
+    historial = motor.context_manager.obtener_historial("stream-1")
+    assert historial[-1]["mensaje"] == "Le comento que un certificado de depósito..."
+
+
+def test_etiqueta_partida_no_se_muestra(motor, proveedor):
+    proveedor("UBICA", "CIONES: ", "GENERAL|")
+    fragmentos = list(motor.procesar_mensaje_stream("qué opinas del clima", "stream-2"))
+    assert len(fragmentos) == 1
+    assert "UBICACIONES:" not in fragmentos[0]
+
+
+def test_error_a_mitad_conserva_lo_transmitido(motor, monkeypatch):
+    def fallar(mensaje_corregido):
+        yield "Le comento que"
+        raise RuntimeError("conexión cortada")
+
+    monkeypatch.setattr(motor, "_llamar_proveedor_stream", fallar)
+    motor.cache_clasificaciones.invalidar()
+    fragmentos = list(motor.procesar_mensaje_stream("cuál es la capital de Francia", "stream-3"))
+    assert fragmentos == ["Le comento que"]
+    assert motor.context_manager.obtener_historial("stream-3")[-1]["mensaje"] == "Le comento que"
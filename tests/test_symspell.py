@@ -0,0 +1,76 @@
+import pytest
+
+from construir_indice_ortografico import sumar_dominio
+from utils.spell_checker import CorrectorOrtografico
+from utils.symspell import IndiceSymSpell, borrados, distancia_edicion
+
+FRECUENCIAS = {"y": 9000, "de": 8000, "que": 7000, "casa": 500, "cosa": 400, "almacén": 5, "ley": 3}
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceSymSpell.construir(FRECUENCIAS)
+
+
+def test_borrados():
+    assert borrados("ab", 1) == {"ab", "a", "b"}
+    assert "c" in borrados("abc", 2)
+
+
+@pytest.mark.parametrize("a, b, esperada", [
+    ("casa", "casa", 0),
+    ("casa", "cosa", 1),
+    ("casa", "acsa", 1),      # transposición
+    ("", "abc", 3),
+])
+def test_distancia_edicion(a, b, esperada):
+    assert distancia_edicion(a, b) == esperada
+
+
+def test_distancia_edicion_corta_en_maximo():
+    assert distancia_edicion("almacenes", "xyz", maximo=2) == 3
+
+
+def test_sugerir(indice):
+    assert indice.sugerir("casa") == "casa"
+    assert indice.sugerir("almcen") == "almacén"
+    assert indice.sugerir("zzzzzz") is None
+
+
+def test_empate_gana_la_mas_frecuente(indice):
+    # "cesa" está a distancia 1 de "casa" y de "cosa"
+    assert indice.sugerir("cesa") == "casa"
+
+
+def test_conserva_mayusculas_y_puntuacion(indice):
+    assert indice("¿Almcen?") == "¿Almacén?"
+    assert indice("CASSA") == "CASA"
+
+
+def test_guardar_y_cargar(indice, tmp_path):
+    ruta = str(tmp_path / "indice.npz")
+    indice.guardar(ruta)
+    cargado = IndiceSymSpell.cargar(ruta)
+    assert cargado.palabras == indice.palabras
+    assert cargado.sugerir("almcen") == "almacén"
+
+
+def test_dominio_se_suma_sin_superar_palabras_comunes():
+    frecuencias = dict(FRECUENCIAS)
+    bono = sumar_dominio(frecuencias, {"almacén", "ley", "paletizado"})
+    assert bono == 500
+    assert frecuencias["almacén"] == 505
+    assert frecuencias["paletizado"] == 500
+    assert frecuencias["ley"] < frecuencias["y"]
+
+
+def test_corrector_no_toca_palabras_cortas(tmp_path):
+    ruta = str(tmp_path / "indice.npz")
+    frecuencias = {palabra: n for palabra, n in FRECUENCIAS.items() if palabra != "y"}
+    IndiceSymSpell.construir(frecuencias).guardar(ruta)
+    corrector = CorrectorOrtografico(ruta_indice=ruta)
+    assert corrector.corregir_palabra("y") == "ley"
+
+    # Sin preservar: la longitud mínima basta para que "y" no se convierta en "ley"
+    assert corrector.corregir("casa y almcen") == "casa y almacén"
+    assert corrector.estadisticas()["preservadas"] == 1
@@ -0,0 +1,72 @@
+import pytest
+
+from utils.indice_ubicaciones import buscar_ubicacion_confiable, buscar_ubicaciones, obtener_indice_ubicaciones
+from utils.trigramas import IndiceTrigramas, plegar, tolerancia_palabra, trigramas
+
+
+def test_plegar():
+    assert plegar("¿Dónde está PEÑUELA?") == "donde esta penuela"
+
+
+def test_trigramas_con_relleno():
+    assert trigramas("ulua") == {"  u", " ul", "ulu", "lua", "ua "}
+
+
+@pytest.mark.parametrize("palabra, tolerancia", [("ulua", 0), ("puebla", 1), ("monterrey", 2)])
+def test_tolerancia_por_longitud(palabra, tolerancia):
+    assert tolerancia_palabra(palabra) == tolerancia
+
+
+def test_entradas_repetidas_gana_la_primera():
+    indice = IndiceTrigramas([("Ulúa", 1), ("ulua", 2), ("almacén Ulúa", 3)], palabras_vacias=["almacén"])
+    assert len(indice) == 1
+    assert indice.buscar("ulua")[0].valor == 1
+
+
+def test_entrada_corta_dentro_de_frase_larga():
+    indice = IndiceTrigramas([("Ulúa", "ULÚA"), ("Mérida", "MÉRIDA")])
+    assert indice.buscar("oiga, ¿dónde queda el de ulua por favor?")[0].valor == "ULÚA"
+
+
+def test_coincide_palabra_todas_o_alguna():
+    indice = IndiceTrigramas([])
+    assert indice.coincide_palabra("voy a tabla onda", "Tabla Honda")
+    assert indice.coincide_palabra("voy a tabla onda", "Tabla Honda", todas=True)
+    assert indice.coincide_palabra("en la tabla", "Tabla Honda")
+    assert not indice.coincide_palabra("en la tabla", "Tabla Honda", todas=True)
+    # Palabras cortas exigen coincidencia exacta
+    assert not indice.coincide_palabra("la ulia", "Ulúa")
+
+
+@pytest.mark.parametrize("consulta, clave", [
+    ("Monterey", "MONTERREY"),
+    ("QUERETARO", "QUERÉTARO"),
+    ("dónde queda pantaco", "PANTACO"),
+    ("peñuela", "PEÑUELA"),
+])
+def test_ubicacion_con_errores_y_acentos(consulta, clave):
+    assert buscar_ubicacion_confiable(consulta).valor == (clave,)
+
+
+def test_a_igual_puntaje_va_primero_lo_especifico():
+    candidatos = buscar_ubicaciones("almacen ulua en veracruz", limite=2)
+    assert candidatos[0].valor == ("ULÚA",)
+    assert len(candidatos[1].valor) > 1
+
+
+def test_parecido_debil_no_es_confiable():
+    assert buscar_ubicaciones("acasias")[0].valor == ("ACACIAS",)
+    assert buscar_ubicacion_confiable("acasias") is None
+
+
+@pytest.mark.parametrize("mensaje", [
+    "¿dónde puedo hablar con un asesor?",
+    "hola quiero información",
+])
+def test_frases_sin_ubicacion(mensaje):
+    assert buscar_ubicaciones(mensaje) == []
+    assert buscar_ubicacion_confiable(mensaje) is None
+
+
+def test_indice_compartido():
+    assert obtener_indice_ubicaciones() is obtener_indice_ubicaciones()
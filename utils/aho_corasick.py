@@ -0,0 +1,61 @@
+from collections import deque
+
+
+class AutomataAhoCorasick:
+    """
+    Autómata de Aho-Corasick: encuentra todas las apariciones de un conjunto de palabras (incluidas las
+    que se traslapan, como 'zapato' dentro de 'zapato deportivo') en una sola pasada sobre el texto.
+    Equivale a evaluar `palabra in texto` para cada palabra, pero sin recorrer el texto una vez por palabra.
+    """
+
+    def __init__(self, palabras):
+        # Trie: transiciones por estado, enlace de falla y salidas (palabra, categoría) de cada estado
+        self._transiciones = [{}]
+        self._fallas = [0]
+        self._salidas = [[]]
+        for palabra, categoria in palabras:
+            self._agregar(palabra, categoria)
+        self._enlazar_fallas()
+
+    def _agregar(self, palabra, categoria):
+        estado = 0
+        for caracter in palabra:
+            siguiente = self._transiciones[estado].get(caracter)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones[estado][caracter] = siguiente
+                self._transiciones.append({})
+                self._fallas.append(0)
+                self._salidas.append([])
+            estado = siguiente
+        if (palabra, categoria) not in self._salidas[estado]:
+            self._salidas[estado].append((palabra, categoria))
+
+    def _enlazar_fallas(self):
+        """Recorrido por niveles: el enlace de falla apunta al sufijo propio más largo que también está en el trie"""
+        pendientes = deque(self._transiciones[0].values())
+        while pendientes:
+            estado = pendientes.popleft()
+            for caracter, siguiente in self._transiciones[estado].items():
+                falla = self._fallas[estado]
+                while falla and caracter not in self._transiciones[falla]:
+                    falla = self._fallas[falla]
+                destino = self._transiciones[falla].get(caracter, 0)
+                self._fallas[siguiente] = destino if destino != siguiente else 0
+                # Las palabras que terminan en el sufijo también terminan aquí
+                self._salidas[siguiente] = self._salidas[siguiente] + self._salidas[self._fallas[siguiente]]
+                pendientes.append(siguiente)
+
+    def __len__(self):
+        return len(self._transiciones)
+
+    def buscar(self, texto):
+        """Genera (posición final, palabra, categoría) por cada aparición en el texto"""
+        transiciones, fallas, salidas = self._transiciones, self._fallas, self._salidas
+        estado = 0
+        for posicion, caracter in enumerate(texto):
+            while estado and caracter not in transiciones[estado]:
+                estado = fallas[estado]
+            estado = transiciones[estado].get(caracter, 0)
+            for palabra, categoria in salidas[estado]:
+                yield posicion, palabra, categoria
@@ -0,0 +1,89 @@
+import os
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+
+class CacheTTL:
+    """Caché LRU thread-safe con expiración por TTL y contadores de aciertos/fallos"""
+
+    def __init__(self, max_entradas=1000, ttl=3600, bypass=False):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.bypass = bypass
+        self._datos = OrderedDict()   # clave -> (expira_en, valor)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expirados = 0
+        self.desalojados = 0
+
+    def obtener(self, clave):
+        """Retorna el valor guardado o None si no existe, expiró o la caché está en bypass"""
+        if self.bypass:
+            return None
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            expira_en, valor = entrada
+            if time.monotonic() >= expira_en:
+                del self._datos[clave]
+                self.expirados += 1
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, valor):
+        if self.bypass:
+            return
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.desalojados += 1
+
+    def invalidar(self, clave=None):
+        """Elimina una entrada, o toda la caché si no se indica clave"""
+        with self._lock:
+            if clave is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(clave, None)
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._datos),
+                "max_entradas": self.max_entradas,
+                "ttl": self.ttl,
+                "bypass": self.bypass,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 3) if consultas else 0.0,
+                "expirados": self.expirados,
+                "desalojados": self.desalojados
+            }
+
+
+def clave_normalizada(texto):
+    """Normaliza un mensaje para usarlo como clave: minúsculas, sin acentos, sin signos y espacios simples"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return ' '.join(texto.split())
+
+
+def crear_cache_clasificaciones():
+    """Caché de etiquetas de clasificación configurada desde variables de entorno"""
+    return CacheTTL(
+        max_entradas=int(os.environ.get("LLM_CACHE_MAX_ENTRADAS", 2000)),
+        ttl=float(os.environ.get("LLM_CACHE_TTL", 6 * 3600)),
+        bypass=os.environ.get("LLM_CACHE_DESHABILITADA", "").lower() in ("1", "true", "si", "sí")
+    )
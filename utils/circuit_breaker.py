@@ -0,0 +1,145 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+class CircuitoAbiertoError(Exception):
+    """Se lanza cuando el circuito está abierto y la llamada no debe llegar al proveedor"""
+    pass
+
+class CircuitBreaker:
+    """
+    Circuit breaker cerrado / abierto / semiabierto según la tasa de error reciente.
+    Mientras está abierto las llamadas fallan al instante; al vencer el tiempo de apertura
+    deja pasar unas pocas sondas y se cierra si responden bien.
+    """
+
+    def __init__(self, nombre="", es_fallo=None, ventana=20, min_solicitudes=10, umbral_error=0.5,
+                 max_fallos_consecutivos=5, tiempo_apertura=30, max_sondas=1, exitos_para_cerrar=2):
+        self.nombre = nombre
+        self.es_fallo = es_fallo or (lambda error: True)
+        self.min_solicitudes = min_solicitudes
+        self.umbral_error = umbral_error
+        self.max_fallos_consecutivos = max_fallos_consecutivos
+        self.tiempo_apertura = tiempo_apertura
+        self.max_sondas = max_sondas
+        self.exitos_para_cerrar = exitos_para_cerrar
+        self.estado = CERRADO
+        self._resultados = deque(maxlen=ventana)   # True = éxito, False = fallo
+        self._fallos_consecutivos = 0
+        self._abierto_hasta = 0.0
+        self._sondas_en_curso = 0
+        self._exitos_sonda = 0
+        self._lock = threading.Lock()
+        self.aperturas = 0
+        self.rechazadas = 0
+
+    def _abrir(self, motivo):
+        self.estado = ABIERTO
+        self._abierto_hasta = time.monotonic() + self.tiempo_apertura
+        self._sondas_en_curso = 0
+        self.aperturas += 1
+        logger.warning(f"🔴 Circuito {self.nombre} ABIERTO por {self.tiempo_apertura}s: {motivo}")
+
+    def _cerrar(self):
+        self.estado = CERRADO
+        self._resultados.clear()
+        self._fallos_consecutivos = 0
+        logger.info(f"🟢 Circuito {self.nombre} CERRADO: el proveedor se recuperó")
+
+    def _permitir(self):
+        """Retorna True si la llamada es una sonda de recuperación; lanza CircuitoAbiertoError si no debe pasar"""
+        with self._lock:
+            if self.estado == ABIERTO and time.monotonic() >= self._abierto_hasta:
+                self.estado = SEMIABIERTO
+                self._exitos_sonda = 0
+                logger.info(f"🟡 Circuito {self.nombre} SEMIABIERTO: probando recuperación")
+
+            if self.estado == CERRADO:
+                return False
+            if self.estado == SEMIABIERTO and self._sondas_en_curso < self.max_sondas:
+                self._sondas_en_curso += 1
+                return True
+
+            self.rechazadas += 1
+            raise CircuitoAbiertoError(f"Circuito {self.nombre} abierto")
+
+    def _registrar(self, sonda, resultado):
+        """resultado: True = éxito, False = fallo, None = no cuenta (p. ej. rechazo local o cancelación)"""
+        with self._lock:
+            if sonda:
+                self._sondas_en_curso -= 1
+                if self.estado != SEMIABIERTO or resultado is None:
+                    return
+                if resultado:
+                    self._exitos_sonda += 1
+                    if self._exitos_sonda >= self.exitos_para_cerrar:
+                        self._cerrar()
+                else:
+                    self._abrir("falló la sonda de recuperación")
+                return
+
+            if resultado is None or self.estado != CERRADO:
+                return
+            self._resultados.append(resultado)
+            self._fallos_consecutivos = 0 if resultado else self._fallos_consecutivos + 1
+
+            if self._fallos_consecutivos >= self.max_fallos_consecutivos:
+                self._abrir(f"{self._fallos_consecutivos} fallos consecutivos")
+            elif len(self._resultados) >= self.min_solicitudes:
+                tasa = self._resultados.count(False) / len(self._resultados)
+                if tasa >= self.umbral_error:
+                    self._abrir(f"tasa de error {tasa:.0%} en las últimas {len(self._resultados)} llamadas")
+
+    @contextmanager
+    def llamada(self):
+        """Envuelve una llamada al proveedor: `with circuito.llamada(): ...`"""
+        sonda = self._permitir()
+        resultado = None
+        try:
+            yield
+            resultado = True
+        except Exception as e:
+            resultado = False if self.es_fallo(e) else None
+            raise
+        finally:
+            self._registrar(sonda, resultado)
+
+    def permite_llamadas(self):
+        """Consulta sin efectos: False si el circuito está abierto y aún no toca sondear"""
+        with self._lock:
+            return self.estado != ABIERTO or time.monotonic() >= self._abierto_hasta
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "estado": self.estado,
+                "tasa_error": round(self._resultados.count(False) / len(self._resultados), 3) if self._resultados else 0.0,
+                "muestras": len(self._resultados),
+                "fallos_consecutivos": self._fallos_consecutivos,
+                "segundos_para_sonda": round(max(0.0, self._abierto_hasta - time.monotonic()), 1) if self.estado == ABIERTO else 0.0,
+                "aperturas": self.aperturas,
+                "rechazadas": self.rechazadas
+            }
+
+
+def crear_circuito_proveedor(es_fallo):
+    """Circuit breaker del proveedor de LLM configurado desde variables de entorno"""
+    return CircuitBreaker(
+        nombre="llm",
+        es_fallo=es_fallo,
+        ventana=int(os.environ.get("LLM_CIRCUITO_VENTANA", 20)),
+        min_solicitudes=int(os.environ.get("LLM_CIRCUITO_MIN_SOLICITUDES", 10)),
+        umbral_error=float(os.environ.get("LLM_CIRCUITO_UMBRAL_ERROR", 0.5)),
+        max_fallos_consecutivos=int(os.environ.get("LLM_CIRCUITO_FALLOS_CONSECUTIVOS", 5)),
+        tiempo_apertura=float(os.environ.get("LLM_CIRCUITO_APERTURA", 30)),
+        max_sondas=int(os.environ.get("LLM_CIRCUITO_SONDAS", 1))
+    )
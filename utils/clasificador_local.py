@@ -0,0 +1,297 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+import numpy as np
+
+from utils.cache import clave_normalizada
+
+logger = logging.getLogger(__name__)
+
+FORMATO_MODELO = 2
+RUTA_MODELO = os.environ.get("CLASIFICADOR_MODELO", os.path.join("data", "modelos", "clasificador_intencion.npz"))
+RUTA_REGISTRO_ETIQUETAS = os.environ.get("LLM_REGISTRO_ETIQUETAS", os.path.join("data", "etiquetas_llm.jsonl"))
+# Fracción mínima de los n-gramas del mensaje que el modelo conoce; con menos, se consulta al LLM
+COBERTURA_MINIMA = float(os.environ.get("CLASIFICADOR_COBERTURA_MIN", "0.6"))
+
+# Mensajes que el LLM contestó con texto libre: el modelo aprende a reconocerlos pero nunca los responde
+ETIQUETA_OTRO = "OTRO"
+
+
+def etiqueta_canonica(respuesta):
+    """Reduce una respuesta del LLM a su etiqueta sin valor libre: 'UBICACIONES: ESPECIFICA|Veracruz' -> 'UBICACIONES: ESPECIFICA|'"""
+    if respuesta == ETIQUETA_OTRO:
+        return ETIQUETA_OTRO
+    cabecera = respuesta.split("|")[0]
+    if ":" not in cabecera:
+        return None
+    tipo, subtipo = cabecera.split(":", 1)
+    return f"{tipo.strip().upper()}: {subtipo.strip().upper()}|"
+
+
+def tiene_valor(respuesta):
+    """'SERVICIOS: ESPECIFICO|Depósito fiscal' lleva un valor que el clasificador local no sabe predecir"""
+    return "|" in respuesta and bool(respuesta.split("|", 1)[1].strip())
+
+
+class RegistroEtiquetas:
+    """Guarda en JSONL las etiquetas que produjo el LLM para entrenar el clasificador local"""
+
+    def __init__(self, ruta=RUTA_REGISTRO_ETIQUETAS):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+
+    def registrar(self, mensaje, etiqueta):
+        if not self.ruta:
+            return
+        linea = json.dumps({
+            "mensaje": mensaje,
+            "etiqueta": etiqueta,
+            "timestamp": datetime.now().isoformat()
+        }, ensure_ascii=False)
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+                with open(self.ruta, "a", encoding="utf-8") as archivo:
+                    archivo.write(linea + "\n")
+        except OSError as e:
+            logger.warning(f"No se pudo registrar la etiqueta del LLM: {e}")
+
+    def _registros(self):
+        """Pares (mensaje, etiqueta tal como la dio el LLM) de las líneas válidas"""
+        with open(self.ruta, encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if registro.get("mensaje") and registro.get("etiqueta"):
+                    yield registro["mensaje"], registro["etiqueta"]
+
+    def leer(self):
+        """Retorna pares (mensaje, etiqueta canónica) sin duplicados"""
+        ejemplos = {}
+        for mensaje, respuesta in self._registros():
+            etiqueta = etiqueta_canonica(respuesta)
+            if etiqueta:
+                # Si el mismo mensaje tuvo varias etiquetas, gana la más reciente
+                ejemplos[clave_normalizada(mensaje)] = (mensaje, etiqueta)
+        return list(ejemplos.values())
+
+    def etiquetas_con_valor(self):
+        """Etiquetas canónicas que el LLM ha dado con un valor libre (ciudad, servicio, referencia...)"""
+        return sorted({etiqueta_canonica(respuesta) for _, respuesta in self._registros() if tiene_valor(respuesta)} - {None})
+
+
+def _ngramas(texto):
+    """Características del texto: n-gramas de caracteres (3 a 5) por palabra y palabras completas"""
+    caracteristicas = []
+    for palabra in clave_normalizada(texto).split():
+        caracteristicas.append(f"w:{palabra}")
+        marcada = f" {palabra} "
+        for n in (3, 4, 5):
+            for i in range(max(1, len(marcada) - n + 1)):
+                caracteristicas.append(marcada[i:i + n])
+    return caracteristicas
+
+
+class ClasificadorIntencion:
+    """Clasificador TF-IDF de n-gramas de caracteres con regresión logística multinomial en NumPy"""
+
+    def __init__(self, vocabulario, idf, pesos, sesgo, clases, umbral=0.85, version=None, metricas=None,
+                 con_valor=(), cobertura_minima=COBERTURA_MINIMA):
+        self.vocabulario = {ngrama: i for i, ngrama in enumerate(vocabulario)}
+        self.idf = idf.astype(np.float32)
+        self.pesos = pesos.astype(np.float32)
+        self.sesgo = sesgo.astype(np.float32)
+        self.clases = list(clases)
+        self.umbral = float(umbral)
+        self.version = version
+        self.metricas = metricas or {}
+        # Clases que no se responden localmente: texto libre del LLM y etiquetas que llevan un valor
+        self.con_valor = set(con_valor)
+        self.no_locales = self.con_valor | {ETIQUETA_OTRO}
+        self.cobertura_minima = cobertura_minima
+        self._lock = threading.Lock()
+        self.predicciones = 0
+        self.aceptadas = 0
+        self.sin_cobertura = 0
+        self.tiempo_total = 0.0
+
+    def _vector(self, texto):
+        """Vector TF-IDF disperso (índices, valores) normalizado L2 y fracción de n-gramas conocidos"""
+        ngramas = _ngramas(texto)
+        conteos = Counter(i for i in (self.vocabulario.get(ng) for ng in ngramas) if i is not None)
+        if not conteos:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32), 0.0
+        indices = np.fromiter(conteos.keys(), dtype=np.int64, count=len(conteos))
+        tf = np.fromiter(conteos.values(), dtype=np.float32, count=len(conteos))
+        valores = (1 + np.log(tf)) * self.idf[indices]
+        return indices, valores / np.linalg.norm(valores), sum(conteos.values()) / len(ngramas)
+
+    def probabilidades(self, texto):
+        indices, valores, _ = self._vector(texto)
+        return self._softmax(indices, valores)
+
+    def _softmax(self, indices, valores):
+        logits = self.sesgo + valores @ self.pesos[indices]
+        logits = np.exp(logits - logits.max())
+        return logits / logits.sum()
+
+    def predecir(self, texto):
+        """
+        Retorna (etiqueta, confianza); (None, 0.0) si el modelo casi no conoce el mensaje, porque
+        sin características las probabilidades serían solo el sesgo y ganaría la clase mayoritaria.
+        """
+        inicio = time.perf_counter()
+        indices, valores, cobertura = self._vector(texto)
+        if cobertura < self.cobertura_minima:
+            with self._lock:
+                self.predicciones += 1
+                self.sin_cobertura += 1
+                self.tiempo_total += time.perf_counter() - inicio
+            return None, 0.0
+        probabilidades = self._softmax(indices, valores)
+        mejor = int(np.argmax(probabilidades))
+        confianza = float(probabilidades[mejor])
+        with self._lock:
+            self.predicciones += 1
+            self.tiempo_total += time.perf_counter() - inicio
+        return self.clases[mejor], confianza
+
+    def clasificar(self, texto):
+        """Retorna la etiqueta si supera el umbral de confianza; None si hay que consultar al LLM"""
+        etiqueta, confianza = self.predecir(texto)
+        if etiqueta is None or confianza < self.umbral:
+            return None
+        if etiqueta in self.no_locales:
+            logger.info(f"Clasificador local: {etiqueta} ({confianza:.2f}) se deja al LLM")
+            return None
+        with self._lock:
+            self.aceptadas += 1
+        logger.info(f"Clasificador local: {etiqueta} ({confianza:.2f})")
+        return etiqueta
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "umbral": self.umbral,
+                "clases": len(self.clases),
+                "predicciones": self.predicciones,
+                "aceptadas": self.aceptadas,
+                "sin_cobertura": self.sin_cobertura,
+                "cobertura_minima": self.cobertura_minima,
+                "no_locales": sorted(self.no_locales),
+                "tasa_local": round(self.aceptadas / self.predicciones, 3) if self.predicciones else 0.0,
+                "latencia_promedio_us": round(self.tiempo_total / self.predicciones * 1e6, 1) if self.predicciones else 0.0,
+                "metricas_entrenamiento": self.metricas
+            }
+
+    @classmethod
+    def entrenar(cls, textos, etiquetas, umbral=0.85, min_df=2, max_caracteristicas=20000,
+                 epocas=30, tasa_aprendizaje=0.5, l2=1e-4, tamano_lote=128, semilla=13, con_valor=()):
+        """Entrena el modelo con descenso de gradiente por mini-lotes; `con_valor` no se responderán localmente"""
+        documentos = [Counter(_ngramas(texto)) for texto in textos]
+        frecuencia_docs = Counter()
+        for documento in documentos:
+            frecuencia_docs.update(documento.keys())
+        vocabulario = [ng for ng, df in frecuencia_docs.most_common(max_caracteristicas) if df >= min_df]
+        indice = {ng: i for i, ng in enumerate(vocabulario)}
+        n_docs = len(documentos)
+        idf = np.array(
+            [math.log((1 + n_docs) / (1 + frecuencia_docs[ng])) + 1 for ng in vocabulario],
+            dtype=np.float32
+        )
+
+        clases = sorted(set(etiquetas))
+        y = np.array([clases.index(etiqueta) for etiqueta in etiquetas], dtype=np.int64)
+
+        # Filas dispersas pre-calculadas; los lotes densos se arman bajo demanda
+        filas = []
+        for documento in documentos:
+            pares = [(indice[ng], c) for ng, c in documento.items() if ng in indice]
+            indices = np.array([i for i, _ in pares], dtype=np.int64)
+            valores = (1 + np.log(np.array([c for _, c in pares], dtype=np.float32))) * idf[indices] if pares else np.zeros(0, dtype=np.float32)
+            norma = np.linalg.norm(valores)
+            filas.append((indices, valores / norma if norma else valores))
+
+        pesos = np.zeros((len(vocabulario), len(clases)), dtype=np.float32)
+        sesgo = np.zeros(len(clases), dtype=np.float32)
+        rng = np.random.default_rng(semilla)
+
+        for epoca in range(epocas):
+            tasa = tasa_aprendizaje / (1 + 0.1 * epoca)
+            orden = rng.permutation(n_docs)
+            for inicio in range(0, n_docs, tamano_lote):
+                lote = orden[inicio:inicio + tamano_lote]
+                X = np.zeros((len(lote), len(vocabulario)), dtype=np.float32)
+                for fila, i in enumerate(lote):
+                    X[fila, filas[i][0]] = filas[i][1]
+                logits = X @ pesos + sesgo
+                logits -= logits.max(axis=1, keepdims=True)
+                P = np.exp(logits)
+                P /= P.sum(axis=1, keepdims=True)
+                P[np.arange(len(lote)), y[lote]] -= 1
+                P /= len(lote)
+                pesos -= tasa * (X.T @ P + l2 * pesos)
+                sesgo -= tasa * P.sum(axis=0)
+
+        return cls(
+            vocabulario, idf, pesos, sesgo, clases, umbral=umbral,
+            version=datetime.now().strftime("%Y%m%d%H%M%S"),
+            con_valor=[clase for clase in con_valor if clase in clases]
+        )
+
+    def guardar(self, ruta=RUTA_MODELO):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        vocabulario = sorted(self.vocabulario, key=self.vocabulario.get)
+        np.savez_compressed(
+            ruta,
+            formato=np.array(FORMATO_MODELO),
+            version=np.array(self.version or ""),
+            vocabulario=np.array(vocabulario),
+            idf=self.idf,
+            pesos=self.pesos,
+            sesgo=self.sesgo,
+            clases=np.array(self.clases),
+            con_valor=np.array(sorted(self.con_valor), dtype=str),
+            umbral=np.array(self.umbral),
+            metricas=np.array(json.dumps(self.metricas, ensure_ascii=False))
+        )
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_MODELO):
+        with np.load(ruta, allow_pickle=False) as datos:
+            formato = int(datos["formato"])
+            if formato != FORMATO_MODELO:
+                raise ValueError(f"Formato de modelo {formato} no soportado (se esperaba {FORMATO_MODELO}); vuelve a entrenarlo")
+            return cls(
+                [str(ng) for ng in datos["vocabulario"]],
+                datos["idf"], datos["pesos"], datos["sesgo"],
+                [str(c) for c in datos["clases"]],
+                umbral=float(os.environ.get("CLASIFICADOR_UMBRAL", datos["umbral"])),
+                version=str(datos["version"]),
+                metricas=json.loads(str(datos["metricas"])),
+                con_valor=[str(c) for c in datos["con_valor"]]
+            )
+
+
+def cargar_clasificador(ruta=RUTA_MODELO):
+    """Carga el modelo si existe; el chatbot funciona sin él (todo va al LLM)"""
+    if os.environ.get("CLASIFICADOR_DESHABILITADO", "").lower() in ("1", "true", "si", "sí"):
+        return None
+    if not os.path.exists(ruta):
+        logger.info(f"Sin clasificador local ({ruta} no existe); todas las consultas irán al LLM")
+        return None
+    try:
+        clasificador = ClasificadorIntencion.cargar(ruta)
+        logger.info(f"✅ Clasificador local v{clasificador.version} cargado ({len(clasificador.clases)} clases, umbral {clasificador.umbral})")
+        return clasificador
+    except Exception as e:
+        logger.error(f"❌ Error cargando el clasificador local: {e}")
+        return None
@@ -1,67 +1,164 @@
+import os
 import json
 import time
+import heapq
 import logging
+import threading
+from collections import deque
 from datetime import datetime, timedelta
 
+from utils.historial import HistorialCircular, Turno, tamano_turno, turno_como_dict
+
+# Segundos sin actividad tras los cuales se descarta una conversación
+SESION_INACTIVA_SEGUNDOS = float(os.environ.get("SESION_INACTIVA_SEGUNDOS", 24 * 3600))
+# Turnos que conserva cada conversación y bytes de texto de historial entre todas las conversaciones
+HISTORIAL_MAX_TURNOS = int(os.environ.get("HISTORIAL_MAX_TURNOS", "50"))
+HISTORIAL_MAX_BYTES = int(os.environ.get("HISTORIAL_MAX_BYTES", 64 * 1024 * 1024))
+
+
 class ContextManager:
-    def __init__(self):
-        self.conversaciones = {}  # user_id -> {contexto, historial, timestamp}
+    """
+    Conversaciones por usuario. Las inactivas se descartan con un min-heap (ultima_actividad, user_id):
+    cada mensaje cuesta O(log n) en lugar de recorrer todas las conversaciones. Las entradas del heap
+    no se actualizan al haber actividad; se agrega una nueva y la vieja se ignora al salir del heap.
+    El historial de cada conversación es circular (max_turnos) y todos comparten un presupuesto de
+    bytes: al excederlo se desalojan los turnos más antiguos, sean de la conversación que sean.
+    """
+
+    def __init__(self, inactividad=SESION_INACTIVA_SEGUNDOS, max_turnos=HISTORIAL_MAX_TURNOS, max_bytes=HISTORIAL_MAX_BYTES):
+        # Se valida al arrancar y no con el primer mensaje de cada conversación
+        if max_turnos < 1:
+            raise ValueError(f"HISTORIAL_MAX_TURNOS debe ser al menos 1 (se recibió {max_turnos})")
+        self.conversaciones = {}  # user_id -> {contexto, historial, timestamp, ultima_actividad}
+        self.inactividad = inactividad
+        self.max_turnos = max_turnos
+        self.max_bytes = max_bytes
+        self._vencimientos = []   # heap de (ultima_actividad, user_id)
+        self._llegadas = deque()  # (secuencia, user_id) de cada turno, del más antiguo al más reciente
+        self._secuencia = 0
+        self._lock = threading.RLock()
+        self.bytes_historial = 0
+        self.turnos_historial = 0
+        self.sesiones_creadas = 0
+        self.sesiones_expiradas = 0
+        self.compactaciones = 0
+        self.turnos_descartados = 0
+        self.turnos_desalojados = 0
         
     def obtener_contexto(self, user_id):
         """Obtiene el contexto de un usuario"""
-        if user_id not in self.conversaciones:
-            return {}
-        return self.conversaciones[user_id].get('contexto', {})
+        with self._lock:
+            self._expirar_sesiones(time.time())
+            if user_id not in self.conversaciones:
+                return {}
+            return self.conversaciones[user_id].get('contexto', {})
     
-    def obtener_historial(self, user_id):
-        """Obtiene el historial de mensajes del usuario"""
-        if user_id not in self.conversaciones:
-            return []
-        return self.conversaciones[user_id].get('historial', [])
+    def obtener_historial(self, user_id, ultimos=None):
+        """Mensajes del usuario (todos o los `ultimos` N), del más antiguo al más reciente"""
+        with self._lock:
+            self._expirar_sesiones(time.time())
+            if user_id not in self.conversaciones:
+                return []
+            historial = self.conversaciones[user_id]['historial']
+            turnos = historial if ultimos is None else historial.ultimos(ultimos)
+            return [turno_como_dict(turno) for turno in turnos]
     
     def agregar_mensaje(self, user_id, rol, mensaje):
         """Agrega un mensaje al historial de conversación"""
-        if user_id not in self.conversaciones:
-            self.conversaciones[user_id] = {
-                'historial': [],
-                'contexto': {},
-                'timestamp': time.time()
-            }
-        
-        self.conversaciones[user_id]['historial'].append({
-            'rol': rol,
-            'mensaje': mensaje,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Limpiar conversaciones antiguas (más de 24 horas)
-        self._limpiar_conversaciones_antiguas()
+        with self._lock:
+            conversacion = self._registrar_actividad(user_id)
+            timestamp = datetime.now().isoformat()
+            self._secuencia += 1
+            turno = Turno(self._secuencia, rol, mensaje, timestamp, tamano_turno(rol, mensaje, timestamp))
+            
+            descartado = conversacion['historial'].agregar(turno)
+            self.bytes_historial += turno.bytes
+            self.turnos_historial += 1
+            if descartado is not None:
+                self._descontar_turnos(descartado.bytes, 1)
+                self.turnos_descartados += 1
+            
+            self._llegadas.append((turno.secuencia, user_id))
+            self._respetar_presupuesto()
+            # Las llegadas de turnos ya descartados se acumulan: se reconstruye cuando son mayoría
+            if len(self._llegadas) > 2 * self.turnos_historial + 64:
+                self._compactar_llegadas()
     
     def guardar_contexto(self, user_id, clave, valor):
         """Guarda información contextual específica"""
-        if user_id not in self.conversaciones:
-            self.conversaciones[user_id] = {
-                'historial': [],
+        with self._lock:
+            conversacion = self._registrar_actividad(user_id)
+            conversacion['contexto'][clave] = {
+                'valor': valor,
+                'timestamp': datetime.now().isoformat()
+            }
+
+    def _registrar_actividad(self, user_id):
+        """Crea la conversación si no existe y renueva su vencimiento"""
+        ahora = time.time()
+        self._expirar_sesiones(ahora)
+        conversacion = self.conversaciones.get(user_id)
+        if conversacion is None:
+            conversacion = self.conversaciones[user_id] = {
+                'historial': HistorialCircular(self.max_turnos),
                 'contexto': {},
-                'timestamp': time.time()
+                'timestamp': ahora
             }
-        
-        self.conversaciones[user_id]['contexto'][clave] = {
-            'valor': valor,
-            'timestamp': datetime.now().isoformat()
-        }
+            self.sesiones_creadas += 1
+        conversacion['ultima_actividad'] = ahora
+        heapq.heappush(self._vencimientos, (ahora, user_id))
+        # Las entradas obsoletas se acumulan con la actividad: se reconstruye el heap cuando son mayoría
+        if len(self._vencimientos) > 2 * len(self.conversaciones) + 64:
+            self._compactar()
+        return conversacion
     
-    def _limpiar_conversaciones_antiguas(self):
-        """Elimina conversaciones con más de 24 horas de antigüedad"""
-        ahora = time.time()
-        user_ids_a_eliminar = []
-        
-        for user_id, datos in self.conversaciones.items():
-            if ahora - datos['timestamp'] > 86400:  # 24 horas
-                user_ids_a_eliminar.append(user_id)
-        
-        for user_id in user_ids_a_eliminar:
-            del self.conversaciones[user_id]
+    def _expirar_sesiones(self, ahora):
+        """Elimina las conversaciones sin actividad en las últimas `inactividad` segundos"""
+        limite = ahora - self.inactividad
+        while self._vencimientos and self._vencimientos[0][0] <= limite:
+            actividad, user_id = heapq.heappop(self._vencimientos)
+            conversacion = self.conversaciones.get(user_id)
+            # Entrada obsoleta: la conversación ya no existe o tuvo actividad después
+            if conversacion is None or conversacion['ultima_actividad'] != actividad:
+                continue
+            self._eliminar_conversacion(user_id)
+            self.sesiones_expiradas += 1
+
+    def _eliminar_conversacion(self, user_id):
+        conversacion = self.conversaciones.pop(user_id, None)
+        if conversacion is not None:
+            historial = conversacion['historial']
+            self._descontar_turnos(historial.bytes, len(historial))
+
+    def _descontar_turnos(self, bytes_turnos, cantidad):
+        self.bytes_historial -= bytes_turnos
+        self.turnos_historial -= cantidad
+
+    def _respetar_presupuesto(self):
+        """Desaloja los turnos más antiguos (de cualquier conversación) hasta quedar dentro de max_bytes"""
+        while self.bytes_historial > self.max_bytes and self._llegadas:
+            secuencia, user_id = self._llegadas.popleft()
+            conversacion = self.conversaciones.get(user_id)
+            # Llegada obsoleta: el turno ya salió por capacidad o la conversación ya no existe
+            if conversacion is None or conversacion['historial'].primera_secuencia() != secuencia:
+                continue
+            turno = conversacion['historial'].descartar_antiguo()
+            self._descontar_turnos(turno.bytes, 1)
+            self.turnos_desalojados += 1
+
+    def _compactar_llegadas(self):
+        llegadas = [
+            (turno.secuencia, user_id)
+            for user_id, datos in self.conversaciones.items()
+            for turno in datos['historial']
+        ]
+        llegadas.sort()
+        self._llegadas = deque(llegadas)
+
+    def _compactar(self):
+        self._vencimientos = [(datos['ultima_actividad'], user_id) for user_id, datos in self.conversaciones.items()]
+        heapq.heapify(self._vencimientos)
+        self.compactaciones += 1
     
     def obtener_historial_completo(self, user_id):
         """Obtiene el historial completo de mensajes"""
@@ -69,5 +166,44 @@ class ContextManager:
     
     def limpiar_contexto_usuario(self, user_id):
         """Limpia el contexto de un usuario específico"""
-        if user_id in self.conversaciones:
-            del self.conversaciones[user_id]
\ No newline at end of file
+        with self._lock:
+            self._eliminar_conversacion(user_id)
+
+    def bytes_sesion(self, user_id):
+        """Bytes de texto del historial de un usuario"""
+        with self._lock:
+            conversacion = self.conversaciones.get(user_id)
+            return conversacion['historial'].bytes if conversacion else 0
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'sesiones_activas': len(self.conversaciones),
+                'sesiones_creadas': self.sesiones_creadas,
+                'sesiones_expiradas': self.sesiones_expiradas,
+                'inactividad_segundos': self.inactividad,
+                'entradas_heap': len(self._vencimientos),
+                'compactaciones': self.compactaciones,
+                'historial': self._estadisticas_historial()
+            }
+
+    def _estadisticas_historial(self):
+        por_sesion = [datos['historial'].bytes for datos in self.conversaciones.values()]
+        return {
+            'turnos': self.turnos_historial,
+            'max_turnos_por_sesion': self.max_turnos,
+            'bytes': self.bytes_historial,
+            'presupuesto_bytes': self.max_bytes,
+            'bytes_por_sesion_promedio': round(sum(por_sesion) / len(por_sesion), 1) if por_sesion else 0.0,
+            'bytes_por_sesion_maximo': max(por_sesion, default=0),
+            'turnos_descartados': self.turnos_descartados,
+            'turnos_desalojados': self.turnos_desalojados
+        }
+
+
+def valor_contexto(contexto, clave, defecto=None):
+    """Valor guardado con guardar_contexto (cada entrada se guarda junto con su timestamp)"""
+    entrada = contexto.get(clave) if isinstance(contexto, dict) else None
+    if isinstance(entrada, dict) and 'valor' in entrada:
+        return entrada['valor']
+    return defecto if entrada is None else entrada
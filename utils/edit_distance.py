@@ -0,0 +1,50 @@
+# Algoritmo bit-paralelo de Myers (variante de Hyyrö para distancia global): cada columna de la
+# matriz de Levenshtein se codifica en vectores de bits de deltas verticales (+1 / -1), así que
+# procesar un carácter del texto cuesta unas cuantas operaciones de enteros en lugar de un ciclo.
+
+def _mascaras_patron(patron):
+    """Para cada carácter del patrón, bits con las posiciones donde aparece"""
+    mascaras = {}
+    for i, caracter in enumerate(patron):
+        mascaras[caracter] = mascaras.get(caracter, 0) | (1 << i)
+    return mascaras
+
+
+def distancia_levenshtein(a, b, maximo=None):
+    """
+    Distancia de Levenshtein entre dos palabras con el algoritmo bit-paralelo de Myers.
+    Con `maximo`, retorna maximo + 1 en cuanto se sabe que la distancia lo supera.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a) if maximo is None else min(len(a), maximo + 1)
+    if maximo is not None and len(a) - m > maximo:
+        return maximo + 1
+
+    mascaras = _mascaras_patron(b)
+    todos = (1 << m) - 1
+    alto = 1 << (m - 1)
+    pv, mv = todos, 0
+    distancia = m
+    restantes = len(a)
+    for caracter in a:
+        eq = mascaras.get(caracter, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & todos)
+        mh = pv & xh
+        if ph & alto:
+            distancia += 1
+        elif mh & alto:
+            distancia -= 1
+        ph = ((ph << 1) | 1) & todos
+        mh = (mh << 1) & todos
+        pv = mh | (~(xv | ph) & todos)
+        mv = ph & xv
+        restantes -= 1
+        # Cada carácter restante puede bajar la distancia a lo más en 1
+        if maximo is not None and distancia - restantes > maximo:
+            return maximo + 1
+    return distancia
@@ -1,3 +1,5 @@
+import json
+
 def formatear_lista(items, tipo="bullet"):
     """Formatea una lista de items con emojis y saltos de línea reales"""
     if not items:
@@ -12,4 +14,10 @@ def formatear_lista(items, tipo="bullet"):
     elif tipo == "location":
         return "\n".join([f"📍 {item}" for item in items])
     else:
-        return "\n".join([f"• {item}" for item in items])
\ No newline at end of file
+        return "\n".join([f"• {item}" for item in items])
+
+
+def formatear_evento_sse(datos, evento=None):
+    """Serializa un evento Server-Sent Events con datos JSON"""
+    linea_evento = f"event: {evento}\n" if evento else ""
+    return f"{linea_evento}data: {json.dumps(datos, ensure_ascii=False)}\n\n"
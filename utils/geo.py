@@ -0,0 +1,149 @@
+import os
+import csv
+import time
+import logging
+import threading
+from collections import namedtuple
+import numpy as np
+
+from utils.trigramas import IndiceTrigramas
+from data.geografia_data import MUNICIPIOS, ESTADOS, ALIAS_LUGARES
+from data.ubicaciones_data import UBICACIONES
+
+logger = logging.getLogger(__name__)
+
+Lugar = namedtuple('Lugar', ['nombre', 'estado', 'lat', 'lng'])
+Cercano = namedtuple('Cercano', ['clave', 'distancia_km'])
+
+RADIO_TIERRA_KM = 6371.0088
+
+# Los nombres de lugar son cortos y parecidos entre sí: además del puntaje, cada palabra del nombre
+# debe aparecer completa en el texto ("la playa" no es Celaya ni Playa del Carmen)
+UMBRAL_LUGAR = 0.6
+
+PALABRAS_VACIAS_LUGARES = ['de', 'del', 'la', 'las', 'los', 'el', 'y']
+
+# CSV opcional (columnas nombre,estado,lat,lng) con más municipios, p. ej. exportado del catálogo de INEGI
+RUTA_MUNICIPIOS_EXTRA = os.environ.get("GEO_MUNICIPIOS", "")
+CERCANOS_POR_DEFECTO = int(os.environ.get("GEO_CERCANOS", "3"))
+
+
+def cargar_municipios_csv(ruta):
+    """Lugares de un CSV con columnas nombre,estado,lat,lng; las filas incompletas se ignoran"""
+    lugares = []
+    try:
+        with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+            for fila in csv.DictReader(archivo):
+                try:
+                    lugares.append(Lugar(fila['nombre'].strip(), fila['estado'].strip(), float(fila['lat']), float(fila['lng'])))
+                except (KeyError, TypeError, ValueError, AttributeError):
+                    continue
+    except OSError as e:
+        logger.warning(f"⚠️ No se pudo leer el gazetteer {ruta}: {e}")
+    return lugares
+
+
+def entradas_lugares(extra=()):
+    """
+    (texto, Lugar) del gazetteer: municipios, estados (en la capital) y abreviaturas.
+    Los municipios van primero: "Veracruz" es el puerto, no la capital del estado.
+    """
+    lugares = [Lugar(*municipio) for municipio in MUNICIPIOS]
+    lugares.extend(extra)
+    lugares.extend(Lugar(estado, estado, lat, lng) for estado, (lat, lng) in ESTADOS.items())
+
+    por_nombre = {}
+    for lugar in lugares:
+        por_nombre.setdefault(lugar.nombre, lugar)
+
+    entradas = [(lugar.nombre, lugar) for lugar in lugares]
+    entradas.extend((alias, por_nombre[nombre]) for alias, nombre in ALIAS_LUGARES.items() if nombre in por_nombre)
+    return entradas
+
+
+def distancias_haversine(lat, lng, lats_rad, lngs_rad, cos_lats):
+    """Distancia en km (gran círculo) de un punto a todos los de los arreglos (en radianes) en una sola operación"""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    a = np.sin((lats_rad - lat1) / 2) ** 2 + np.cos(lat1) * cos_lats * np.sin((lngs_rad - lng1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class Geocodificador:
+    """Ciudad o estado mencionado por el usuario -> Lugar, tolerante a acentos y errores de tecleo"""
+
+    def __init__(self, entradas, umbral=UMBRAL_LUGAR):
+        self.indice = IndiceTrigramas(entradas, palabras_vacias=PALABRAS_VACIAS_LUGARES)
+        self.umbral = umbral
+
+    def __len__(self):
+        return len(self.indice)
+
+    def geocodificar(self, texto):
+        """Lugar mencionado en el texto, o None si ninguno coincide con claridad"""
+        for candidato in self.indice.buscar(texto, limite=3, umbral=self.umbral):
+            if self.indice.coincide_palabra(texto, candidato.texto, todas=True):
+                logger.info(f"🧭 '{texto}' -> {candidato.texto} (puntaje {candidato.puntaje})")
+                return candidato.valor
+        return None
+
+
+class BuscadorAlmacenes:
+    """Los k almacenes más cercanos a un punto: haversine vectorizado sobre las coordenadas de UBICACIONES"""
+
+    def __init__(self, ubicaciones):
+        con_coordenadas = [(clave, datos['coordenadas']) for clave, datos in ubicaciones.items() if datos.get('coordenadas')]
+        self.claves = [clave for clave, _ in con_coordenadas]
+        self.lats_rad = np.radians(np.array([c['lat'] for _, c in con_coordenadas], dtype=np.float64))
+        self.lngs_rad = np.radians(np.array([c['lng'] for _, c in con_coordenadas], dtype=np.float64))
+        self.cos_lats = np.cos(self.lats_rad)
+
+    def __len__(self):
+        return len(self.claves)
+
+    def cercanos(self, lat, lng, k=CERCANOS_POR_DEFECTO):
+        """[Cercano(clave, distancia_km)] del más cercano al más lejano"""
+        if not self.claves or k <= 0:
+            return []
+        distancias = distancias_haversine(lat, lng, self.lats_rad, self.lngs_rad, self.cos_lats)
+        k = min(k, len(self.claves))
+        if k < len(self.claves):
+            indices = np.argpartition(distancias, k - 1)[:k]
+            indices = indices[np.argsort(distancias[indices], kind='stable')]
+        else:
+            indices = np.argsort(distancias, kind='stable')
+        return [Cercano(self.claves[i], round(float(distancias[i]), 1)) for i in indices]
+
+
+_geocodificador = None
+_buscador = None
+_lock = threading.Lock()
+
+
+def obtener_geocodificador():
+    """Geocodificador del gazetteer (más GEO_MUNICIPIOS si está configurado), construido una sola vez por proceso"""
+    global _geocodificador
+    if _geocodificador is None:
+        with _lock:
+            if _geocodificador is None:
+                inicio = time.perf_counter()
+                extra = cargar_municipios_csv(RUTA_MUNICIPIOS_EXTRA) if RUTA_MUNICIPIOS_EXTRA else []
+                _geocodificador = Geocodificador(entradas_lugares(extra))
+                logger.info(f"🧭 Gazetteer: {len(_geocodificador)} lugares en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return _geocodificador
+
+
+def obtener_buscador_almacenes():
+    global _buscador
+    if _buscador is None:
+        with _lock:
+            if _buscador is None:
+                _buscador = BuscadorAlmacenes(UBICACIONES)
+    return _buscador
+
+
+def almacenes_cercanos(texto, k=CERCANOS_POR_DEFECTO):
+    """(Lugar, [Cercano]) para el lugar mencionado en el texto, o (None, []) si no se reconoce ninguno"""
+    lugar = obtener_geocodificador().geocodificar(texto)
+    if lugar is None:
+        return None, []
+    return lugar, obtener_buscador_almacenes().cercanos(lugar.lat, lugar.lng, k)
@@ -0,0 +1,150 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from utils.rate_limiter import ProveedorOcupadoError
+
+logger = logging.getLogger(__name__)
+
+class CoberturaLatencia:
+    """
+    Hedging de solicitudes: si el destino principal no responde dentro del percentil configurado
+    de su latencia reciente, lanza la misma solicitud a otro destino y usa la primera respuesta.
+    """
+
+    def __init__(self, router, habilitado=False, percentil=0.9, min_espera=0.5, max_hilos=8):
+        self.router = router
+        self.habilitado = habilitado
+        self.percentil = percentil
+        self.min_espera = min_espera
+        self._executor = ThreadPoolExecutor(max_workers=max_hilos, thread_name_prefix="hedging") if habilitado else None
+        self._por_modelo = {}
+        self._lock = threading.Lock()
+
+    def _umbral(self, destino):
+        """Segundos a esperar al principal antes de cubrir; None si todavía no hay historial suficiente"""
+        latencia = destino.percentil_latencia(self.percentil)
+        if latencia is None:
+            return None
+        return max(self.min_espera, latencia)
+
+    def _activo(self):
+        return self.habilitado and len(self.router.destinos) > 1
+
+    def _contar(self, modelo, campo):
+        with self._lock:
+            datos = self._por_modelo.setdefault(modelo, {
+                'principal': 0, 'respaldo': 0, 'ganadas_principal': 0, 'ganadas_respaldo': 0
+            })
+            datos[campo] += 1
+
+    def _adquirir_respaldo(self, principal):
+        """Destino de respaldo sin esperar turno: si no hay uno libre en este momento, no se cubre"""
+        try:
+            return self.router.adquirir_destino(plazo=0, excluir=principal)
+        except ProveedorOcupadoError:
+            return None
+
+    async def _adquirir_respaldo_async(self, principal):
+        try:
+            return await self.router.adquirir_destino_async(plazo=0, excluir=principal)
+        except ProveedorOcupadoError:
+            return None
+
+    def ejecutar(self, llamar):
+        """Ejecuta llamar(destino) con hedging; retorna el resultado del destino que responda primero"""
+        principal = self.router.adquirir_destino()
+        umbral = self._umbral(principal) if self._activo() else None
+        if umbral is None:
+            return llamar(principal)
+
+        self._contar(principal.modelo, 'principal')
+        futuros = {self._executor.submit(llamar, principal): principal}
+        terminados, _ = wait(futuros, timeout=umbral)
+        if not terminados:
+            respaldo = self._adquirir_respaldo(principal)
+            if respaldo is not None:
+                logger.info(f"🛡️ {principal.nombre} superó {umbral:.2f}s: cubriendo con {respaldo.nombre}")
+                self._contar(respaldo.modelo, 'respaldo')
+                futuros[self._executor.submit(llamar, respaldo)] = respaldo
+
+        pendientes = set(futuros)
+        error = None
+        while pendientes:
+            terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminados:
+                if futuro.exception() is not None:
+                    error = futuro.exception()
+                    continue
+                destino = futuros[futuro]
+                self._contar(destino.modelo, 'ganadas_principal' if destino is principal else 'ganadas_respaldo')
+                # Una solicitud HTTP síncrona no se puede interrumpir: la perdedora termina en su hilo y se descarta
+                for perdedor in pendientes:
+                    perdedor.cancel()
+                return futuro.result()
+        raise error
+
+    async def ejecutar_async(self, llamar):
+        """Versión asíncrona: llamar(destino) es una corrutina y la solicitud perdedora se cancela"""
+        principal = await self.router.adquirir_destino_async()
+        umbral = self._umbral(principal) if self._activo() else None
+        if umbral is None:
+            return await llamar(principal)
+
+        self._contar(principal.modelo, 'principal')
+        tareas = {asyncio.ensure_future(llamar(principal)): principal}
+        try:
+            terminadas, _ = await asyncio.wait(tareas, timeout=umbral)
+            if not terminadas:
+                respaldo = await self._adquirir_respaldo_async(principal)
+                if respaldo is not None:
+                    logger.info(f"🛡️ {principal.nombre} superó {umbral:.2f}s: cubriendo con {respaldo.nombre}")
+                    self._contar(respaldo.modelo, 'respaldo')
+                    tareas[asyncio.ensure_future(llamar(respaldo))] = respaldo
+
+            pendientes = set(tareas)
+            error = None
+            while pendientes:
+                terminadas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+                for tarea in terminadas:
+                    if tarea.exception() is not None:
+                        error = tarea.exception()
+                        continue
+                    destino = tareas[tarea]
+                    self._contar(destino.modelo, 'ganadas_principal' if destino is principal else 'ganadas_respaldo')
+                    return tarea.result()
+            raise error
+        finally:
+            for tarea in tareas:
+                tarea.cancel()
+
+    def estadisticas(self):
+        with self._lock:
+            por_modelo = {}
+            for modelo, datos in self._por_modelo.items():
+                llamadas = datos['principal'] + datos['respaldo']
+                ganadas = datos['ganadas_principal'] + datos['ganadas_respaldo']
+                por_modelo[modelo] = dict(
+                    datos,
+                    tasa_victoria=round(ganadas / llamadas, 3) if llamadas else 0.0,
+                    # Cada respaldo lanzado es una solicitud (y tokens) adicional
+                    llamadas_extra=datos['respaldo']
+                )
+            return {
+                "habilitado": self.habilitado,
+                "percentil": self.percentil,
+                "min_espera": self.min_espera,
+                "modelos": por_modelo
+            }
+
+
+def crear_cobertura(router):
+    """Hedging configurado desde variables de entorno (deshabilitado por omisión)"""
+    return CoberturaLatencia(
+        router,
+        habilitado=os.environ.get("LLM_HEDGING", "").lower() in ("1", "true", "si", "sí"),
+        percentil=float(os.environ.get("LLM_HEDGING_PERCENTIL", 0.9)),
+        min_espera=float(os.environ.get("LLM_HEDGING_MIN_ESPERA", 0.5)),
+        max_hilos=int(os.environ.get("LLM_HEDGING_HILOS", 8))
+    )
@@ -0,0 +1,58 @@
+from collections import deque, namedtuple
+from itertools import islice
+
+# secuencia: orden global de llegada (para desalojar lo más antiguo entre todas las sesiones)
+Turno = namedtuple('Turno', ['secuencia', 'rol', 'mensaje', 'timestamp', 'bytes'])
+
+
+def tamano_turno(rol, mensaje, timestamp):
+    """Bytes de texto (UTF-8) de un turno"""
+    return len(rol.encode('utf-8')) + len(mensaje.encode('utf-8')) + len(timestamp)
+
+
+def turno_como_dict(turno):
+    return {'rol': turno.rol, 'mensaje': turno.mensaje, 'timestamp': turno.timestamp}
+
+
+class HistorialCircular:
+    """Últimos `capacidad` turnos de una conversación; al llenarse se descarta el más antiguo"""
+
+    __slots__ = ('capacidad', 'bytes', '_turnos')
+
+    def __init__(self, capacidad):
+        if capacidad < 1:
+            raise ValueError(f"La capacidad del historial debe ser al menos 1 turno (se recibió {capacidad})")
+        self.capacidad = capacidad
+        self.bytes = 0
+        self._turnos = deque()
+
+    def __len__(self):
+        return len(self._turnos)
+
+    def __iter__(self):
+        return iter(self._turnos)
+
+    def agregar(self, turno):
+        """Agrega el turno; retorna el turno descartado por capacidad o None"""
+        descartado = self.descartar_antiguo() if len(self._turnos) >= self.capacidad else None
+        self._turnos.append(turno)
+        self.bytes += turno.bytes
+        return descartado
+
+    def descartar_antiguo(self):
+        turno = self._turnos.popleft()
+        self.bytes -= turno.bytes
+        return turno
+
+    def primera_secuencia(self):
+        return self._turnos[0].secuencia if self._turnos else None
+
+    def ultimos(self, n):
+        """Los últimos n turnos, del más antiguo al más reciente, sin recorrer el resto del historial"""
+        if n <= 0:
+            return []
+        if n >= len(self._turnos):
+            return list(self._turnos)
+        recientes = list(islice(reversed(self._turnos), n))
+        recientes.reverse()
+        return recientes
@@ -0,0 +1,139 @@
+import os
+import time
+import logging
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+class ClienteHTTPProveedores:
+    """Cliente HTTP compartido (keep-alive + pool) para los proveedores de LLM"""
+
+    def __init__(self, pool_maxsize=None, pool_connections=None):
+        # Conexiones por host: debe igualar el número de hilos del worker
+        self.pool_maxsize = pool_maxsize or int(os.environ.get("LLM_HTTP_POOL_SIZE", 8))
+        # Número de hosts distintos (OpenRouter, DeepSeek, ...) con pool propio
+        self.pool_connections = pool_connections or int(os.environ.get("LLM_HTTP_POOL_HOSTS", 4))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=False
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Connection": "keep-alive"})
+
+        self._lock = threading.Lock()
+        # pool_maxsize es por host: las solicitudes en curso se cuentan igual
+        self._en_curso = defaultdict(int)
+        self._max_en_curso = 0
+        self._total_solicitudes = 0
+        self._saturaciones = 0
+
+    @staticmethod
+    def _host(url):
+        partes = urlsplit(url)
+        return f"{partes.scheme}://{partes.netloc}"
+
+    def _entrar(self, host):
+        with self._lock:
+            self._en_curso[host] += 1
+            en_curso = self._en_curso[host]
+            self._total_solicitudes += 1
+            self._max_en_curso = max(self._max_en_curso, en_curso)
+            if en_curso > self.pool_maxsize:
+                # Esta solicitud abrirá una conexión fuera del pool (se descarta al terminar)
+                self._saturaciones += 1
+                logger.warning(
+                    f"⚠️ Pool HTTP saturado: {en_curso} solicitudes en curso con {host}, "
+                    f"pool_maxsize={self.pool_maxsize}"
+                )
+
+    def _salir(self, host):
+        with self._lock:
+            self._en_curso[host] -= 1
+            if not self._en_curso[host]:
+                del self._en_curso[host]
+
+    def _solicitar(self, metodo, url, kwargs):
+        host = self._host(url)
+        self._entrar(host)
+        try:
+            respuesta = self.session.request(metodo, url, **kwargs)
+        except BaseException:
+            self._salir(host)
+            raise
+        if not kwargs.get('stream'):
+            self._salir(host)
+            return respuesta
+        
+        # Con stream=True la conexión sigue ocupada hasta que se lee o se cierra el cuerpo
+        cerrar = respuesta.close
+        liberada = False
+        
+        def cerrar_y_salir():
+            nonlocal liberada
+            try:
+                cerrar()
+            finally:
+                if not liberada:
+                    liberada = True
+                    self._salir(host)
+        
+        respuesta.close = cerrar_y_salir
+        return respuesta
+
+    def post(self, url, **kwargs):
+        """POST reutilizando conexiones del pool; con stream=True la respuesta debe cerrarse (with respuesta:)"""
+        return self._solicitar("POST", url, kwargs)
+
+    def get(self, url, **kwargs):
+        """GET reutilizando conexiones del pool; con stream=True la respuesta debe cerrarse (with respuesta:)"""
+        return self._solicitar("GET", url, kwargs)
+
+    def preconectar(self, urls, timeout=5):
+        """Abre las conexiones TCP/TLS por adelantado para que el primer mensaje no pague el handshake"""
+        for url in urls:
+            inicio = time.time()
+            try:
+                # HEAD no tiene cuerpo, así que la conexión regresa al pool inmediatamente
+                self.session.head(url, timeout=timeout)
+                logger.info(f"🔌 Conexión precalentada con {url} en {(time.time() - inicio) * 1000:.0f} ms")
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"No se pudo precalentar la conexión con {url}: {e}")
+
+    def estadisticas(self):
+        """Retorna el estado del pool para monitoreo"""
+        with self._lock:
+            return {
+                "pool_maxsize": self.pool_maxsize,
+                "pool_connections": self.pool_connections,
+                "en_curso": sum(self._en_curso.values()),
+                "en_curso_por_host": dict(self._en_curso),
+                "max_en_curso": self._max_en_curso,
+                "total_solicitudes": self._total_solicitudes,
+                "saturaciones": self._saturaciones,
+                "saturado": any(en_curso >= self.pool_maxsize for en_curso in self._en_curso.values())
+            }
+
+    def cerrar(self):
+        self.session.close()
+
+
+# Instancia global del cliente (una por proceso)
+_cliente_http = None
+_cliente_http_lock = threading.Lock()
+
+def obtener_cliente_http():
+    """Retorna el cliente HTTP compartido del proceso, creándolo la primera vez"""
+    global _cliente_http
+    if _cliente_http is None:
+        with _cliente_http_lock:
+            if _cliente_http is None:
+                _cliente_http = ClienteHTTPProveedores()
+    return _cliente_http
@@ -0,0 +1,66 @@
+import os
+import logging
+import threading
+import httpx
+
+logger = logging.getLogger(__name__)
+
+class ClienteHTTPAsincrono:
+    """Cliente HTTP asíncrono compartido para los proveedores de LLM (modo ASGI)"""
+
+    def __init__(self, max_conexiones=None, max_keepalive=None):
+        # En modo asíncrono un solo worker mantiene cientos de conversaciones en vuelo
+        self.max_conexiones = max_conexiones or int(os.environ.get("LLM_ASYNC_MAX_CONNECTIONS", 200))
+        self.max_keepalive = max_keepalive or int(os.environ.get("LLM_ASYNC_MAX_KEEPALIVE", 50))
+        self._client = None
+        self._en_curso = 0
+        self._max_en_curso = 0
+        self._total_solicitudes = 0
+
+    def _obtener_client(self):
+        # El cliente se crea dentro del event loop que lo va a usar
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_conexiones,
+                    max_keepalive_connections=self.max_keepalive
+                ),
+                http2=False
+            )
+        return self._client
+
+    async def post(self, url, **kwargs):
+        """POST asíncrono reutilizando conexiones keep-alive"""
+        self._en_curso += 1
+        self._total_solicitudes += 1
+        self._max_en_curso = max(self._max_en_curso, self._en_curso)
+        try:
+            return await self._obtener_client().post(url, **kwargs)
+        finally:
+            self._en_curso -= 1
+
+    def estadisticas(self):
+        return {
+            "max_conexiones": self.max_conexiones,
+            "en_curso": self._en_curso,
+            "max_en_curso": self._max_en_curso,
+            "total_solicitudes": self._total_solicitudes
+        }
+
+    async def cerrar(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_cliente_http_async = None
+_cliente_http_async_lock = threading.Lock()
+
+def obtener_cliente_http_async():
+    """Retorna el cliente HTTP asíncrono compartido del proceso"""
+    global _cliente_http_async
+    if _cliente_http_async is None:
+        with _cliente_http_async_lock:
+            if _cliente_http_async is None:
+                _cliente_http_async = ClienteHTTPAsincrono()
+    return _cliente_http_async
@@ -0,0 +1,90 @@
+import os
+import logging
+import threading
+from collections import namedtuple, defaultdict
+
+from utils.palabras_clave import categoria_servicio
+from utils.mensaje_normalizado import normalizar, quitar_acentos
+from data.servicios_data import PALABRAS_CLAVE, PESOS_PALABRAS_CLAVE
+
+logger = logging.getLogger(__name__)
+
+# servicio: el ganador, o None si hubo empate o poca confianza; ranking: [(servicio, puntaje)] de mayor a menor
+ClasificacionServicio = namedtuple('ClasificacionServicio', ['servicio', 'confianza', 'ranking'])
+
+# Fracción del puntaje total que debe tener el primer servicio y puntaje mínimo para aceptarlo sin el LLM
+CONFIANZA_MINIMA = float(os.environ.get("SERVICIOS_CONFIANZA_MIN", "0.6"))
+PUNTAJE_MINIMO = float(os.environ.get("SERVICIOS_PUNTAJE_MIN", "1.0"))
+# El ganador necesita al menos una palabra de este peso: con solo palabras genéricas ("almacén", "bodega") decide el LLM
+PESO_ESPECIFICO = 1.0
+
+
+class IndiceServicios:
+    """
+    Índice invertido palabra clave -> [(servicio, peso)]. Puntúa todos los servicios a la vez con las
+    palabras que ya encontró el detector compartido (utils/palabras_clave.py), en lugar de quedarse
+    con el primer servicio que tenga alguna coincidencia.
+    """
+
+    def __init__(self, palabras_clave, pesos=None, confianza_minima=CONFIANZA_MINIMA, puntaje_minimo=PUNTAJE_MINIMO,
+                 peso_especifico=PESO_ESPECIFICO):
+        pesos = pesos or {}
+        self.indice = defaultdict(list)
+        for servicio, palabras in palabras_clave.items():
+            for palabra in palabras:
+                self.indice[palabra.lower()].append((servicio, pesos.get(palabra, 1.0)))
+        self.indice = dict(self.indice)
+        self._sin_acentos = {quitar_acentos(palabra) for palabra in self.indice}
+        self.categorias = {categoria_servicio(servicio) for servicio in palabras_clave}
+        self.confianza_minima = confianza_minima
+        self.puntaje_minimo = puntaje_minimo
+        self.peso_especifico = peso_especifico
+
+    def __contains__(self, palabra):
+        """'almacen' y 'almacén' son la misma palabra clave"""
+        return quitar_acentos(palabra.lower()) in self._sin_acentos
+
+    def clasificar(self, mensaje):
+        coincidencias = normalizar(mensaje).coincidencias
+        puntajes = defaultdict(float)
+        especificos = set()
+        vistas = set()
+        for categoria in coincidencias.categorias:
+            if categoria not in self.categorias:
+                continue
+            for palabra in coincidencias.palabras(categoria):
+                # Una palabra de varios servicios aparece en cada categoría: se suma una vez por servicio
+                if palabra in vistas:
+                    continue
+                vistas.add(palabra)
+                for servicio, peso in self.indice.get(palabra, ()):
+                    puntajes[servicio] += peso
+                    if peso >= self.peso_especifico:
+                        especificos.add(servicio)
+
+        if not puntajes:
+            return ClasificacionServicio(None, 0.0, [])
+
+        ranking = sorted(puntajes.items(), key=lambda par: -par[1])
+        primero = ranking[0][1]
+        confianza = round(primero / sum(puntajes.values()), 4)
+        empate = len(ranking) > 1 and ranking[1][1] == primero
+        generico = ranking[0][0] not in especificos
+        if empate or generico or confianza < self.confianza_minima or primero < self.puntaje_minimo:
+            return ClasificacionServicio(None, confianza, ranking)
+        return ClasificacionServicio(ranking[0][0], confianza, ranking)
+
+
+_indice = None
+_lock = threading.Lock()
+
+
+def obtener_indice_servicios():
+    """Índice de palabras clave de servicios, construido una sola vez por proceso"""
+    global _indice
+    if _indice is None:
+        with _lock:
+            if _indice is None:
+                _indice = IndiceServicios(PALABRAS_CLAVE, PESOS_PALABRAS_CLAVE)
+                logger.info(f"🗂️ Índice de servicios: {len(_indice.indice)} palabras en {len(_indice.categorias)} servicios")
+    return _indice
@@ -0,0 +1,80 @@
+import time
+import logging
+import threading
+
+from utils.trigramas import IndiceTrigramas
+from data.ubicaciones_data import UBICACIONES, CIUDADES_UBICACIONES, PLAZAS, ALIAS_UBICACIONES
+
+logger = logging.getLogger(__name__)
+
+# Puntaje mínimo para aceptar una ubicación ("Monterey" -> monterrey: 0.78, "acasias" -> acacias: 0.59);
+# las frases sin ubicación ("hola quiero información") quedan por debajo de 0.45
+UMBRAL_UBICACION = 0.55
+
+# Para responder sin LLM (etapa ubicacion_directa) se exige más parecido y que coincida una palabra completa
+UMBRAL_UBICACION_DIRECTA = 0.7
+
+# Palabras genéricas que no distinguen una ubicación de otra: se ignoran en los nombres y en la consulta
+PALABRAS_VACIAS = [
+    'almacén', 'plaza', 'corporativo', 'de', 'del', 'la', 'las', 'los', 'el', 'y', 'en', 'con', 'un', 'una',
+    'para', 'por', 'puedo', 'puede', 'pueden', 'hablar', 'quiero', 'queda', 'quedan', 'tienen', 'hay', 'esta', 'estan'
+]
+
+
+def entradas_ubicaciones():
+    """
+    (texto, claves de UBICACIONES) para ciudades, alias, claves, nombres, plazas y ciudades de cada almacén.
+    El orden importa: si dos fuentes producen el mismo texto el índice conserva la primera,
+    así los mapeos explícitos de CIUDADES_UBICACIONES tienen prioridad.
+    """
+    fuentes = []
+    fuentes.extend(CIUDADES_UBICACIONES.items())
+    fuentes.extend(ALIAS_UBICACIONES.items())
+    for clave, datos in UBICACIONES.items():
+        fuentes.append((clave, [clave]))
+        fuentes.append((datos['nombre'], [clave]))
+    for plaza in PLAZAS:
+        fuentes.append((plaza, [clave for clave, datos in UBICACIONES.items() if datos['plaza'] == plaza]))
+    for clave, datos in UBICACIONES.items():
+        # "Veracruz, Veracruz" -> "Veracruz": solo la ciudad, el estado abarcaría otras plazas
+        ciudad = datos['ciudad'].split(',')[0]
+        fuentes.append((ciudad, [c for c, d in UBICACIONES.items() if d['ciudad'].split(',')[0] == ciudad]))
+
+    return [(texto, tuple(claves)) for texto, claves in fuentes if claves]
+
+
+_indice = None
+_lock = threading.Lock()
+
+
+def obtener_indice_ubicaciones():
+    """Índice de trigramas de ubicaciones, construido una sola vez por proceso"""
+    global _indice
+    if _indice is None:
+        with _lock:
+            if _indice is None:
+                inicio = time.perf_counter()
+                _indice = IndiceTrigramas(entradas_ubicaciones(), palabras_vacias=PALABRAS_VACIAS)
+                logger.info(f"📍 Índice de ubicaciones: {len(_indice)} entradas en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    return _indice
+
+
+def buscar_ubicaciones(texto, limite=5, umbral=UMBRAL_UBICACION):
+    """
+    Candidatos (puntaje, texto, claves) del más al menos parecido, uno por conjunto de claves.
+    A igual puntaje va primero el más específico: "almacén Ulúa en Veracruz" -> ULÚA antes que la ciudad.
+    """
+    unicos = {}
+    for candidato in obtener_indice_ubicaciones().buscar(texto, limite * 3, umbral):
+        unicos.setdefault(candidato.valor, candidato)
+    candidatos = sorted(unicos.values(), key=lambda c: (-c.puntaje, len(c.valor)))
+    return candidatos[:limite]
+
+
+def buscar_ubicacion_confiable(texto, umbral=UMBRAL_UBICACION_DIRECTA):
+    """Mejor candidato solo si supera el umbral estricto y una de sus palabras aparece en el texto; si no, None"""
+    indice = obtener_indice_ubicaciones()
+    for candidato in buscar_ubicaciones(texto, limite=3, umbral=umbral):
+        if indice.coincide_palabra(texto, candidato.texto):
+            return candidato
+    return None
@@ -0,0 +1,44 @@
+from utils.palabras_clave import obtener_detector
+
+_SIN_ACENTOS = str.maketrans('áéíóúüÁÉÍÓÚÜ', 'aeiouuAEIOUU')
+
+
+def quitar_acentos(texto):
+    return texto.translate(_SIN_ACENTOS)
+
+
+class MensajeNormalizado:
+    """
+    Formas del mensaje del usuario que usan las etapas y los módulos, calculadas una sola vez por
+    solicitud: original, sin espacios extremos, en minúsculas, sin acentos, tokens y palabras clave.
+    """
+
+    __slots__ = ('original', 'limpio', 'minusculas', 'sin_acentos', 'tokens', '_coincidencias')
+
+    def __init__(self, texto):
+        self.original = texto
+        self.limpio = texto.strip()
+        self.minusculas = self.limpio.lower()
+        self.sin_acentos = quitar_acentos(self.minusculas)
+        self.tokens = tuple(self.limpio.split())
+        self._coincidencias = None
+
+    @property
+    def coincidencias(self):
+        """Palabras clave por categoría (utils/palabras_clave.py), buscadas en la primera consulta"""
+        if self._coincidencias is None:
+            self._coincidencias = obtener_detector().detectar_minusculas(self.minusculas)
+        return self._coincidencias
+
+    def __str__(self):
+        return self.original
+
+    def __repr__(self):
+        return f"MensajeNormalizado({self.original!r})"
+
+
+def normalizar(mensaje):
+    """Acepta texto o un MensajeNormalizado ya construido (no lo vuelve a procesar)"""
+    if isinstance(mensaje, MensajeNormalizado):
+        return mensaje
+    return MensajeNormalizado(mensaje)
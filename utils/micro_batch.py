@@ -0,0 +1,180 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class _Lote:
+    """Grupo de elementos que se despachan juntos"""
+
+    def __init__(self):
+        self.elementos = []
+        self.creado = time.monotonic()
+        self.despachado = None
+        self.resultados = None
+        self.error = None
+        self.reintentar = False   # la salida del lote no se pudo separar: cada elemento va solo
+        self.listo = None
+        self.lleno = None
+        self.tarea = None
+
+
+class MicroLotes:
+    """
+    Agrupa las solicitudes que llegan dentro de una ventana corta (o hasta `max_tamano`) y las
+    despacha en una sola llamada. Si `procesar_lote` retorna None, cada elemento se procesa solo.
+    """
+
+    def __init__(self, procesar_lote, procesar_uno, procesar_lote_async=None, procesar_uno_async=None,
+                 habilitado=False, max_tamano=8, espera=0.05, nombre=""):
+        self.procesar_lote = procesar_lote
+        self.procesar_uno = procesar_uno
+        self.procesar_lote_async = procesar_lote_async
+        self.procesar_uno_async = procesar_uno_async
+        self.habilitado = habilitado
+        self.max_tamano = max_tamano
+        self.espera = espera
+        self.nombre = nombre
+        self._abierto = None
+        self._abierto_async = None
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()
+        self.lotes = 0
+        self.elementos = 0
+        self.max_observado = 0
+        self.espera_total = 0.0
+        self.reintentos = 0
+        self.elementos_reintentados = 0
+
+    def _registrar(self, lote):
+        with self._lock:
+            self.lotes += 1
+            self.elementos += len(lote.elementos)
+            self.max_observado = max(self.max_observado, len(lote.elementos))
+            self.espera_total += lote.despachado - lote.creado
+            if lote.reintentar:
+                self.reintentos += 1
+                self.elementos_reintentados += len(lote.elementos)
+                logger.warning(f"📦 {self.nombre}: la salida del lote de {len(lote.elementos)} no se pudo separar, se reintenta uno por uno")
+
+    def enviar(self, elemento):
+        """Procesa el elemento dentro de un lote y retorna su resultado (modo con hilos)"""
+        if not self.habilitado:
+            return self.procesar_uno(elemento)
+
+        with self._cond:
+            lote = self._abierto
+            lider = lote is None
+            if lider:
+                lote = self._abierto = _Lote()
+                lote.listo = threading.Event()
+            indice = len(lote.elementos)
+            lote.elementos.append(elemento)
+            if len(lote.elementos) >= self.max_tamano:
+                self._abierto = None
+                self._cond.notify_all()
+
+        if lider:
+            # El primero en llegar espera la ventana (o a que el lote se llene) y lo despacha
+            with self._cond:
+                self._cond.wait_for(lambda: self._abierto is not lote, timeout=self.espera)
+                if self._abierto is lote:
+                    self._abierto = None
+            self._despachar(lote)
+        else:
+            lote.listo.wait()
+        return self._resultado(lote, indice, elemento)
+
+    def _despachar(self, lote):
+        lote.despachado = time.monotonic()
+        try:
+            if len(lote.elementos) == 1:
+                lote.resultados = [self.procesar_uno(lote.elementos[0])]
+            else:
+                lote.resultados = self.procesar_lote(lote.elementos)
+                lote.reintentar = lote.resultados is None
+        except Exception as e:
+            lote.error = e
+        finally:
+            self._registrar(lote)
+            lote.listo.set()
+
+    def _resultado(self, lote, indice, elemento):
+        if lote.error is not None:
+            raise lote.error
+        if lote.reintentar:
+            return self.procesar_uno(elemento)
+        return lote.resultados[indice]
+
+    async def enviar_async(self, elemento):
+        """Igual que enviar, para el event loop; el lote lo despacha una tarea propia"""
+        if not self.habilitado:
+            return await self.procesar_uno_async(elemento)
+
+        lote = self._abierto_async
+        if lote is None:
+            lote = self._abierto_async = _Lote()
+            lote.listo = asyncio.Event()
+            lote.lleno = asyncio.Event()
+            lote.tarea = asyncio.ensure_future(self._despachar_async(lote))
+        indice = len(lote.elementos)
+        lote.elementos.append(elemento)
+        if len(lote.elementos) >= self.max_tamano:
+            self._abierto_async = None
+            lote.lleno.set()
+
+        await lote.listo.wait()
+        if lote.error is not None:
+            raise lote.error
+        if lote.reintentar:
+            return await self.procesar_uno_async(elemento)
+        return lote.resultados[indice]
+
+    async def _despachar_async(self, lote):
+        try:
+            await asyncio.wait_for(lote.lleno.wait(), timeout=self.espera)
+        except asyncio.TimeoutError:
+            pass
+        if self._abierto_async is lote:
+            self._abierto_async = None
+        lote.despachado = time.monotonic()
+        try:
+            if len(lote.elementos) == 1:
+                lote.resultados = [await self.procesar_uno_async(lote.elementos[0])]
+            else:
+                lote.resultados = await self.procesar_lote_async(lote.elementos)
+                lote.reintentar = lote.resultados is None
+        except Exception as e:
+            lote.error = e
+        finally:
+            self._registrar(lote)
+            lote.listo.set()
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                "habilitado": self.habilitado,
+                "max_tamano": self.max_tamano,
+                "espera_ms": round(self.espera * 1000, 1),
+                "lotes": self.lotes,
+                "elementos": self.elementos,
+                "tamano_promedio": round(self.elementos / self.lotes, 2) if self.lotes else 0.0,
+                "max_observado": self.max_observado,
+                "espera_promedio_ms": round(self.espera_total / self.lotes * 1000, 1) if self.lotes else 0.0,
+                "reintentos_individuales": self.reintentos,
+                # Un lote reintentado cuesta una llamada más que haberlos enviado por separado
+                "llamadas_ahorradas": self.elementos - self.lotes - self.elementos_reintentados
+            }
+
+
+def crear_micro_lotes(procesar_lote, procesar_uno, procesar_lote_async, procesar_uno_async):
+    """Micro-lotes de clasificación configurados desde variables de entorno (deshabilitados por omisión)"""
+    return MicroLotes(
+        procesar_lote, procesar_uno, procesar_lote_async, procesar_uno_async,
+        habilitado=os.environ.get("LLM_MICROLOTES", "").lower() in ("1", "true", "si", "sí"),
+        max_tamano=int(os.environ.get("LLM_MICROLOTES_MAX", 8)),
+        espera=float(os.environ.get("LLM_MICROLOTES_ESPERA_MS", 50)) / 1000,
+        nombre="clasificaciones"
+    )
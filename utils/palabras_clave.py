@@ -0,0 +1,121 @@
+import os
+import logging
+import threading
+from functools import lru_cache
+
+from utils.aho_corasick import AutomataAhoCorasick
+from data.vocabulario_data import SALUDOS, DESPEDIDAS, INDICADORES_NOMBRE, PALABRAS_CONSULTA_BD, PALABRAS_CONTACTO
+from data.ubicaciones_data import (
+    PALABRAS_UBICACION, PALABRAS_INTENCION_UBICACION, PALABRAS_LISTADO_UBICACIONES, PALABRAS_CERCANIA, PALABRAS_REFERENCIA, REFERENCIAS_UBICACION
+)
+from data.servicios_data import (
+    PALABRAS_CLAVE, PALABRAS_CALZADO, PALABRAS_TEXTILES, PALABRAS_COTIZACION, PALABRAS_HORARIOS, PALABRAS_RESTRICCIONES
+)
+
+logger = logging.getLogger(__name__)
+
+
+def categoria_servicio(servicio):
+    return f"servicio:{servicio}"
+
+
+def categorias_palabras():
+    """Todas las listas de palabras clave del bot, por categoría"""
+    categorias = {
+        'saludo': SALUDOS,
+        'despedida': DESPEDIDAS,
+        'solicitud_nombre': INDICADORES_NOMBRE,
+        'consulta_bd': PALABRAS_CONSULTA_BD,
+        'ubicacion': PALABRAS_UBICACION,
+        'intencion_ubicacion': PALABRAS_INTENCION_UBICACION,
+        'ubicacion_listado': PALABRAS_LISTADO_UBICACIONES,
+        'ubicacion_cercana': PALABRAS_CERCANIA,
+        'ubicacion_referencia': PALABRAS_REFERENCIA,
+        'referencia_indice': list(REFERENCIAS_UBICACION),
+        'calzado': PALABRAS_CALZADO,
+        'textil': PALABRAS_TEXTILES,
+        'cotizacion': PALABRAS_COTIZACION,
+        'horarios': PALABRAS_HORARIOS,
+        'restricciones': PALABRAS_RESTRICCIONES,
+        'contacto': PALABRAS_CONTACTO
+    }
+    for servicio, palabras in PALABRAS_CLAVE.items():
+        categorias[categoria_servicio(servicio)] = palabras
+    return categorias
+
+
+class Coincidencias:
+    """Palabras clave encontradas en un mensaje, agrupadas por categoría en orden de aparición"""
+
+    def __init__(self, hallazgos):
+        self._por_categoria = {}
+        for _, palabra, categoria in hallazgos:
+            palabras = self._por_categoria.setdefault(categoria, [])
+            if palabra not in palabras:
+                palabras.append(palabra)
+
+    def __contains__(self, categoria):
+        return categoria in self._por_categoria
+
+    def palabras(self, categoria):
+        return tuple(self._por_categoria.get(categoria, ()))
+
+    @property
+    def categorias(self):
+        return tuple(self._por_categoria)
+
+
+class DetectorPalabras:
+    """
+    Un solo autómata con las palabras clave de todos los detectores (saludos, módulos, calzado/textiles...).
+    Cada mensaje se recorre una vez y el resultado se memoriza, así que los predicados que se
+    consultan en distintas etapas sobre el mismo mensaje no vuelven a recorrerlo.
+    """
+
+    def __init__(self, categorias, max_entradas=2048):
+        pares = [(palabra.lower(), categoria) for categoria, palabras in categorias.items() for palabra in palabras]
+        self.automata = AutomataAhoCorasick(pares)
+        self.total_palabras = len(pares)
+        self._memo = lru_cache(maxsize=max_entradas)(self._buscar)
+        logger.info(f"🔎 Detector de palabras clave: {self.total_palabras} palabras en {len(categorias)} categorías")
+
+    def _buscar(self, minusculas):
+        return Coincidencias(self.automata.buscar(minusculas))
+
+    def detectar(self, mensaje):
+        return self._memo(mensaje.lower())
+
+    def detectar_minusculas(self, minusculas):
+        """Para texto ya en minúsculas (MensajeNormalizado.minusculas)"""
+        return self._memo(minusculas)
+
+    def estadisticas(self):
+        memo = self._memo.cache_info()
+        consultas = memo.hits + memo.misses
+        return {
+            'palabras': self.total_palabras,
+            'estados': len(self.automata),
+            'mensajes_memorizados': memo.currsize,
+            'tasa_memo': round(memo.hits / consultas, 4) if consultas else 0.0
+        }
+
+
+_detector = None
+_lock = threading.Lock()
+
+
+def obtener_detector():
+    """Detector compartido por el proceso; se construye una sola vez"""
+    global _detector
+    if _detector is None:
+        with _lock:
+            if _detector is None:
+                _detector = DetectorPalabras(
+                    categorias_palabras(), max_entradas=int(os.environ.get("PALABRAS_CLAVE_MEMO_MAX", "2048"))
+                )
+    return _detector
+
+
+def detectar_palabras(texto):
+    """Coincidencias de todas las categorías en una sola pasada sobre el texto"""
+    return obtener_detector().detectar(texto)
@@ -0,0 +1,60 @@
+import threading
+from collections import namedtuple, deque
+
+# Etapa del procesamiento de un mensaje: `metodo` es el nombre del método del motor que la implementa
+# (con variante opcional `<metodo>_async`) y `formatear` indica si su respuesta pasa por el formato con nombre
+Etapa = namedtuple('Etapa', ['nombre', 'metodo', 'formatear'])
+
+
+class MetricasEtapas:
+    """Latencia y tasa de resolución por etapa del pipeline, sobre una ventana de mensajes recientes"""
+
+    def __init__(self, ventana=500):
+        self.ventana = ventana
+        self._por_etapa = {}
+        self._lock = threading.Lock()
+
+    def _datos(self, nombre):
+        datos = self._por_etapa.get(nombre)
+        if datos is None:
+            datos = self._por_etapa[nombre] = {
+                'latencias': deque(maxlen=self.ventana), 'ejecuciones': 0, 'resueltas': 0, 'errores': 0
+            }
+        return datos
+
+    def registrar(self, nombre, segundos, resolvio):
+        with self._lock:
+            datos = self._datos(nombre)
+            datos['latencias'].append(segundos)
+            datos['ejecuciones'] += 1
+            datos['resueltas'] += bool(resolvio)
+
+    def registrar_error(self, nombre):
+        # El error se registra antes que la latencia: la primera ejecución de una etapa también puede fallar
+        with self._lock:
+            self._datos(nombre)['errores'] += 1
+
+    def estadisticas(self):
+        with self._lock:
+            resultado = {}
+            for nombre, datos in self._por_etapa.items():
+                latencias = sorted(datos['latencias'])
+                resultado[nombre] = {
+                    'ejecuciones': datos['ejecuciones'],
+                    'resueltas': datos['resueltas'],
+                    'errores': datos['errores'],
+                    'latencia_media_ms': round(sum(latencias) / len(latencias) * 1000, 3) if latencias else 0.0,
+                    'latencia_p95_ms': round(latencias[int(0.95 * (len(latencias) - 1))] * 1000, 3) if latencias else 0.0
+                }
+            return resultado
+
+
+class SolicitudMensaje:
+    """Estado de un mensaje mientras recorre las etapas: el contexto se lee una sola vez"""
+
+    def __init__(self, mensaje, user_id, contexto):
+        self.mensaje = mensaje          # MensajeNormalizado
+        self.user_id = user_id
+        self.contexto = contexto
+        self.mensaje_corregido = None   # se calcula en la primera etapa que lo necesita
+        self.tiempos = {}               # nombre de etapa -> segundos
@@ -0,0 +1,160 @@
+import re
+import logging
+import textwrap
+import threading
+from config import CONTEXTO_GENERAL
+
+logger = logging.getLogger(__name__)
+
+# Parte invariante del prompt: se calcula una sola vez al importar el módulo. Al enviarse
+# idéntica como mensaje de sistema en cada llamada, los proveedores con caché de prefijo
+# (DeepSeek, OpenAI, etc. vía OpenRouter) la reutilizan y solo procesan la pregunta.
+PREFIJO_CLASIFICACION = textwrap.dedent("""\
+    Eres ALMAssist, asistente especializado de ARGO Almacenadora, actuando como ejecutivo comercial de prospección y atención a clientes.
+
+    OBJETIVO PRINCIPAL:
+    Proporcionar información clara, precisa y profesional sobre servicios especializados de almacenaje y logística como Almacén General de Depósito, captando solicitudes de información, quejas o requerimientos de clientes activos.
+
+    CONTEXTO DE LA EMPRESA:
+    {contexto}
+
+    MARCO LEGAL DE REFERENCIA:
+    • Ley General de Organizaciones y Actividades Auxiliares del Crédito
+    • Ley General de Títulos y Operaciones de Crédito
+    • Ley Aduanera
+
+    UBICACIONES DISPONIBLES (SOLO estas):
+    - CENTRAL CÓRDOBA: Corporativo Córdoba, Almacén Peñuela, Almacén Atoyaquillo
+    - PLAZA GOLFO: Almacén Ulúa, Almacén Acacias
+    - PLAZA PUEBLA: Almacén Cuautlancingo
+    - PLAZA MÉXICO: Almacén Tabla Honda, Almacén Ceylan, Almacén Pantaco
+    - PLAZA BAJÍO: Almacén Querétaro
+    - PLAZA OCCIDENTE: Almacén Guadalajara
+    - PLAZA PENÍNSULA: Almacén Mérida
+    - PLAZA NORESTE: Almacén Monterrey
+
+    INSTRUCCIONES ESPECÍFICAS:
+    1. TONO: Formal, cordial y empático (ejecutivo comercial). Sin lenguaje emotivo ni promocional.
+    2. Para UBICACIONES: Responder EXACTAMENTE "UBICACIONES: [TIPO]|[VALOR]"
+    - TIPOS: GENERAL, ESPECIFICA, DETALLES, REFERENCIA, CERCANA
+    3. Si preguntan por ubicación cercana: "UBICACIONES: CERCANA|[CIUDAD o ESTADO del usuario, si la menciona]"
+    4. Si mencionan ciudad/estado: "UBICACIONES: ESPECIFICA|[CIUDAD]"
+    5. Para SERVICIOS: "SERVICIOS: [TIPO]|[DETALLE]"
+    6. Para HORARIOS: "HORARIOS: |"
+    7. Para RESTRICCIONES: "RESTRICCIONES: |"
+    8. Para CONTACTO HUMANO: "CONTACTO: EJECUTIVO|"
+    9. Si no tienes información suficiente: Ofrecer contacto de ejecutivo humano inmediatamente.
+    10. Las respuestas deben estar respaldadas por el marco legal mencionado cuando sea pertinente.
+
+    EJEMPLOS DE RESPUESTAS:
+    - "¿Dónde tienen almacenes?" → "UBICACIONES: GENERAL|"
+    - "Almacenes en Veracruz" → "UBICACIONES: ESPECIFICA|Veracruz"
+    - "Quiero la más cercana" → "UBICACIONES: CERCANA|"
+    - "¿Cuál me queda más cerca? Estoy en Toluca" → "UBICACIONES: CERCANA|Toluca"
+    - "Almacén Ulúa" → "UBICACIONES: ESPECIFICA|Ulúa"
+    - "¿Qué servicios ofrecen?" → "SERVICIOS: GENERAL|"
+    - "Necesito hablar con alguien" → "CONTACTO: EJECUTIVO|"
+    - "No entiendo" → "Le comento que..."
+    - "¿A qué hora abren?" → "HORARIOS: | "
+    - "¿Qué no se puede almacenar?" → "RESTRICCIONES: |"
+
+    Responde SOLO con el formato especificado, manteniendo el tono formal de ejecutivo comercial y refiriendo al marco legal cuando corresponda.
+    """).format(contexto=CONTEXTO_GENERAL)
+
+MENSAJE_SISTEMA_CLASIFICACION = {'role': 'system', 'content': PREFIJO_CLASIFICACION}
+
+
+def estimar_tokens(texto):
+    """Estimación rápida (~4 caracteres por token) para cuando el proveedor no reporta usage"""
+    return max(1, len(texto) // 4)
+
+TOKENS_PREFIJO_ESTIMADOS = estimar_tokens(PREFIJO_CLASIFICACION)
+
+
+def construir_mensajes_clasificacion(mensaje_corregido):
+    """Mensajes para la clasificación: prefijo fijo de sistema + sufijo con la pregunta"""
+    return [
+        MENSAJE_SISTEMA_CLASIFICACION,
+        {'role': 'user', 'content': f'Pregunta: "{mensaje_corregido}"'}
+    ]
+
+
+# Sufijo para micro-lotes: el prefijo de sistema es el mismo, así que también se reutiliza en caché
+INSTRUCCION_LOTE = (
+    "Clasifica cada pregunta por separado. Responde con una línea por pregunta, en el mismo orden, "
+    "con el formato 'N. respuesta' y nada más."
+)
+
+_LINEA_LOTE = re.compile(r'^\s*(\d+)[.)]\s*(.+?)\s*$')
+
+def construir_mensajes_lote(mensajes_corregidos):
+    """Mensajes para clasificar varias preguntas numeradas en una sola llamada"""
+    preguntas = "\n".join(f'{i}. "{mensaje}"' for i, mensaje in enumerate(mensajes_corregidos, 1))
+    return [
+        MENSAJE_SISTEMA_CLASIFICACION,
+        {'role': 'user', 'content': f"{INSTRUCCION_LOTE}\n\nPreguntas:\n{preguntas}"}
+    ]
+
+def interpretar_respuesta_lote(texto, cantidad):
+    """Separa la respuesta de un lote en una respuesta por pregunta; None si no trae exactamente una por número"""
+    respuestas = {}
+    for linea in texto.splitlines():
+        if not linea.strip():
+            continue
+        coincidencia = _LINEA_LOTE.match(linea)
+        if not coincidencia:
+            return None
+        numero = int(coincidencia.group(1))
+        if numero in respuestas or not 1 <= numero <= cantidad:
+            return None
+        respuestas[numero] = coincidencia.group(2).strip('"').strip()
+    if len(respuestas) != cantidad:
+        return None
+    return [respuestas[i] for i in range(1, cantidad + 1)]
+
+
+class ContadorTokens:
+    """Acumula los tokens de entrada/salida y los tokens servidos desde la caché de prefijo, por modelo"""
+
+    def __init__(self):
+        self._por_modelo = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, modelo, usage, mensajes=None):
+        """Registra el usage devuelto por el proveedor; si no viene, estima a partir de los mensajes"""
+        usage = usage or {}
+        prompt_tokens = usage.get('prompt_tokens')
+        estimado = prompt_tokens is None
+        if estimado:
+            prompt_tokens = sum(estimar_tokens(m['content']) for m in (mensajes or []))
+        completion_tokens = usage.get('completion_tokens') or 0
+
+        # OpenAI/OpenRouter: prompt_tokens_details.cached_tokens; DeepSeek: prompt_cache_hit_tokens
+        detalles = usage.get('prompt_tokens_details') or {}
+        tokens_cache = detalles.get('cached_tokens') or usage.get('prompt_cache_hit_tokens') or 0
+
+        with self._lock:
+            datos = self._por_modelo.setdefault(modelo, {
+                'llamadas': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+                'tokens_cache': 0, 'llamadas_estimadas': 0
+            })
+            datos['llamadas'] += 1
+            datos['prompt_tokens'] += prompt_tokens
+            datos['completion_tokens'] += completion_tokens
+            datos['tokens_cache'] += tokens_cache
+            datos['llamadas_estimadas'] += estimado
+
+        logger.info(f"Tokens {modelo}: prompt={prompt_tokens} (caché={tokens_cache}) salida={completion_tokens}")
+        return prompt_tokens
+
+    def estadisticas(self):
+        with self._lock:
+            resultado = {}
+            for modelo, datos in self._por_modelo.items():
+                resultado[modelo] = dict(
+                    datos,
+                    prompt_tokens_promedio=round(datos['prompt_tokens'] / datos['llamadas'], 1),
+                    fraccion_cache=round(datos['tokens_cache'] / datos['prompt_tokens'], 3) if datos['prompt_tokens'] else 0.0
+                )
+            resultado['prefijo_tokens_estimados'] = TOKENS_PREFIJO_ESTIMADOS
+            return resultado
@@ -0,0 +1,198 @@
+import random
+import logging
+import threading
+from collections import deque
+from utils.rate_limiter import ProveedorOcupadoError, etiqueta_key
+
+logger = logging.getLogger(__name__)
+
+# Latencia supuesta para destinos sin historial, para que también reciban tráfico
+LATENCIA_INICIAL = 3.0
+MIN_MUESTRAS = 5
+
+class DestinoLLM:
+    """Combinación de endpoint + API key + modelo con sus métricas observadas"""
+
+    def __init__(self, proveedor, api_url, api_key, modelo, headers_extra=None, ventana=100):
+        self.proveedor = proveedor
+        self.api_url = api_url
+        self.api_key = api_key
+        self.modelo = modelo
+        self.headers_extra = headers_extra or {}
+        self.nombre = f"{proveedor}:{modelo}:{etiqueta_key(api_key)}"
+        self._latencias = deque(maxlen=ventana)
+        self._resultados = deque(maxlen=ventana)   # True = éxito, False = error
+        self._limite = None                         # X-RateLimit-Limit
+        self._restantes = None                      # X-RateLimit-Remaining
+        self._429_consecutivos = 0                  # solo 429 seguidos: otro resultado reinicia la cuenta
+        self._lock = threading.Lock()
+
+    def headers(self):
+        headers = {
+            'Authorization': f'Bearer {self.api_key}',
+            'Content-Type': 'application/json'
+        }
+        headers.update(self.headers_extra)
+        return headers
+
+    def registrar_exito(self, latencia, headers_respuesta=None):
+        with self._lock:
+            self._latencias.append(latencia)
+            self._resultados.append(True)
+            self._429_consecutivos = 0
+            self._leer_rate_limit(headers_respuesta)
+
+    def registrar_error(self, latencia, headers_respuesta=None, status_code=None):
+        """Registra un fallo y retorna cuántos 429 consecutivos lleva el destino (0 si el fallo no fue un 429)"""
+        with self._lock:
+            self._latencias.append(latencia)
+            self._resultados.append(False)
+            self._429_consecutivos = self._429_consecutivos + 1 if status_code == 429 else 0
+            self._leer_rate_limit(headers_respuesta)
+            return self._429_consecutivos
+
+    def _leer_rate_limit(self, headers_respuesta):
+        if not headers_respuesta:
+            return
+        try:
+            if headers_respuesta.get('X-RateLimit-Limit') is not None:
+                self._limite = float(headers_respuesta['X-RateLimit-Limit'])
+            if headers_respuesta.get('X-RateLimit-Remaining') is not None:
+                self._restantes = float(headers_respuesta['X-RateLimit-Remaining'])
+        except (TypeError, ValueError):
+            pass
+
+    def percentil_latencia(self, percentil=0.95):
+        with self._lock:
+            latencias = sorted(self._latencias)
+        if len(latencias) < MIN_MUESTRAS:
+            return None
+        indice = min(len(latencias) - 1, int(round(percentil * (len(latencias) - 1))))
+        return latencias[indice]
+
+    def tasa_error(self):
+        with self._lock:
+            if not self._resultados:
+                return 0.0
+            return self._resultados.count(False) / len(self._resultados)
+
+    def holgura(self):
+        """Fracción del rate limit que le queda al destino según los headers del proveedor (1.0 si no se conoce)"""
+        with self._lock:
+            if self._limite and self._restantes is not None:
+                return max(0.0, min(1.0, self._restantes / self._limite))
+        return 1.0
+
+    def estadisticas(self):
+        p95 = self.percentil_latencia()
+        with self._lock:
+            muestras = len(self._latencias)
+        return {
+            "proveedor": self.proveedor,
+            "modelo": self.modelo,
+            "muestras": muestras,
+            "p95": round(p95, 3) if p95 is not None else None,
+            "tasa_error": round(self.tasa_error(), 3),
+            "holgura": round(self.holgura(), 3)
+        }
+
+
+class RouterProveedores:
+    """Reparte las clasificaciones entre varias keys/modelos según p95, tasa de error y holgura de rate limit"""
+
+    def __init__(self, destinos, limitador, max_penalizacion=30):
+        self.destinos = list(destinos)
+        self.limitador = limitador
+        self.max_penalizacion = max_penalizacion
+        self._selecciones = {destino.nombre: 0 for destino in self.destinos}
+        self._lock = threading.Lock()
+
+    def _costo(self, destino):
+        p95 = destino.percentil_latencia()
+        if p95 is None:
+            # Sin historial: usar la mediana de los demás para explorar sin castigar ni favorecer
+            conocidos = [d.percentil_latencia() for d in self.destinos if d is not destino]
+            conocidos = sorted(p for p in conocidos if p is not None)
+            p95 = conocidos[len(conocidos) // 2] if conocidos else LATENCIA_INICIAL
+        return p95 * (1 + 4 * destino.tasa_error()) / max(destino.holgura(), 0.05)
+
+    def _candidatos(self, excluir=None):
+        """Destinos ordenados aleatoriamente con peso inverso al costo"""
+        if not self.destinos:
+            raise ValueError("❌ No hay proveedores de LLM configurados (OPENROUTER_API_KEY / OPENROUTER_API_KEYS)")
+        restantes = [(destino, 1.0 / self._costo(destino)) for destino in self.destinos if destino is not excluir]
+        orden = []
+        while restantes:
+            total = sum(peso for _, peso in restantes)
+            punto = random.uniform(0, total)
+            acumulado = 0.0
+            for i, (destino, peso) in enumerate(restantes):
+                acumulado += peso
+                if acumulado >= punto:
+                    orden.append(restantes.pop(i)[0])
+                    break
+            else:
+                orden.append(restantes.pop()[0])
+        if excluir is not None:
+            # Como alternativa a un destino, primero los de otro modelo y después otras keys del mismo
+            orden.sort(key=lambda destino: destino.modelo == excluir.modelo)
+        return orden
+
+    def _contar(self, destino):
+        with self._lock:
+            self._selecciones[destino.nombre] = self._selecciones.get(destino.nombre, 0) + 1
+
+    @staticmethod
+    def _plazos(plazo):
+        """
+        Primero se busca un destino con turno inmediato (plazo 0) y solo si ninguno lo tiene se espera,
+        para no quedarse esperando al primer candidato mientras otro tiene tokens ahora mismo
+        """
+        return (0,) if plazo == 0 else (0, plazo)
+
+    def adquirir_destino(self, plazo=None, excluir=None):
+        """Elige un destino con turno disponible; si todos están ocupados lanza ProveedorOcupadoError"""
+        ultimo_error = ProveedorOcupadoError("No hay destinos alternativos disponibles")
+        candidatos = self._candidatos(excluir)
+        for plazo_intento in self._plazos(plazo):
+            for destino in candidatos:
+                try:
+                    self.limitador.adquirir(destino.api_key, destino.modelo, plazo_intento)
+                    self._contar(destino)
+                    return destino
+                except ProveedorOcupadoError as e:
+                    ultimo_error = e
+        raise ultimo_error
+
+    async def adquirir_destino_async(self, plazo=None, excluir=None):
+        """Versión awaitable de adquirir_destino"""
+        ultimo_error = ProveedorOcupadoError("No hay destinos alternativos disponibles")
+        candidatos = self._candidatos(excluir)
+        for plazo_intento in self._plazos(plazo):
+            for destino in candidatos:
+                try:
+                    await self.limitador.adquirir_async(destino.api_key, destino.modelo, plazo_intento)
+                    self._contar(destino)
+                    return destino
+                except ProveedorOcupadoError as e:
+                    ultimo_error = e
+        raise ultimo_error
+
+    def registrar_exito(self, destino, latencia, headers_respuesta=None):
+        destino.registrar_exito(latencia, headers_respuesta)
+
+    def registrar_error(self, destino, latencia, status_code=None, headers_respuesta=None):
+        rechazos = destino.registrar_error(latencia, headers_respuesta, status_code)
+        if status_code == 429:
+            # Backoff exponencial por 429 consecutivos del destino: 5, 10, 20, 30 segundos
+            pausa = min(self.max_penalizacion, 5 * 2 ** (rechazos - 1))
+            logger.warning(f"⚠️ Error 429 en {destino.nombre} - pausando {pausa}s")
+            self.limitador.penalizar(destino.api_key, pausa)
+
+    def estadisticas(self):
+        with self._lock:
+            selecciones = dict(self._selecciones)
+        return {
+            destino.nombre: dict(destino.estadisticas(), selecciones=selecciones.get(destino.nombre, 0))
+            for destino in self.destinos
+        }
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ProveedorOcupadoError(Exception):
+    """Se lanza cuando no hay turno disponible con el proveedor antes del plazo"""
+    pass
+
+class TokenBucket:
+    """Token bucket thread-safe con reservas: cada solicitud sabe cuánto esperar sin dormir con el lock tomado"""
+
+    def __init__(self, tasa, capacidad, max_en_espera=20, nombre=""):
+        self.tasa = tasa                  # tokens por segundo
+        self.capacidad = capacidad        # ráfaga máxima
+        self.max_en_espera = max_en_espera
+        self.nombre = nombre
+        self.tokens = float(capacidad)
+        self.ultimo = time.monotonic()    # si está en el futuro, el bucket está penalizado hasta entonces
+        self._en_espera = 0
+        self._lock = threading.Lock()
+        self.concedidos = 0
+        self.rechazados = 0
+        self.espera_total = 0.0
+
+    def _recargar(self, ahora):
+        if ahora > self.ultimo:
+            self.tokens = min(self.capacidad, self.tokens + (ahora - self.ultimo) * self.tasa)
+            self.ultimo = ahora
+
+    def reservar(self, plazo=None):
+        """Reserva un token y retorna los segundos que hay que esperar para usarlo"""
+        with self._lock:
+            ahora = time.monotonic()
+            self._recargar(ahora)
+            self.tokens -= 1
+            espera = max(0.0, self.ultimo - ahora) + max(0.0, -self.tokens) / self.tasa
+
+            if espera > 0:
+                if (plazo is not None and espera > plazo) or self._en_espera >= self.max_en_espera:
+                    self.tokens += 1
+                    self.rechazados += 1
+                    raise ProveedorOcupadoError(
+                        f"Limitador '{self.nombre}' ocupado: espera estimada {espera:.1f}s, "
+                        f"{self._en_espera} solicitudes en cola"
+                    )
+                self._en_espera += 1
+
+            self.concedidos += 1
+            self.espera_total += espera
+            return espera
+
+    def liberar_espera(self):
+        with self._lock:
+            self._en_espera -= 1
+
+    def devolver(self):
+        """Devuelve un token reservado que al final no se usó"""
+        with self._lock:
+            self.tokens = min(self.capacidad, self.tokens + 1)
+            self.concedidos -= 1
+
+    def penalizar(self, segundos):
+        """Tras un 429: ninguna solicitud obtiene turno durante los próximos `segundos`"""
+        with self._lock:
+            self.tokens = min(self.tokens, 0.0)
+            self.ultimo = max(self.ultimo, time.monotonic() + segundos)
+
+    def estadisticas(self):
+        with self._lock:
+            ahora = time.monotonic()
+            self._recargar(ahora)
+            return {
+                "tokens": round(self.tokens, 2),
+                "capacidad": self.capacidad,
+                "tasa_por_minuto": round(self.tasa * 60, 2),
+                "en_espera": self._en_espera,
+                "penalizado_por": round(max(0.0, self.ultimo - ahora), 2),
+                "concedidos": self.concedidos,
+                "rechazados": self.rechazados,
+                "espera_promedio": round(self.espera_total / self.concedidos, 3) if self.concedidos else 0.0
+            }
+
+
+class LimitadorProveedores:
+    """Limitadores por API key y por modelo; una solicitud necesita turno en ambos"""
+
+    def __init__(self, rpm_por_key=None, rpm_por_modelo=None, rafaga=None, max_en_espera=None, plazo=None):
+        self.rpm_por_key = rpm_por_key or float(os.environ.get("OPENROUTER_RPM_POR_KEY", 20))
+        self.rpm_por_modelo = rpm_por_modelo or float(os.environ.get("OPENROUTER_RPM_POR_MODELO", 60))
+        self.rafaga = rafaga or int(os.environ.get("OPENROUTER_RAFAGA", 3))
+        self.max_en_espera = max_en_espera or int(os.environ.get("LLM_MAX_EN_ESPERA", 20))
+        # Plazo máximo (segundos) que una solicitud puede esperar turno antes de responder "ocupado"
+        self.plazo = plazo if plazo is not None else float(os.environ.get("LLM_PLAZO_ESPERA", 5))
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, clave, rpm):
+        with self._lock:
+            if clave not in self._buckets:
+                self._buckets[clave] = TokenBucket(rpm / 60.0, self.rafaga, self.max_en_espera, nombre=clave)
+            return self._buckets[clave]
+
+    def _buckets_para(self, api_key, modelo):
+        buckets = [self._bucket(f"key:{etiqueta_key(api_key)}", self.rpm_por_key)]
+        if modelo:
+            buckets.append(self._bucket(f"modelo:{modelo}", self.rpm_por_modelo))
+        return buckets
+
+    def _reservar(self, buckets, plazo):
+        reservados = []
+        espera = 0.0
+        try:
+            for bucket in buckets:
+                espera_bucket = bucket.reservar(plazo)
+                reservados.append((bucket, espera_bucket))
+                espera = max(espera, espera_bucket)
+        except ProveedorOcupadoError:
+            for bucket, espera_bucket in reservados:
+                if espera_bucket > 0:
+                    bucket.liberar_espera()
+                bucket.devolver()
+            raise
+        return reservados, espera
+
+    def _liberar(self, reservados):
+        for bucket, espera_bucket in reservados:
+            if espera_bucket > 0:
+                bucket.liberar_espera()
+
+    def adquirir(self, api_key, modelo=None, plazo=None):
+        """Obtiene turno esperando como máximo `plazo` segundos; si no, lanza ProveedorOcupadoError"""
+        plazo = self.plazo if plazo is None else plazo
+        reservados, espera = self._reservar(self._buckets_para(api_key, modelo), plazo)
+        try:
+            if espera > 0:
+                logger.debug(f"⏳ Rate limiting: esperando {espera:.2f}s")
+                time.sleep(espera)
+        finally:
+            self._liberar(reservados)
+
+    async def adquirir_async(self, api_key, modelo=None, plazo=None):
+        """Igual que adquirir, pero cede el event loop mientras espera"""
+        plazo = self.plazo if plazo is None else plazo
+        reservados, espera = self._reservar(self._buckets_para(api_key, modelo), plazo)
+        try:
+            if espera > 0:
+                await asyncio.sleep(espera)
+        finally:
+            self._liberar(reservados)
+
+    def penalizar(self, api_key, segundos, modelo=None):
+        for bucket in self._buckets_para(api_key, modelo):
+            bucket.penalizar(segundos)
+
+    def estadisticas(self):
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {clave: bucket.estadisticas() for clave, bucket in buckets.items()}
+
+
+def etiqueta_key(api_key):
+    """Identificador no sensible de una API key para logs y métricas"""
+    if not api_key:
+        return "sin-key"
+    return f"...{api_key[-6:]}"
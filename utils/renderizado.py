@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Cada cuánto se recalcula la huella del catálogo para detectar cambios (0 = solo con invalidar())
+VERIFICAR_SEGUNDOS = float(os.environ.get("RENDERIZADOS_VERIFICAR_SEGUNDOS", "60"))
+
+
+def huella_catalogo(catalogo):
+    """Hash del contenido de los objetos de data/ de los que dependen las respuestas"""
+    serializado = json.dumps(catalogo, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(serializado.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class RenderizadosCatalogo:
+    """
+    Respuestas que solo dependen del catálogo (listado de plazas, horarios, restricciones...):
+    se generan todas al cargar el catálogo y después se sirven desde un dict. Si la huella del
+    catálogo cambia se vuelven a generar; las variantes que no se pre-renderizaron (p. ej. una
+    clave de almacén que inventó el LLM) se generan en el momento sin guardarse.
+    """
+
+    def __init__(self, catalogo, intervalo_verificacion=VERIFICAR_SEGUNDOS):
+        self.catalogo = catalogo
+        self.intervalo_verificacion = intervalo_verificacion
+        self._renderizadores = {}   # nombre -> (función, argumentos() o None)
+        self._renderizados = {}     # (nombre, *args) -> texto
+        self._huella = None
+        self._siguiente_verificacion = float('inf')
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.regeneraciones = 0
+
+    def registrar(self, nombre, funcion, argumentos=None):
+        """argumentos: función que retorna las tuplas de argumentos a pre-renderizar (una por almacén, por servicio...)"""
+        self._renderizadores[nombre] = (funcion, argumentos)
+
+    def precalcular(self):
+        """Genera todas las respuestas registradas con el catálogo actual"""
+        inicio = time.perf_counter()
+        huella = huella_catalogo(self.catalogo)
+        renderizados = {}
+        for nombre, (funcion, argumentos) in self._renderizadores.items():
+            for args in (argumentos() if argumentos else [()]):
+                renderizados[(nombre,) + tuple(args)] = funcion(*args)
+        with self._lock:
+            self._renderizados = renderizados
+            self._huella = huella
+            self.regeneraciones += 1
+            self._programar_verificacion()
+        logger.info(f"🧾 {len(renderizados)} respuestas pre-renderizadas en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    def _programar_verificacion(self):
+        if self.intervalo_verificacion > 0:
+            self._siguiente_verificacion = time.monotonic() + self.intervalo_verificacion
+        else:
+            self._siguiente_verificacion = float('inf')
+
+    def verificar(self):
+        """Regenera si el catálogo cambió desde el último precálculo; retorna True si regeneró"""
+        with self._lock:
+            self._programar_verificacion()
+        if huella_catalogo(self.catalogo) == self._huella:
+            return False
+        logger.info("🧾 El catálogo cambió: regenerando respuestas")
+        self.precalcular()
+        return True
+
+    def invalidar(self):
+        self.precalcular()
+
+    def obtener(self, nombre, *args):
+        if time.monotonic() >= self._siguiente_verificacion:
+            self.verificar()
+        texto = self._renderizados.get((nombre,) + args)
+        if texto is not None:
+            self.aciertos += 1
+            return texto
+        self.fallos += 1
+        return self._renderizadores[nombre][0](*args)
+
+    def estadisticas(self):
+        consultas = self.aciertos + self.fallos
+        return {
+            'respuestas': len(self._renderizados),
+            'huella': self._huella,
+            'regeneraciones': self.regeneraciones,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0
+        }
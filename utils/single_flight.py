@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class _Vuelo:
+    """Llamada en curso a la que pueden unirse otros hilos"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+def _recuperar_excepcion(tarea):
+    """Marca la excepción como recuperada aunque nadie siga esperando la tarea"""
+    if not tarea.cancelled():
+        tarea.exception()
+
+
+class VueloUnico:
+    """Single-flight: las llamadas concurrentes con la misma clave esperan una sola ejecución y comparten su resultado"""
+
+    def __init__(self, nombre=""):
+        self.nombre = nombre
+        self._vuelos = {}         # clave -> _Vuelo (modo con hilos)
+        self._vuelos_async = {}   # clave -> asyncio.Future (modo asíncrono, un solo event loop)
+        self._lock = threading.Lock()
+        self.ejecuciones = 0
+        self.agrupadas = 0
+
+    def _unirse(self, vuelos, clave, crear):
+        """Retorna (vuelo, es_lider) registrando la llamada en las métricas"""
+        with self._lock:
+            vuelo = vuelos.get(clave)
+            if vuelo is None:
+                vuelo = vuelos[clave] = crear()
+                self.ejecuciones += 1
+                return vuelo, True
+            self.agrupadas += 1
+            return vuelo, False
+
+    def _terminar(self, vuelos, clave):
+        with self._lock:
+            vuelos.pop(clave, None)
+
+    def ejecutar(self, clave, funcion):
+        """Ejecuta funcion() o, si ya hay una ejecución con esa clave en curso, espera su resultado"""
+        vuelo, lider = self._unirse(self._vuelos, clave, _Vuelo)
+        if not lider:
+            logger.info(f"🔗 {self.nombre}: solicitud agrupada con una llamada en curso")
+            vuelo.evento.wait()
+            if vuelo.error is not None:
+                raise vuelo.error
+            return vuelo.resultado
+
+        try:
+            vuelo.resultado = funcion()
+            return vuelo.resultado
+        except Exception as e:
+            vuelo.error = e
+            raise
+        finally:
+            # Se retira antes de avisar para que las llamadas nuevas no reciban un resultado ya entregado
+            self._terminar(self._vuelos, clave)
+            vuelo.evento.set()
+
+    async def ejecutar_async(self, clave, funcion):
+        """
+        Igual que ejecutar, pero funcion es una corrutina sin argumentos. La llamada compartida corre en su
+        propia tarea: si se cancela quien la inició, las demás solicitudes agrupadas reciben igual el resultado.
+        """
+        async def compartida():
+            try:
+                return await funcion()
+            finally:
+                # Se retira antes de terminar para que las llamadas nuevas no reciban un resultado ya entregado
+                self._terminar(self._vuelos_async, clave)
+
+        tarea, lider = self._unirse(self._vuelos_async, clave, lambda: asyncio.ensure_future(compartida()))
+        if lider:
+            tarea.add_done_callback(_recuperar_excepcion)
+        else:
+            logger.info(f"🔗 {self.nombre}: solicitud agrupada con una llamada en curso")
+        # shield: cancelar una solicitud (también la que inició la llamada) no cancela la llamada compartida
+        return await asyncio.shield(tarea)
+
+    def estadisticas(self):
+        with self._lock:
+            total = self.ejecuciones + self.agrupadas
+            return {
+                "ejecuciones": self.ejecuciones,
+                "agrupadas": self.agrupadas,
+                "tasa_agrupadas": round(self.agrupadas / total, 3) if total else 0.0,
+                "en_vuelo": len(self._vuelos) + len(self._vuelos_async)
+            }
@@ -0,0 +1,156 @@
+import os
+import time
+import logging
+import threading
+from autocorrect import Speller
+from utils.cache import CacheTTL
+from utils.symspell import cargar_indice, RUTA_INDICE
+from utils.mensaje_normalizado import MensajeNormalizado
+
+logger = logging.getLogger(__name__)
+
+# Tras un fallo al cargar el diccionario (p. ej. sin red para descargarlo) no se corrige hasta el siguiente intento
+REINTENTO_CARGA_SEGUNDOS = float(os.environ.get("ORTOGRAFIA_REINTENTO_SEGUNDOS", "300"))
+# Palabras de 1-2 letras ('y', 'de', 'el') nunca se corrigen: a distancia 2 cualquier palabra las alcanza
+LONGITUD_MINIMA = int(os.environ.get("ORTOGRAFIA_LONGITUD_MINIMA", "3"))
+
+class CorrectorOrtografico:
+    """
+    Corrector ortográfico compartido por el proceso: carga el diccionario una vez y memoriza
+    palabra -> corrección. Usa el índice SymSpell precalculado y, si no existe, autocorrect.
+    """
+
+    def __init__(self, idioma='es', max_entradas=5000, ruta_indice=RUTA_INDICE, reintento=REINTENTO_CARGA_SEGUNDOS,
+                 longitud_minima=LONGITUD_MINIMA):
+        self.idioma = idioma
+        self.longitud_minima = longitud_minima
+        self.ruta_indice = ruta_indice
+        self.reintento = reintento
+        self._speller = None
+        self.motor = None
+        self._lock_carga = threading.Lock()
+        self._reintentar_en = 0.0  # time.monotonic() a partir del cual se vuelve a intentar la carga
+        self.fallos_carga = 0
+        self.ultimo_error = None
+        # Sin expiración: la corrección de una palabra no cambia mientras el diccionario sea el mismo
+        self._memoria = CacheTTL(max_entradas=max_entradas, ttl=float('inf'))
+        self._lock = threading.Lock()
+        self.tiempo_carga = None
+        self.llamadas = 0
+        self.palabras = 0
+        self.preservadas = 0
+        self.tiempo_total = 0.0
+
+    def _obtener_speller(self):
+        """El diccionario, o None si su carga falló hace menos de `reintento` segundos"""
+        if self._speller is None and time.monotonic() >= self._reintentar_en:
+            with self._lock_carga:
+                if self._speller is None and time.monotonic() >= self._reintentar_en:
+                    self._cargar_speller()
+        return self._speller
+
+    def _cargar_speller(self):
+        inicio = time.perf_counter()
+        try:
+            speller = cargar_indice(self.ruta_indice)
+            motor = "symspell"
+            if speller is None:
+                speller = Speller(lang=self.idioma)
+                motor = "autocorrect"
+        except Exception as e:
+            # Se recuerda el fallo: sin esto cada mensaje repetiría la carga (y la descarga) antes de rendirse
+            self._reintentar_en = time.monotonic() + self.reintento
+            self.fallos_carga += 1
+            self.ultimo_error = str(e)
+            logger.warning(f"⚠️ No se pudo cargar el diccionario ortográfico '{self.idioma}': {e}; "
+                           f"se omite la corrección durante {self.reintento:.0f}s")
+            return
+        self._speller = speller
+        self.motor = motor
+        self.tiempo_carga = time.perf_counter() - inicio
+        logger.info(f"✅ Diccionario ortográfico '{self.idioma}' ({self.motor}) cargado en {self.tiempo_carga * 1000:.0f} ms")
+
+    def precargar(self):
+        """Carga el diccionario por adelantado para que el primer mensaje no pague la carga"""
+        self._obtener_speller()
+
+    def corregir_palabra(self, palabra):
+        """Sugerencia del diccionario para una palabra, memorizada"""
+        correccion = self._memoria.obtener(palabra)
+        if correccion is None:
+            speller = self._obtener_speller()
+            if speller is None:
+                return palabra
+            correccion = speller(palabra)
+            self._memoria.guardar(palabra, correccion)
+        return correccion
+
+    def corregir(self, texto, preservar=None, es_valida=None):
+        """
+        Corrige palabra por palabra (un MensajeNormalizado ya trae sus tokens); las más cortas que `longitud_minima`
+        se dejan igual. `preservar(palabra)` descarta la palabra antes de buscarla;
+        `es_valida(original, correccion)` decide si se acepta la sugerencia.
+        """
+        if self._obtener_speller() is None:
+            return str(texto)
+        inicio = time.perf_counter()
+        corregidas = []
+        preservadas = 0
+        palabras = texto.tokens if isinstance(texto, MensajeNormalizado) else texto.split()
+        for palabra in palabras:
+            if len(palabra) < self.longitud_minima or (preservar is not None and preservar(palabra)):
+                preservadas += 1
+                corregidas.append(palabra)
+                continue
+            correccion = self.corregir_palabra(palabra)
+            if es_valida is None or es_valida(palabra, correccion):
+                corregidas.append(correccion)
+            else:
+                corregidas.append(palabra)
+
+        with self._lock:
+            self.llamadas += 1
+            self.palabras += len(corregidas)
+            self.preservadas += preservadas
+            self.tiempo_total += time.perf_counter() - inicio
+        return ' '.join(corregidas)
+
+    def estadisticas(self):
+        memoria = self._memoria.estadisticas()
+        with self._lock:
+            return {
+                "cargado": self._speller is not None,
+                "motor": self.motor,
+                "fallos_carga": self.fallos_carga,
+                "ultimo_error": self.ultimo_error,
+                "reintento_en_s": round(max(0.0, self._reintentar_en - time.monotonic()), 1) if self._speller is None else None,
+                "tiempo_carga_ms": round(self.tiempo_carga * 1000, 1) if self.tiempo_carga is not None else None,
+                "llamadas": self.llamadas,
+                "palabras": self.palabras,
+                "preservadas": self.preservadas,
+                "latencia_promedio_ms": round(self.tiempo_total / self.llamadas * 1000, 3) if self.llamadas else 0.0,
+                "memoria": {
+                    "entradas": memoria["entradas"],
+                    "max_entradas": memoria["max_entradas"],
+                    "aciertos": memoria["aciertos"],
+                    "fallos": memoria["fallos"],
+                    "tasa_aciertos": memoria["tasa_aciertos"],
+                    "desalojados": memoria["desalojados"]
+                }
+            }
+
+
+# Instancia global del corrector (una por proceso)
+_corrector = None
+_corrector_lock = threading.Lock()
+
+def obtener_corrector():
+    """Retorna el corrector ortográfico compartido del proceso, creándolo la primera vez"""
+    global _corrector
+    if _corrector is None:
+        with _corrector_lock:
+            if _corrector is None:
+                _corrector = CorrectorOrtografico(
+                    max_entradas=int(os.environ.get("ORTOGRAFIA_CACHE_MAX", 5000))
+                )
+    return _corrector
@@ -0,0 +1,187 @@
+import os
+import re
+import zlib
+import logging
+from datetime import datetime
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FORMATO_INDICE = 1
+RUTA_INDICE = os.environ.get("ORTOGRAFIA_INDICE", os.path.join("data", "modelos", "indice_ortografico.npz"))
+LONGITUD_PREFIJO = 7
+DISTANCIA_MAXIMA = 2
+
+_TOKEN = re.compile(r'^(\W*)(\w+)(\W*)$')
+
+
+def borrados(palabra, distancia=DISTANCIA_MAXIMA):
+    """La palabra y todas sus variantes con hasta `distancia` letras borradas"""
+    resultado = {palabra}
+    frontera = {palabra}
+    for _ in range(distancia):
+        siguiente = set()
+        for variante in frontera:
+            if len(variante) > 1:
+                for i in range(len(variante)):
+                    siguiente.add(variante[:i] + variante[i + 1:])
+        siguiente -= resultado
+        resultado |= siguiente
+        frontera = siguiente
+    return resultado
+
+
+def _hash(texto):
+    return zlib.crc32(texto.encode('utf-8'))
+
+
+def distancia_edicion(a, b, maximo=None):
+    """Distancia Damerau-Levenshtein (transposiciones adyacentes cuentan como una edición); corta en cuanto supera `maximo`"""
+    if len(a) < len(b):
+        a, b = b, a
+    anterior2 = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            costo = a[i - 1] != b[j - 1]
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                actual[j] = min(actual[j], anterior2[j - 2] + 1)
+        if maximo is not None and min(actual) > maximo and (anterior2 is None or min(anterior) > maximo):
+            return maximo + 1
+        anterior2, anterior = anterior, actual
+    return anterior[-1]
+
+
+class IndiceSymSpell:
+    """
+    Índice de borrados simétricos (SymSpell): cada palabra del diccionario se registra bajo todas sus
+    variantes con hasta 2 letras borradas (de su prefijo). Para corregir basta generar los borrados
+    del token y buscarlos, sin recorrer el diccionario.
+    """
+
+    def __init__(self, palabras, frecuencias, claves, inicios, ids,
+                 longitud_prefijo=LONGITUD_PREFIJO, distancia_maxima=DISTANCIA_MAXIMA, version=None):
+        self.palabras = list(palabras)
+        self.frecuencias = np.asarray(frecuencias, dtype=np.int64)
+        self.claves = np.asarray(claves, dtype=np.uint32)     # hash del borrado, ordenado
+        self.inicios = np.asarray(inicios, dtype=np.int64)    # claves[k] -> ids[inicios[k]:inicios[k + 1]]
+        self.ids = np.asarray(ids, dtype=np.int32)
+        self.longitud_prefijo = int(longitud_prefijo)
+        self.distancia_maxima = int(distancia_maxima)
+        self.version = version
+        self._posicion = {palabra: i for i, palabra in enumerate(self.palabras)}
+
+    def __len__(self):
+        return len(self.palabras)
+
+    def candidatos(self, palabra):
+        """Ids de las palabras del diccionario que comparten algún borrado con `palabra`"""
+        variantes = borrados(palabra[:self.longitud_prefijo], self.distancia_maxima)
+        hashes = np.fromiter((_hash(v) for v in variantes), dtype=np.uint32, count=len(variantes))
+        posiciones = np.searchsorted(self.claves, hashes)
+        encontrados = set()
+        for posicion, valor in zip(posiciones.tolist(), hashes.tolist()):
+            if posicion < len(self.claves) and self.claves[posicion] == valor:
+                encontrados.update(self.ids[self.inicios[posicion]:self.inicios[posicion + 1]].tolist())
+        return encontrados
+
+    def sugerir(self, palabra):
+        """Palabra del diccionario más cercana (menor distancia, luego mayor frecuencia) o None"""
+        if palabra in self._posicion:
+            return palabra
+        mejor = None
+        for i in self.candidatos(palabra):
+            candidata = self.palabras[i]
+            # Los hashes pueden colisionar y el prefijo no ve el final de la palabra: verificar distancia real
+            if abs(len(candidata) - len(palabra)) > self.distancia_maxima:
+                continue
+            distancia = distancia_edicion(palabra, candidata, self.distancia_maxima)
+            if distancia > self.distancia_maxima:
+                continue
+            orden = (distancia, -int(self.frecuencias[i]))
+            if mejor is None or orden < mejor[0]:
+                mejor = (orden, candidata)
+        return mejor[1] if mejor else None
+
+    def __call__(self, token):
+        """Corrige un token conservando signos de puntuación y mayúsculas (misma interfaz que Speller)"""
+        partes = _TOKEN.match(token)
+        if not partes:
+            return token
+        antes, palabra, despues = partes.groups()
+        sugerencia = self.sugerir(palabra.lower())
+        if sugerencia is None:
+            return token
+        if palabra.isupper():
+            sugerencia = sugerencia.upper()
+        elif palabra[0].isupper():
+            sugerencia = sugerencia.capitalize()
+        return f"{antes}{sugerencia}{despues}"
+
+    @classmethod
+    def construir(cls, frecuencias, longitud_prefijo=LONGITUD_PREFIJO, distancia_maxima=DISTANCIA_MAXIMA):
+        """Construye el índice a partir de un dict palabra -> frecuencia"""
+        palabras = sorted(frecuencias, key=lambda palabra: (-frecuencias[palabra], palabra))
+        hashes = []
+        ids = []
+        for i, palabra in enumerate(palabras):
+            for variante in borrados(palabra[:longitud_prefijo], distancia_maxima):
+                hashes.append(_hash(variante))
+                ids.append(i)
+
+        hashes = np.array(hashes, dtype=np.uint32)
+        ids = np.array(ids, dtype=np.int32)
+        orden = np.lexsort((ids, hashes))
+        hashes, ids = hashes[orden], ids[orden]
+        claves, inicios = np.unique(hashes, return_index=True)
+        inicios = np.append(inicios, len(ids))
+
+        return cls(
+            palabras, [frecuencias[palabra] for palabra in palabras], claves, inicios, ids,
+            longitud_prefijo, distancia_maxima, version=datetime.now().strftime("%Y%m%d%H%M%S")
+        )
+
+    def guardar(self, ruta=RUTA_INDICE):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        np.savez_compressed(
+            ruta,
+            formato=np.array(FORMATO_INDICE),
+            version=np.array(self.version or ""),
+            palabras=np.array(self.palabras),
+            frecuencias=self.frecuencias,
+            claves=self.claves,
+            inicios=self.inicios,
+            ids=self.ids,
+            longitud_prefijo=np.array(self.longitud_prefijo),
+            distancia_maxima=np.array(self.distancia_maxima)
+        )
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_INDICE):
+        with np.load(ruta, allow_pickle=False) as datos:
+            formato = int(datos["formato"])
+            if formato != FORMATO_INDICE:
+                raise ValueError(f"Formato de índice {formato} no soportado (se esperaba {FORMATO_INDICE})")
+            return cls(
+                datos["palabras"].tolist(), datos["frecuencias"],
+                datos["claves"], datos["inicios"], datos["ids"],
+                longitud_prefijo=int(datos["longitud_prefijo"]),
+                distancia_maxima=int(datos["distancia_maxima"]),
+                version=str(datos["version"])
+            )
+
+
+def cargar_indice(ruta=RUTA_INDICE):
+    """Carga el índice si existe; sin él, el corrector usa autocorrect"""
+    if not os.path.exists(ruta):
+        logger.info(f"Sin índice ortográfico ({ruta} no existe); se usará autocorrect")
+        return None
+    try:
+        indice = IndiceSymSpell.cargar(ruta)
+        logger.info(f"✅ Índice ortográfico v{indice.version} cargado ({len(indice)} palabras)")
+        return indice
+    except Exception as e:
+        logger.error(f"❌ Error cargando el índice ortográfico: {e}")
+        return None
@@ -0,0 +1,109 @@
+import re
+import math
+from collections import namedtuple, defaultdict
+
+from utils.mensaje_normalizado import quitar_acentos
+from utils.edit_distance import distancia_levenshtein
+
+Candidato = namedtuple('Candidato', ['puntaje', 'texto', 'valor'])
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def plegar(texto):
+    """Minúsculas, sin acentos ni eñes y solo letras/dígitos separados por espacios"""
+    return _NO_ALFANUMERICO.sub(' ', quitar_acentos(texto.lower()).replace('ñ', 'n')).strip()
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra con relleno ('  ulua ' -> '  u', ' ul', 'ulu', 'lua', 'ua ')"""
+    resultado = set()
+    for palabra in texto.split():
+        relleno = f"  {palabra} "
+        for i in range(len(relleno) - 2):
+            resultado.add(relleno[i:i + 3])
+    return resultado
+
+
+def tolerancia_palabra(palabra):
+    """Errores de tecleo admitidos al comparar palabras: ninguno hasta 4 letras, 1 hasta 7 y 2 después"""
+    if len(palabra) <= 4:
+        return 0
+    return 1 if len(palabra) <= 7 else 2
+
+
+class IndiceTrigramas:
+    """
+    Índice invertido trigrama -> entradas, tolerante a errores de tecleo y acentos. El puntaje de una
+    entrada es la fracción (ponderada por IDF) de sus trigramas que aparecen en la consulta, así que una
+    entrada corta se encuentra aunque venga dentro de una frase larga ("dónde queda Ulua").
+    Las entradas que quedan iguales tras plegarlas y quitar palabras vacías se registran una vez (gana la primera).
+    """
+
+    def __init__(self, entradas, palabras_vacias=()):
+        self.palabras_vacias = {plegar(palabra) for palabra in palabras_vacias}
+        self.textos = []
+        self.valores = []
+        self.longitudes = []
+        por_entrada = []
+        vistos = set()
+        for texto, valor in entradas:
+            plegado = self._sin_vacias(plegar(texto))
+            if not plegado or plegado in vistos:
+                continue
+            vistos.add(plegado)
+            self.textos.append(texto)
+            self.longitudes.append(len(plegado))
+            self.valores.append(valor)
+            por_entrada.append(trigramas(plegado))
+
+        frecuencia = defaultdict(int)
+        for conjunto in por_entrada:
+            for trigrama in conjunto:
+                frecuencia[trigrama] += 1
+        total = len(por_entrada)
+        self.pesos = {t: math.log(1 + total / f) for t, f in frecuencia.items()}
+
+        self.invertido = defaultdict(list)
+        self.peso_total = []
+        for i, conjunto in enumerate(por_entrada):
+            for trigrama in conjunto:
+                self.invertido[trigrama].append(i)
+            self.peso_total.append(sum(self.pesos[t] for t in conjunto))
+
+    def _sin_vacias(self, plegado):
+        return ' '.join(p for p in plegado.split() if p not in self.palabras_vacias)
+
+    def __len__(self):
+        return len(self.textos)
+
+    def buscar(self, consulta, limite=5, umbral=0.0):
+        """Candidatos ordenados por puntaje (0 a 1); a igual puntaje gana la entrada más larga y luego la primera registrada"""
+        acumulado = defaultdict(float)
+        for trigrama in trigramas(self._sin_vacias(plegar(consulta))):
+            peso = self.pesos.get(trigrama)
+            if peso is None:
+                continue
+            for i in self.invertido[trigrama]:
+                acumulado[i] += peso
+
+        puntajes = [(round(suma / self.peso_total[i], 4), i) for i, suma in acumulado.items()]
+        puntajes.sort(key=lambda par: (-par[0], -self.longitudes[par[1]], par[1]))
+        return [
+            Candidato(puntaje, self.textos[i], self.valores[i])
+            for puntaje, i in puntajes[:limite] if puntaje >= umbral
+        ]
+
+    def coincide_palabra(self, consulta, texto, todas=False):
+        """
+        Alguna palabra de la entrada (o todas, con `todas`) aparece en la consulta, con tolerancia a errores
+        de tecleo. Los trigramas sueltos pueden coincidir entre palabras distintas ("puedo" y "puebla").
+        """
+        palabras_consulta = self._sin_vacias(plegar(consulta)).split()
+        palabras = self._sin_vacias(plegar(texto)).split()
+        encontradas = (
+            any(distancia_levenshtein(palabra, otra, tolerancia_palabra(palabra)) <= tolerancia_palabra(palabra)
+                for otra in palabras_consulta)
+            for palabra in palabras
+        )
+        return all(encontradas) if todas else any(encontradas)